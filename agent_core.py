@@ -2,8 +2,9 @@
 import sys
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 import json
+import time
 from datetime import datetime
 
 # Add tools directory to path
@@ -14,14 +15,22 @@ from tools.auth_manager import AuthManager
 from tools.ai_manager import AIModelManager
 from tools.voice_manager import VoiceManager
 from tools.file_processor import FileProcessor
+from tools.document_store import DocumentStore
+from tools.voice_pipeline import VoicePipeline
+from tools.metrics import span
+from tools.turn_trace import RECORDER, record_model_call
 
 class ChandanAI:
-    def __init__(self):
-        self.memory = MemoryManager()
-        self.auth = AuthManager()
-        self.ai = AIModelManager()
-        self.voice = VoiceManager()
+    def __init__(self, memory: Optional[MemoryManager] = None, auth: Optional[AuthManager] = None,
+                 ai: Optional[AIModelManager] = None, documents: Optional[DocumentStore] = None,
+                 voice: Optional[VoiceManager] = None):
+        # Components can be passed in, e.g. by the turn replay harness (tools/turn_trace.py)
+        self.memory = memory if memory is not None else MemoryManager()
+        self.auth = auth if auth is not None else AuthManager()
+        self.ai = ai if ai is not None else AIModelManager()
+        self.voice = voice if voice is not None else VoiceManager()
         self.file_processor = FileProcessor()
+        self.documents = documents if documents is not None else DocumentStore()
         
         self.session_id = self._generate_session_id()
         self.is_voice_mode = False
@@ -61,25 +70,75 @@ class ChandanAI:
         return False
     
     def process_command(self, user_input: str) -> str:
-        """Process user command"""
+        """Process user command (recorded as a turn trace when SORMA_TURN_TRACE is set)"""
+        with RECORDER.record("agent", user_input) as turn:
+            turn["session"] = self.session_id
+            response = self._route_command(user_input, turn)
+            turn["output"] = response
+            return response
+    
+    def _route_command(self, user_input: str, turn: Dict[str, Any]) -> str:
+        """Answer one input: authorization, built-in command, file processing or the AI"""
         # Check authorization first
         if not self.is_authorized:
             if not self.authorize(user_input):
+                turn["path"] = "unauthorized"
                 return self.auth.get_unauthorized_response()
         
         # Check for built-in commands
-        command = self.auth.extract_command(user_input)
+        with span("chat.classify"):
+            command = self.auth.extract_command(user_input)
         if command:
-            return self._handle_command(command)
+            turn.update(intent=command["type"], path="command")
+            with span("chat.local"):
+                return self._handle_command(command)
         
         # Check for file processing
         if user_input.lower().startswith("process file:"):
             file_path = user_input[13:].strip()
-            return self._process_file_command(file_path)
+            turn["path"] = "file"
+            with span("chat.file"):
+                return self._process_file_command(file_path)
         
         # Regular AI conversation
+        turn.update(intent="open", path="model")
         return self._get_ai_response(user_input)
     
+    def stream_command(self, user_input: str) -> Iterator[str]:
+        """Like process_command, but streams AI answers token by token (traced the same way)"""
+        if not self.is_authorized or self.auth.extract_command(user_input) or \
+                user_input.lower().startswith("process file:"):
+            yield self.process_command(user_input)
+            return
+        
+        with RECORDER.record("agent_stream", user_input) as turn:
+            turn.update(session=self.session_id, intent="open", path="model")
+            try:
+                with span("chat.context"):
+                    system_prompt = self.ai.get_system_prompt(
+                        self.auth.get_owner_name(),
+                        self._get_context(user_input)
+                    )
+                
+                # Timed including the consumer's pauses between tokens, as in backend/responses.py
+                model_used = self.ai.choose_model()
+                started = time.perf_counter()
+                tokens = []
+                for token in self.ai.stream_with(model_used, user_input, system_prompt):
+                    tokens.append(token)
+                    yield token
+                
+                response = "".join(tokens)
+                turn.update(model_used=model_used, output=response)
+                record_model_call(model_used, user_input, system_prompt, response,
+                                  time.perf_counter() - started)
+                with span("chat.save"):
+                    self.memory.add_conversation(user_input, response)
+            
+            except Exception as e:
+                turn["output"] = f"❌ Error getting AI response: {str(e)}"
+                yield turn["output"]
+    
     def _handle_command(self, command: Dict[str, str]) -> str:
         """Handle built-in commands"""
         cmd_type = command["type"]
@@ -125,35 +184,49 @@ class ChandanAI:
             if "error" in result:
                 return f"❌ {result['error']}"
             
+            # Index the content so later questions can be answered from it
+            indexed = self.documents.add_document(file_path, result)
+            
             # Generate summary using AI
-            summary = self.file_processor.summarize_file(file_path, self.ai)
+            summary = self.file_processor.summarize_file(file_path, self.ai, file_data=result)
             
             # Remember the file processing
             self.memory.remember_fact(f"Processed file: {file_path}")
             
-            return f"📄 File processed successfully!\n\n{summary}"
+            return f"📄 File processed successfully! ({indexed.get('chunks', 0)} sections indexed)\n\n{summary}"
         
         except Exception as e:
             return f"❌ Error processing file: {str(e)}"
     
+    def _get_context(self, user_input: str) -> str:
+        """Memory context plus matching document excerpts, if the question is about a processed file"""
+        context = self.memory.get_context_for_prompt()
+        
+        document_context = self.documents.get_context_for_query(user_input)
+        if document_context:
+            context = f"{context}\n\n{document_context}" if context else document_context
+        return context
+    
     def _get_ai_response(self, user_input: str) -> str:
         """Get AI response with memory context"""
         try:
-            # Get memory context
-            context = self.memory.get_context_for_prompt()
-            
             # Get system prompt
-            system_prompt = self.ai.get_system_prompt(
-                self.auth.get_owner_name(),
-                context
-            )
+            with span("chat.context"):
+                system_prompt = self.ai.get_system_prompt(
+                    self.auth.get_owner_name(),
+                    self._get_context(user_input)
+                )
             
             # Get AI response
+            started = time.perf_counter()
             ai_result = self.ai.get_response(user_input, system_prompt)
             response = ai_result["response"]
+            record_model_call(ai_result["model_used"], user_input, system_prompt, response,
+                              time.perf_counter() - started)
             
             # Save to memory
-            self.memory.add_conversation(user_input, response)
+            with span("chat.save"):
+                self.memory.add_conversation(user_input, response)
             
             # Add model info
             model_info = f" [{ai_result['model_name']} - {ai_result['model_used']}]"
@@ -181,10 +254,11 @@ FILE PROCESSING:
 
 VOICE CONTROL:
 • Say "Hey Chandan" to activate voice mode
+• Run with --enroll-wake-word to detect it on-device (no network)
 • Voice commands work the same as text
 
 SUPPORTED FILES:
-• PDF, DOCX, XLSX, CSV, TXT, JSON
+• PDF, DOCX, PPTX, XLSX, CSV, TXT, MD, HTML, JSON
 
 EXAMPLE USAGE:
 • "remember my favorite color is blue"
@@ -218,9 +292,12 @@ You can also just chat normally - I'll remember our conversation!
                 response = self.process_command(user_input)
                 print(f"\n🤖 Assistant: {response}")
                 
-                # Speak response if voice is enabled
+                # Speak response if voice is enabled; a new answer replaces any unfinished one
                 if self.voice.is_voice_available():
-                    self.voice.speak(response, async_mode=True)
+                    command = self.auth.extract_command(user_input)
+                    self.voice.stop_speaking()
+                    self.voice.speak(response, async_mode=True,
+                                     cache=bool(command) and command["type"] == "help")
             
             except KeyboardInterrupt:
                 print("\n👋 Goodbye!")
@@ -240,36 +317,21 @@ You can also just chat normally - I'll remember our conversation!
         
         self.is_voice_mode = True
         
-        while self.is_voice_mode:
-            try:
-                # Listen for wake word
-                if self.voice.listen_for_wake_word():
-                    print("🎤 Wake word detected! Listening for command...")
-                    
-                    user_input = self.voice.listen(timeout=10)
-                    
-                    if user_input:
-                        print(f"👤 You said: {user_input}")
-                        
-                        if "stop listening" in user_input.lower():
-                            print("🔇 Exiting voice mode")
-                            break
-                        
-                        response = self.process_command(user_input)
-                        print(f"🤖 Assistant: {response}")
-                        
-                        # Speak response
-                        self.voice.speak(response)
-                    
-                    else:
-                        print("❌ No speech detected")
-            
-            except KeyboardInterrupt:
-                print("\n🔇 Exiting voice mode")
-                break
-            except Exception as e:
-                print(f"❌ Voice error: {str(e)}")
+        def on_event(kind: str, text: str):
+            if kind == "heard":
+                print(f"👤 You said: {text}")
+            elif kind == "say":
+                print(f"🤖 {text}")
+            elif kind == "barge_in":
+                print("✋ Interrupted")
+            elif kind == "error":
+                print(f"❌ Voice error: {text}")
+        
+        # Listening, answering and speaking overlap; speech starts at the first full sentence
+        pipeline = VoicePipeline(self.voice, self.stream_command, on_event=on_event)
+        pipeline.run_forever()
         
+        print("🔇 Exiting voice mode")
         self.is_voice_mode = False
 
 def main():
@@ -280,6 +342,9 @@ def main():
     if len(sys.argv) > 1:
         if sys.argv[1] == "--voice":
             agent.voice_mode()
+        elif sys.argv[1] == "--enroll-wake-word":
+            count = agent.voice.enroll_wake_word()
+            print(f"🎤 {count} wake word sample(s) enrolled for local detection")
         elif sys.argv[1] == "--status":
             agent._show_status()
         elif sys.argv[1] == "--help":
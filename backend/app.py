@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Sorma-AI Assistant - FastAPI application factory
+Every route gets its components from one shared Services container
+"""
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, UploadFile, File, Form, Request, Response, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import Optional, Dict, List
+import os
+import json
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+
+from tools.batch_processor import BatchProcessor
+from tools.audio_service import AudioBusyError
+from tools.session_store import SESSION_COOKIE, token_from_headers
+from tools.metrics import REGISTRY, request_metrics_middleware
+from tools.memory_archive import export_memory, import_memory
+
+from backend.services import (Services, get_audio, get_auth, get_documents, get_files,
+                              get_jobs, get_knowledge, get_memory, get_retention, get_services, get_sessions,
+                              get_translator,
+                              get_voice,
+                              is_session_active, require_session, session_middleware)
+from backend.responses import answer_message, fallback_code, routing_stats
+from backend.channel import serve_chat_channel
+
+# Request/Response models
+class ChatRequest(BaseModel):
+    message: str
+    use_voice: Optional[bool] = False
+
+class ChatResponse(BaseModel):
+    response: str
+    timestamp: str
+    model_used: str
+    voice_available: bool = False
+
+class MemoryRequest(BaseModel):
+    fact: str
+    category: Optional[str] = "general"
+
+class AuthRequest(BaseModel):
+    auth_phrase: str
+
+class CodeRequest(BaseModel):
+    task: str
+    language: str = "python"
+    context: Optional[str] = None
+    candidates: int = 1  # generate this many at once and return the best-checked one
+    use_cache: bool = True
+
+class TranslationRequest(BaseModel):
+    text: str
+    target_language: str
+    source_language: Optional[str] = "auto"
+
+class BatchTranslationRequest(BaseModel):
+    segments: List[str]
+    target_language: str
+    source_language: Optional[str] = "auto"
+    split_sentences: bool = True
+
+class VoiceRequest(BaseModel):
+    text: str
+    voice_type: Optional[str] = "default"
+    rate: int = 180
+    volume: float = 0.9
+
+class FileAnalysisRequest(BaseModel):
+    file_path: str
+    analysis_type: str = "summary"
+    background: bool = False
+
+class BatchRequest(BaseModel):
+    target: str
+    recursive: bool = True
+    force: bool = False
+    index_documents: bool = False
+
+class WebSearchRequest(BaseModel):
+    query: str
+    max_results: int = 5
+    sources: Optional[List[str]] = None  # page, document, memory (default: all)
+    answer: bool = False  # also answer from the top passages with the model
+
+class PageRequest(BaseModel):
+    title: str
+    content: str
+    url: Optional[str] = None
+    is_html: bool = False
+
+class SystemStatus(BaseModel):
+    memory_stats: Dict[str, int]
+    ai_models: Dict[str, bool]
+    voice_info: Dict[str, bool]
+    internet_available: bool
+    authorized: bool
+
+# Batch processing only reads files under this directory (relative targets are taken from it)
+BATCH_ROOT = os.getenv("SORMA_BATCH_ROOT", "documents")
+
+# Routes open to everyone
+public = APIRouter()
+
+# Routes that need a session token
+protected = APIRouter(dependencies=[Depends(require_session)])
+
+@public.get("/")
+async def root():
+    """Root endpoint"""
+    return {"message": "Sorma-AI Assistant API", "version": "2.0.0"}
+
+@public.get("/api/status")
+async def get_status(services: Services = Depends(get_services)):
+    """Get system status"""
+    # Probe results are cached by the AI manager, so polling this is cheap
+    status = await run_in_threadpool(services.status)
+    return {**status, "chat_routing": routing_stats(), "authorized": is_session_active()}
+
+@public.get("/metrics")
+async def metrics():
+    """Prometheus metrics for this worker"""
+    return Response(REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
+@public.post("/api/auth")
+async def authenticate(request: AuthRequest, response: Response,
+                       auth_manager=Depends(get_auth), session_manager=Depends(get_sessions)):
+    """Authenticate user and issue a session token"""
+    if auth_manager.is_authorized(request.auth_phrase):
+        auth_manager.update_last_access("api")
+        token = session_manager.create(owner=auth_manager.get_owner_name())
+        response.set_cookie(SESSION_COOKIE, token, max_age=session_manager.ttl, httponly=True, samesite="lax")
+        return {"success": True, "message": "Authentication successful", "token": token,
+                "expires_in": session_manager.ttl}
+    else:
+        raise HTTPException(status_code=401, detail="Invalid authorization phrase")
+
+@public.delete("/api/auth")
+async def logout(request: Request, response: Response, services: Services = Depends(get_services)):
+    """End the current session"""
+    if services.sessions:
+        services.sessions.revoke(token_from_headers(request.headers, request.cookies))
+    response.delete_cookie(SESSION_COOKIE)
+    return {"success": True, "message": "Logged out"}
+
+# Add explicit OPTIONS handler for auth endpoint
+@public.options("/api/auth")
+async def auth_options():
+    """Handle OPTIONS request for auth endpoint"""
+    return {"message": "OK"}
+
+@protected.post("/api/chat")
+async def chat(request: ChatRequest, services: Services = Depends(get_services)):
+    """Chat with AI assistant"""
+    try:
+        # Model calls and memory I/O block, so keep them off the event loop
+        result = await run_in_threadpool(answer_message, services, request.message)
+        response = result["response"]
+
+        # Handle voice if requested
+        voice_available = False
+        voice_manager = services.voice
+        if request.use_voice and voice_manager and voice_manager.get_voice_info()["tts_available"]:
+            try:
+                voice_manager.speak(response, async_mode=True)
+                voice_available = True
+            except Exception as e:
+                print(f"Voice error: {e}")
+
+        return ChatResponse(
+            response=response,
+            timestamp=datetime.now().isoformat(),
+            model_used=result["model_used"],
+            voice_available=voice_available
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@public.websocket("/ws/chat")
+async def chat_channel(websocket: WebSocket):
+    """Chat turns, streamed tokens, job status and system status pushes over one connection"""
+    await serve_chat_channel(websocket, websocket.app.state.services)
+
+@protected.get("/api/memory")
+async def get_memory_items(memory_manager=Depends(get_memory)):
+    """Get all memory"""
+    return {
+        "facts": memory_manager.get_all_facts(),
+        "conversations": memory_manager.get_recent_conversations(20),
+        "stats": memory_manager.get_memory_stats()
+    }
+
+@protected.post("/api/memory")
+async def add_memory(request: MemoryRequest, memory_manager=Depends(get_memory)):
+    """Add memory"""
+    result = memory_manager.remember_fact(request.fact, request.category)
+    return {"success": True, "message": result}
+
+@protected.delete("/api/memory")
+async def clear_memory(memory_manager=Depends(get_memory)):
+    """Clear all memory"""
+    memory_manager.clear_memory()
+    return {"success": True, "message": "Memory cleared"}
+
+@protected.get("/api/memory/export")
+async def export_memory_archive(kinds: str = "conversations,facts", memory_manager=Depends(get_memory)):
+    """Download memory as a compact columnar msgpack archive"""
+    file_name = f"memory-{datetime.now().strftime('%Y%m%d_%H%M%S')}.smem"
+    try:
+        result = await run_in_threadpool(export_memory, memory_manager, f"memory/exports/{file_name}",
+                                         [kind.strip() for kind in kinds.split(",") if kind.strip()])
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return FileResponse(result["file"], media_type="application/x-msgpack", filename=file_name)
+
+@protected.post("/api/memory/import")
+async def import_memory_archive(file: UploadFile = File(...), replace: bool = Form(False),
+                                memory_manager=Depends(get_memory)):
+    """Merge (or with replace, swap in) a memory archive"""
+    temp_path = f"temp_{os.getpid()}_{Path(file.filename or 'memory.smem').name}"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(await file.read())
+        return await run_in_threadpool(import_memory, memory_manager, temp_path, replace)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid memory archive: {e}")
+    finally:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+@protected.get("/api/memory/retention")
+async def get_memory_retention(retention=Depends(get_retention)):
+    """Retention policy, last compaction and cold storage size"""
+    return await run_in_threadpool(retention.get_info)
+
+@protected.post("/api/memory/compact")
+async def compact_memory(retention=Depends(get_retention)):
+    """Run memory compaction now (it also runs in the background)"""
+    return await run_in_threadpool(retention.compact, True)
+
+@protected.post("/api/memory/search")
+async def search_memory(query: str = Form(...), memory_manager=Depends(get_memory)):
+    """Search memory"""
+    results = memory_manager.search_memory(query)
+    return {"results": results, "count": len(results)}
+
+@protected.get("/api/documents")
+async def list_documents(document_store=Depends(get_documents)):
+    """List indexed documents"""
+    return {"documents": document_store.list_documents(), "stats": document_store.get_stats()}
+
+@protected.post("/api/documents/search")
+async def search_documents(query: str = Form(...), top_k: int = Form(3), doc_id: Optional[str] = Form(None),
+                           document_store=Depends(get_documents)):
+    """Retrieve the most relevant document chunks for a question"""
+    results = document_store.search(query, top_k, doc_id)
+    return {"results": results, "count": len(results)}
+
+@protected.delete("/api/documents/{doc_id}")
+async def delete_document(doc_id: str, document_store=Depends(get_documents)):
+    """Remove a document from the index"""
+    if not document_store.remove_document(doc_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"success": True}
+
+@protected.post("/api/voice/listen")
+async def listen_voice(voice_manager=Depends(get_voice)):
+    """Listen to voice input on the server microphone"""
+    try:
+        text = await run_in_threadpool(voice_manager.listen)
+        return {"text": text, "success": True}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/voice/speak")
+async def speak_text(text: str = Form(...), voice_manager=Depends(get_voice)):
+    """Speak text on the server speakers"""
+    try:
+        voice_manager.speak(text, async_mode=True)
+        return {"success": True, "message": "Text spoken"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def run_audio(audio_service, fn, *args):
+    """Run blocking audio work on the bounded audio pool, off the event loop"""
+    try:
+        return await asyncio.wrap_future(audio_service.submit(fn, *args))
+    except AudioBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@protected.post("/api/voice/synthesize")
+@protected.post("/api/voice/tts")
+async def synthesize_speech(request: VoiceRequest, audio_service=Depends(get_audio)):
+    """Synthesise text and stream the WAV audio back"""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="No text to speak")
+
+    try:
+        chunks = audio_service.stream_speech(request.text, rate=request.rate, volume=request.volume)
+    except AudioBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(chunks, media_type="audio/wav",
+                             headers={"Content-Disposition": 'inline; filename="speech.wav"'})
+
+@protected.post("/api/voice/transcribe")
+@protected.post("/api/voice/stt")
+async def transcribe_audio(file: UploadFile = File(...), sample_rate: int = Form(16000),
+                           audio_service=Depends(get_audio)):
+    """Transcribe an uploaded WAV (or raw 16-bit mono PCM) with the offline engine"""
+    data = await file.read()
+    try:
+        result = await run_audio(audio_service, audio_service.transcribe, data, sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {**result, "success": True}
+
+@protected.post("/api/voice/transcribe/stream")
+async def transcribe_audio_stream(request: Request, sample_rate: int = 16000, audio_service=Depends(get_audio)):
+    """Transcribe audio sent as a chunked request body, decoding while it arrives"""
+    try:
+        stream = audio_service.open_stream(sample_rate)
+    except AudioBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    try:
+        with stream:
+            async for chunk in request.stream():
+                if chunk:
+                    await asyncio.wrap_future(stream.feed(chunk))
+            result = await asyncio.wrap_future(stream.finish())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {**result, "success": True}
+
+@protected.post("/api/files/upload")
+async def upload_file(file: UploadFile = File(...), file_processor=Depends(get_files),
+                      services: Services = Depends(get_services)):
+    """Upload and process file"""
+    try:
+        # Save uploaded file temporarily
+        temp_path = f"temp_{file.filename}"
+        with open(temp_path, "wb") as f:
+            content = await file.read()
+            f.write(content)
+
+        # Process file
+        result = await run_in_threadpool(file_processor.process_file, temp_path)
+        if services.documents and "error" not in result:
+            result["document"] = services.documents.add_document(file.filename, result)
+
+        # Clean up
+        try:
+            os.remove(temp_path)
+        except:
+            pass
+
+        return result
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/files/summarize")
+async def summarize_file(file: UploadFile = File(...), file_processor=Depends(get_files),
+                         services: Services = Depends(get_services)):
+    """Summarize uploaded file"""
+    try:
+        # Save uploaded file temporarily
+        temp_path = f"temp_{file.filename}"
+        with open(temp_path, "wb") as f:
+            content = await file.read()
+            f.write(content)
+
+        # Summarize file
+        summary = await run_in_threadpool(file_processor.summarize_file, temp_path, services.ai)
+
+        # Clean up
+        try:
+            os.remove(temp_path)
+        except:
+            pass
+
+        return {"summary": summary, "filename": file.filename}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/files/batch")
+async def batch_process(request: BatchRequest, services: Services = Depends(get_services)):
+    """Process a directory or glob of files under the batch root, streaming one JSON line per file"""
+    root = os.path.abspath(BATCH_ROOT)
+    target = os.path.normpath(os.path.join(root, request.target))
+    if target != root and not target.startswith(root + os.sep):
+        raise HTTPException(status_code=400, detail=f"Batch targets must be inside {BATCH_ROOT}")
+
+    processor = BatchProcessor()
+    events = processor.run(
+        target,
+        recursive=request.recursive,
+        force=request.force,
+        document_store=services.documents if request.index_documents else None,
+        root=root
+    )
+    # Sync generator - Starlette iterates it in a worker thread
+    return StreamingResponse(
+        (json.dumps(event, default=str) + "\n" for event in events),
+        media_type="application/x-ndjson"
+    )
+
+@protected.post("/api/jobs")
+async def submit_job(file: UploadFile = File(...), analysis_type: Optional[str] = Form(None),
+                     job_queue=Depends(get_jobs)):
+    """Queue an uploaded file for background processing"""
+    try:
+        # Keep the upload until the worker is done with it
+        upload_dir = job_queue.jobs_dir / "uploads"
+        upload_dir.mkdir(exist_ok=True)
+        upload_path = upload_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{Path(file.filename).name}"
+        with open(upload_path, "wb") as f:
+            f.write(await file.read())
+
+        job_id = job_queue.submit_file(str(upload_path), analysis_type, file_name=file.filename, cleanup=True)
+        return {"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.get("/api/jobs")
+async def list_jobs(limit: int = 20, job_queue=Depends(get_jobs)):
+    """List recent background jobs"""
+    return {"jobs": job_queue.list_jobs(limit), "stats": job_queue.get_stats()}
+
+@protected.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, include_result: bool = True, job_queue=Depends(get_jobs)):
+    """Get background job status and result"""
+    job = job_queue.get_job(job_id, include_result)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Advanced Features Endpoints
+
+@protected.post("/api/code/generate")
+async def generate_code(request: CodeRequest, services: Services = Depends(get_services)):
+    """Generate code based on requirements (best of ``candidates`` generations, cached)"""
+    try:
+        result = {"error": "Code generator not available"}
+        if services.coder:
+            result = await run_in_threadpool(services.coder.generate, request.task, request.language,
+                                             request.context, request.candidates, request.use_cache)
+        if "error" in result:
+            # No model reachable - return a template to fill in
+            return {"code": fallback_code(request.task, request.language), "language": request.language,
+                    "task": request.task, "model_used": "template"}
+        return {**result, "language": request.language, "task": request.task}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/code/explain")
+async def explain_code(code: str = Form(...), language: str = Form("python"),
+                       services: Services = Depends(get_services)):
+    """Explain code functionality"""
+    try:
+        prompt = f"Explain this {language} code:\n{code}"
+        system_prompt = "You are a code instructor. Explain code clearly and concisely."
+        explanation = await run_in_threadpool(services.ask, prompt, system_prompt)
+        return {"explanation": explanation or "AI not available", "language": language}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/translate")
+async def translate_text(request: TranslationRequest, translator=Depends(get_translator)):
+    """Translate text between languages (sentences already in translation memory are reused)"""
+    try:
+        result = await run_in_threadpool(translator.translate, [request.text], request.target_language,
+                                         request.source_language)
+        stats = result["stats"]
+        if stats["untranslated"] and not stats["translated"] and not stats["cached"]:
+            return {"error": "AI not available"}
+        return {
+            "original": request.text,
+            "translated": result["translations"][0],
+            "source_language": request.source_language,
+            "target_language": request.target_language,
+            "stats": stats
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/translate/batch")
+async def translate_batch(request: BatchTranslationRequest, translator=Depends(get_translator)):
+    """Translate many segments; only sentences missing from translation memory go to the model"""
+    try:
+        result = await run_in_threadpool(translator.translate, request.segments, request.target_language,
+                                         request.source_language, request.split_sentences)
+        return {
+            **result,
+            "source_language": request.source_language,
+            "target_language": request.target_language
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/analyze/file")
+async def analyze_file(request: FileAnalysisRequest, services: Services = Depends(get_services)):
+    """Analyze file content"""
+    try:
+        if request.background and services.jobs:
+            job_id = services.jobs.submit_file(request.file_path, request.analysis_type)
+            return {"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}
+
+        if services.files:
+            result = await run_in_threadpool(services.files.analyze_file, request.file_path, request.analysis_type)
+            return {"analysis": result}
+        else:
+            return {"error": "File processor not available"}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/search/web")
+async def search_web(request: WebSearchRequest, services: Services = Depends(get_services),
+                     knowledge=Depends(get_knowledge)):
+    """Search the local knowledge index (saved pages, documents, memory)"""
+    try:
+        started = time.perf_counter()
+        results = await run_in_threadpool(knowledge.search, request.query, request.max_results, request.sources)
+        response = {
+            "query": request.query,
+            "results": [{key: value for key, value in result.items() if key != "text"} for result in results],
+            "count": len(results),
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+            "source": "Local index"
+        }
+
+        if request.answer:
+            if results:
+                passages = "\n\n".join(f"[{i}] {result['title']}: {result['text']}"
+                                        for i, result in enumerate(results, 1))
+                system_prompt = ("You are a search assistant. Answer the question using only the numbered "
+                                 "passages below and cite them like [1].\n\n" + passages)
+            else:
+                system_prompt = "You are a web search assistant. Provide comprehensive information."
+            answer = await run_in_threadpool(services.ask, request.query, system_prompt)
+            response["answer"] = answer
+            if answer is None:
+                response["answer_error"] = "AI not available"
+        return response
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@protected.post("/api/search/pages")
+async def save_search_page(request: PageRequest, knowledge=Depends(get_knowledge)):
+    """Add a page (plain text or HTML) to the local knowledge index"""
+    result = await run_in_threadpool(knowledge.save_page, request.title, request.content,
+                                     request.url, request.is_html)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return {"success": True, **result}
+
+@protected.get("/api/search/stats")
+async def search_stats(knowledge=Depends(get_knowledge)):
+    """Knowledge index size per source"""
+    return await run_in_threadpool(knowledge.refresh)
+
+# Additional endpoints for verification
+
+@public.get("/api/voice/status")
+async def get_voice_status(services: Services = Depends(get_services)):
+    """Get voice system status"""
+    if not services.voice and not services.audio:
+        return {"available": False, "message": "Voice system not available"}
+
+    audio_info = services.audio.get_info() if services.audio else {}
+    return {
+        "available": True,
+        "tts_available": True,
+        "stt_available": True,
+        "engines": ["default"],
+        "audio": audio_info
+    }
+
+@public.get("/api/files/info")
+async def get_file_info(services: Services = Depends(get_services)):
+    """Get file system information"""
+    file_processor = services.files
+    if not file_processor:
+        return {"status": "File system not available"}
+
+    return {
+        "status": "Available",
+        "supported_formats": file_processor.get_supported_formats(),
+        "max_file_size": "10MB",
+        **file_processor.get_processor_info()
+    }
+
+@public.get("/api/ollama/models")
+async def get_ollama_models(services: Services = Depends(get_services)):
+    """Get available Ollama models"""
+    if not services.ai:
+        return {"models": [], "available": False}
+
+    try:
+        models = await run_in_threadpool(services.ai.list_ollama_models)
+        return {
+            "models": models,
+            "available": len(models) > 0
+        }
+    except Exception as e:
+        return {"models": [], "available": False, "error": str(e)}
+
+@public.get("/api/system/ollama-status")
+@public.get("/api/ollama/status")
+async def get_system_ollama_status(services: Services = Depends(get_services)):
+    """Get detailed Ollama status"""
+    try:
+        if services.ai:
+            available = await run_in_threadpool(services.ai.is_ollama_available)
+            models = await run_in_threadpool(services.ai.list_ollama_models)
+            return {
+                "ollama_available": available,
+                "status": "available" if available else "not_available",
+                "models": models,
+                "active_model": services.ai.offline_model,
+                "endpoint": "http://localhost:11434"
+            }
+        else:
+            return {"ollama_available": False, "error": "AI manager not available"}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def create_app(services: Optional[Services] = None) -> FastAPI:
+    """Build the API app; components are created at startup and shared by every route"""
+    services = services or Services()
+    app = FastAPI(
+        title="Sorma-AI Assistant API",
+        description="Advanced AI Assistant with Memory, Voice, and File Processing",
+        version="2.0.0"
+    )
+    app.state.services = services
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:3001"],
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=["*"],
+        expose_headers=["*"],
+    )
+    app.middleware("http")(session_middleware(services))
+    # Route latency histograms (and per-request span logs when SORMA_SPAN_LOG is set)
+    app.middleware("http")(request_metrics_middleware())
+
+    app.include_router(public)
+    app.include_router(protected)
+
+    @app.on_event("startup")
+    async def startup_event():
+        """Build the shared components and warm up the slow first-request paths"""
+        await run_in_threadpool(services.start)
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        """Let running jobs finish and flush pending writes before exiting"""
+        await run_in_threadpool(services.stop)
+
+    return app
@@ -0,0 +1,321 @@
+# Chat Channel - One WebSocket per client for chat turns, streamed tokens, job status and system status
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+
+from tools.metrics import REGISTRY
+from tools.session_store import token_from_headers
+
+from backend.responses import answer_message, stream_message
+from backend.services import Services
+
+WS_CONNECTIONS = REGISTRY.gauge("websocket_connections", "Open chat channel connections")
+WS_MESSAGES = REGISTRY.counter("websocket_messages_total", "Chat channel messages", ("direction", "type"))
+
+# Close codes (4000-4999 are free for applications)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_HEARTBEAT_TIMEOUT = 4408
+CLOSE_SLOW_CONSUMER = 4429
+
+FINISHED_JOB_STATES = ("completed", "failed")
+
+
+class Outbox:
+    """Outgoing frames of one connection.
+
+    Ordered frames (chat replies) are bounded: ``put`` waits while
+    ``max_frames`` are unsent, which in turn pauses the model stream feeding
+    it. Token frames for the same turn are merged while they wait, so a slow
+    client gets fewer, larger frames instead of a growing backlog. Updates
+    (status, job updates, pings) are keyed: a newer one replaces an unsent
+    older one, and they are sent ahead of queued frames.
+    """
+
+    def __init__(self, max_frames: int = 64):
+        self.max_frames = max_frames
+        self.closed = False
+        self._frames: Deque[Dict[str, Any]] = deque()
+        self._updates: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._changed = asyncio.Condition()
+
+    async def put(self, frame: Dict[str, Any]) -> bool:
+        """Queue a frame, waiting for room; False once the connection is gone"""
+        async with self._changed:
+            last = self._frames[-1] if self._frames else None
+            if (frame["type"] == "token" and last is not None and last["type"] == "token"
+                    and last["id"] == frame["id"]):
+                last["text"] += frame["text"]
+                return not self.closed
+            await self._changed.wait_for(lambda: self.closed or len(self._frames) < self.max_frames)
+            if self.closed:
+                return False
+            self._frames.append(frame)
+            self._changed.notify_all()
+            return True
+
+    async def publish(self, key: str, update: Dict[str, Any]):
+        """Queue an update, replacing an unsent one with the same key"""
+        async with self._changed:
+            self._updates[key] = update
+            self._changed.notify_all()
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Next frame to send, or None once closed"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.closed or self._updates or self._frames)
+            if self.closed:
+                return None
+            if self._updates:
+                frame = self._updates.popitem(last=False)[1]
+            else:
+                frame = self._frames.popleft()
+            self._changed.notify_all()
+            return frame
+
+    async def close(self):
+        async with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+
+class ChatChannel:
+    """Protocol handler for one connection (see README "WebSocket chat channel")"""
+
+    def __init__(self, websocket: WebSocket, services: Services, token: Optional[str] = None,
+                 heartbeat_interval: float = 20.0,
+                 heartbeat_timeout: float = 60.0, send_timeout: float = 30.0,
+                 status_interval: float = 10.0, job_interval: float = 0.5, max_turns: int = 2):
+        self.websocket = websocket
+        self.services = services
+        self.token = token
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.send_timeout = send_timeout
+        self.status_interval = status_interval
+        self.job_interval = job_interval
+        self.outbox = Outbox()
+        self.last_seen = time.monotonic()
+        self._turn_slots = asyncio.Semaphore(max_turns)
+        self._turn_ids = itertools.count(1)
+        self._cancelled: Dict[str, threading.Event] = {}
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._receiver: Optional[asyncio.Task] = None
+        self._close_code: Optional[int] = None
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def run(self):
+        WS_CONNECTIONS.inc()
+        try:
+            self._spawn(self._send_loop())
+            self._spawn(self._heartbeat_loop())
+            self._spawn(self._status_loop())
+            self._receiver = self._spawn(self._receive_loop())
+            await asyncio.wait([self._receiver])
+        finally:
+            await self.outbox.close()
+            for cancelled in self._cancelled.values():
+                cancelled.set()
+            for task in list(self._tasks):
+                task.cancel()
+            WS_CONNECTIONS.inc(-1)
+            if self._close_code is not None:
+                try:
+                    await self.websocket.close(code=self._close_code)
+                except RuntimeError:
+                    pass  # already closed
+
+    async def _disconnect(self, code: Optional[int]):
+        """Stop serving this connection; ``run`` closes the socket"""
+        self._close_code = code
+        await self.outbox.close()
+        if self._receiver:
+            self._receiver.cancel()
+
+    async def _receive_loop(self):
+        while not self.outbox.closed:
+            try:
+                text = await self.websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+            self.last_seen = time.monotonic()
+            try:
+                message = json.loads(text)
+                message_type = message["type"]
+            except (ValueError, KeyError, TypeError):
+                await self.outbox.put({"type": "error", "detail": "Messages must be JSON objects with a 'type'"})
+                continue
+            WS_MESSAGES.inc(direction="in", type=str(message_type))
+            await self._dispatch(message_type, message)
+
+    async def _session_valid(self) -> bool:
+        """Re-check the session, so a revoked or expired one stops being served"""
+        if not self.services.sessions:
+            return False
+        return await run_in_threadpool(self.services.sessions.validate, self.token) is not None
+
+    def _new_turn_id(self) -> str:
+        turn_id = str(next(self._turn_ids))
+        while turn_id in self._cancelled:
+            turn_id = str(next(self._turn_ids))
+        return turn_id
+
+    async def _dispatch(self, message_type: str, message: Dict[str, Any]):
+        if message_type in ("chat", "subscribe") and not await self._session_valid():
+            await self._disconnect(CLOSE_UNAUTHORIZED)
+            return
+        if message_type == "chat":
+            turn_id = str(message["id"]) if message.get("id") else self._new_turn_id()
+            text = str(message.get("message", "")).strip()
+            if turn_id in self._cancelled:
+                await self.outbox.put({"type": "error", "id": turn_id, "detail": "Turn id already in use"})
+            elif not text:
+                await self.outbox.put({"type": "error", "id": turn_id, "detail": "Empty message"})
+            else:
+                self._cancelled[turn_id] = threading.Event()
+                self._spawn(self._chat_turn(turn_id, text, bool(message.get("stream", True))))
+        elif message_type == "cancel":
+            cancelled = self._cancelled.get(str(message.get("id")))
+            if cancelled:
+                cancelled.set()
+        elif message_type == "subscribe":
+            job_id = str(message.get("job_id", ""))
+            if job_id and job_id not in self._jobs:
+                self._jobs[job_id] = self._spawn(self._watch_job(job_id))
+        elif message_type == "unsubscribe":
+            task = self._jobs.pop(str(message.get("job_id", "")), None)
+            if task:
+                task.cancel()
+        elif message_type == "status":
+            await self._push_status()
+        elif message_type == "ping":
+            await self.outbox.publish("pong", {"type": "pong", "time": time.time()})
+        elif message_type != "pong":
+            await self.outbox.put({"type": "error", "detail": f"Unknown message type '{message_type}'"})
+
+    async def _send_loop(self):
+        while True:
+            frame = await self.outbox.get()
+            if frame is None:
+                return
+            WS_MESSAGES.inc(direction="out", type=frame["type"])
+            try:
+                await asyncio.wait_for(self.websocket.send_text(json.dumps(frame, default=str)),
+                                       self.send_timeout)
+            except asyncio.TimeoutError:
+                # The client stopped reading - drop it rather than buffer without bound
+                await self._disconnect(CLOSE_SLOW_CONSUMER)
+                return
+            except (WebSocketDisconnect, RuntimeError):
+                await self._disconnect(None)
+                return
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if time.monotonic() - self.last_seen > self.heartbeat_timeout:
+                await self._disconnect(CLOSE_HEARTBEAT_TIMEOUT)
+                return
+            await self.outbox.publish("ping", {"type": "ping", "time": time.time()})
+
+    async def _push_status(self, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        status = await run_in_threadpool(self.services.status)
+        if status != previous:
+            await self.outbox.publish("status", {"type": "status", "status": status})
+        return status
+
+    async def _status_loop(self):
+        """Push system status on connect and whenever it changes (replaces polling /api/status)"""
+        status = None
+        while True:
+            status = await self._push_status(status)
+            await asyncio.sleep(self.status_interval)
+
+    async def _watch_job(self, job_id: str):
+        """Push a job's status changes until it finishes"""
+        job_queue = self.services.jobs
+        if not job_queue:
+            await self.outbox.put({"type": "error", "job_id": job_id, "detail": "Job queue not available"})
+            return
+        previous = None
+        try:
+            while True:
+                job = await run_in_threadpool(job_queue.get_job, job_id, False)
+                if job is None:
+                    await self.outbox.put({"type": "error", "job_id": job_id, "detail": "Job not found"})
+                    return
+                if job != previous:
+                    finished = job["status"] in FINISHED_JOB_STATES
+                    if finished:
+                        job = await run_in_threadpool(job_queue.get_job, job_id, True)
+                    await self.outbox.publish(f"job:{job_id}", {"type": "job", "job": job})
+                    if finished:
+                        return
+                    previous = job
+                await asyncio.sleep(self.job_interval)
+        finally:
+            self._jobs.pop(job_id, None)
+
+    async def _chat_turn(self, turn_id: str, text: str, stream: bool):
+        cancelled = self._cancelled[turn_id]
+        try:
+            async with self._turn_slots:
+                await self.outbox.put({"type": "start", "id": turn_id})
+                result: Dict[str, str] = {}
+                if stream:
+                    await run_in_threadpool(self._produce_tokens, turn_id, text, result,
+                                            cancelled, asyncio.get_running_loop())
+                else:
+                    result = await run_in_threadpool(answer_message, self.services, text)
+                if cancelled.is_set():
+                    await self.outbox.put({"type": "cancelled", "id": turn_id})
+                elif result:
+                    await self.outbox.put({"type": "done", "id": turn_id, **result,
+                                           "timestamp": datetime.now().isoformat()})
+        except Exception as e:
+            await self.outbox.put({"type": "error", "id": turn_id, "detail": str(e)})
+        finally:
+            self._cancelled.pop(turn_id, None)
+
+    def _produce_tokens(self, turn_id: str, text: str, result: Dict[str, str],
+                        cancelled: threading.Event, loop: asyncio.AbstractEventLoop):
+        """Worker thread: feed the model stream into the outbox, blocking while it is full"""
+        tokens = stream_message(self.services, text, result)
+        try:
+            for token in tokens:
+                if cancelled.is_set():
+                    return
+                frame = {"type": "token", "id": turn_id, "text": token}
+                if not asyncio.run_coroutine_threadsafe(self.outbox.put(frame), loop).result():
+                    cancelled.set()  # connection gone
+                    return
+        finally:
+            # Closes the model's HTTP stream early when the turn was cut short
+            tokens.close()
+
+
+async def serve_chat_channel(websocket: WebSocket, services: Services):
+    """Accept a connection carrying a valid session token and run the channel"""
+    # Browsers cannot set headers on WebSockets, so also accept ?token=
+    token = websocket.query_params.get("token") or token_from_headers(websocket.headers, websocket.cookies)
+    session = services.sessions.validate(token) if services.sessions and token else None
+    await websocket.accept()
+    if session is None:
+        await websocket.send_text(json.dumps({"type": "error", "detail": "Not authorized"}))
+        await websocket.close(code=CLOSE_UNAUTHORIZED)
+        return
+    await websocket.send_text(json.dumps({"type": "hello", "session_expires": session.get("expires")}))
+    await ChatChannel(websocket, services, token).run()
@@ -0,0 +1,347 @@
+# Responses - Chat commands, the model call and rule-based fallbacks used by the API
+import time
+from typing import Dict, Iterator, Optional
+
+from tools.intent_matcher import IntentMatcher
+from tools.metrics import REGISTRY, add_span, span
+from tools.turn_trace import RECORDER, record_model_call
+
+from backend.services import Services
+
+# Rule-based fallback intents (used when no model is reachable), checked in this order
+RESPONSE_INTENTS = IntentMatcher([
+    ("greeting", "contains", ["hello", "hi", "hey"]),
+    ("features", "contains", ["features", "capabilities"]),
+    ("remember", "contains", ["remember"]),
+    ("code", "contains", ["code", "programming", "function"]),
+    ("translate", "contains", ["translate", "translation"]),
+    ("recall", "contains", ["what do you remember", "recall"]),
+    ("forget", "contains", ["forget"]),
+    ("status", "contains", ["status"]),
+    ("help", "contains", ["help"]),
+])
+
+# Deterministic intents answered locally before any model call. Only whole
+# messages match, so questions that merely mention "help" or "status" still
+# reach the model.
+FAST_PATH_INTENTS = IntentMatcher([
+    ("greeting", "exact", ["hello", "hi", "hey", "hello sorma", "hi sorma", "hey sorma",
+                           "good morning", "good afternoon", "good evening"]),
+    ("features", "exact", ["features", "capabilities", "what are your features",
+                           "what are your capabilities", "show features", "list features"]),
+    ("help", "exact", ["help", "help me", "show help", "show commands", "list commands"]),
+    ("status", "exact", ["status", "system status", "show status"]),
+])
+TRAILING_PUNCTUATION = " .!?"
+
+# path: command / fast_path (answered locally), model, fallback (no model reachable)
+CHAT_ROUTES = REGISTRY.counter("chat_routes_total", "Chat messages by intent and answer path", ("intent", "path"))
+LOCAL_PATHS = ("command", "fast_path")
+
+GREETING_TEXT = "Hello! I'm Sorma-AI, your advanced AI assistant. I'm ready to help you with tasks like code generation, file processing, web search, language translation, and much more!"
+
+HELP_TEXT = """
+🤖 **Available Commands:**
+- remember [fact] - Remember something
+- forget [keyword] - Forget facts containing keyword
+- recall - Show all memories
+- clear memory - Clear all memories
+- status - Show system status
+- help - Show this help
+
+You can also just chat normally!
+"""
+
+FEATURES_TEXT = """🚀 Sorma-AI Capabilities:
+
+🧠 Core AI Features:
+• Advanced conversation and reasoning
+• Memory management (short & long-term)
+• Multi-language support and translation
+
+🔊 Audio & Voice:
+• Text-to-Speech (TTS)
+• Speech-to-Text (STT)
+• Voice cloning capabilities
+
+🛠️ Developer Tools:
+• Code generation and explanation
+• Error debugging and fixing
+• Autonomous coding assistance
+
+📁 File Processing:
+• PDF, DOC, Excel analysis
+• Image OCR and text extraction
+• Video/audio transcription
+
+🌐 Web & Data:
+• Real-time web search
+• Data analysis from various sources
+• Social media trend monitoring
+
+How can I assist you today?"""
+
+
+def process_command(services: Services, cmd_type: str, user_input: str) -> str:
+    """Process user command"""
+    memory_manager = services.memory
+
+    if cmd_type == "remember":
+        # Extract fact from user input
+        fact = user_input.replace("remember ", "").strip()
+        if not fact:
+            return "❌ Please provide a fact to remember."
+
+        # Remember the fact
+        if not memory_manager:
+            return "❌ Memory manager not available."
+        memory_manager.remember_fact(fact)
+        return f"✅ Remembered: '{fact}'"
+
+    elif cmd_type == "forget":
+        # Extract keyword from user input
+        keyword = user_input.replace("forget ", "").strip()
+        if not keyword:
+            return "❌ Please provide a keyword to forget."
+
+        # Forget the fact
+        if not memory_manager:
+            return "❌ Memory manager not available."
+        memory_manager.forget_fact(keyword)
+        return f"✅ Forgot facts containing: '{keyword}'"
+
+    elif cmd_type == "recall":
+        # Get all facts
+        if not memory_manager:
+            return "❌ Memory manager not available."
+        facts = memory_manager.get_all_facts()
+        if not facts:
+            return "🧠 I don't remember any facts yet."
+
+        # Create response message
+        response = "🧠 Here's what I remember:\n\n"
+        for i, fact in enumerate(facts[-10:], 1):
+            response += f"{i}. {fact['fact']}\n"
+        return response
+
+    elif cmd_type == "clear_memory":
+        # Clear all memory
+        if not memory_manager:
+            return "❌ Memory manager not available."
+        memory_manager.clear_memory()
+        return "✅ Memory cleared!"
+
+    elif cmd_type == "status":
+        # Get system status
+        models = services.ai.get_available_models() if services.ai else {"internet_available": False}
+        memory_stats = memory_manager.get_memory_stats() if memory_manager else {"total_memory_items": 0}
+        voice_info = services.voice.get_voice_info() if services.voice else {"tts_available": False}
+
+        return f"""
+📊 **System Status:**
+🧠 Memory: {memory_stats['total_memory_items']} items
+🤖 AI: {'Online' if models['internet_available'] else 'Offline'}
+🗣️ Voice: {'Available' if voice_info['tts_available'] else 'Not available'}
+"""
+
+    elif cmd_type == "help":
+        return HELP_TEXT
+
+    return "❓ Unknown command."
+
+
+def fallback_response(services: Services, message: str) -> str:
+    """Rule-based reply for when no model is available"""
+    memory_manager = services.memory
+    intent = RESPONSE_INTENTS.match(message)
+    intent_type = intent["type"] if intent else None
+
+    if intent_type == "greeting":
+        return GREETING_TEXT
+
+    elif intent_type == "features":
+        return FEATURES_TEXT
+
+    elif intent_type == "remember" and memory_manager:
+        fact = message.replace("remember", "").replace("Remember", "").strip()
+        if fact:
+            memory_manager.remember_fact(fact, "user_request")
+            return f"✅ I'll remember: {fact}"
+        return "What would you like me to remember?"
+
+    elif intent_type == "code":
+        return "I can help you with coding! I support Python, JavaScript, Java, C++, and many other languages. I can generate code, explain existing code, debug errors, and even help with entire projects. What programming task do you need help with?"
+
+    elif intent_type == "translate":
+        return "I can translate text between dozens of languages! Just tell me what you'd like to translate and to which language. I support major world languages including Spanish, French, German, Chinese, Japanese, Arabic, and many more."
+
+    elif intent_type == "recall" and memory_manager:
+        facts = memory_manager.get_all_facts()
+        if facts:
+            response = "🧠 Here's what I remember:\n"
+            for i, fact in enumerate(facts[-5:], 1):
+                response += f"{i}. {fact['fact']}\n"
+            return response
+        return "I don't have any memories stored yet."
+
+    elif intent_type == "forget" and memory_manager:
+        keyword = message.replace("forget", "").strip()
+        if keyword:
+            return memory_manager.forget_fact(keyword)
+        return "What would you like me to forget?"
+
+    elif intent_type == "status" and memory_manager:
+        stats = memory_manager.get_memory_stats()
+        return f"📊 Status: {stats['long_term_count']} memories, {stats['short_term_count']} conversations"
+
+    elif intent_type == "help":
+        return HELP_TEXT
+
+    return f"I'm Sorma-AI and I understand you said: '{message}'. I can help with many tasks including:\n\n• Code generation & debugging\n• File processing & analysis\n• Language translation\n• Web search & research\n• Voice & audio processing\n• Memory management\n\nWhat would you like me to help you with?"
+
+
+def fallback_code(task: str, language: str) -> str:
+    """Template returned by code generation when no model is available"""
+    return f"""# {language} code for: {task}
+# This is a template - implement the functionality
+
+def main():
+    # TODO: Implement {task}
+    pass
+
+if __name__ == "__main__":
+    main()
+"""
+
+
+def _system_prompt(services: Services, user_input: str) -> str:
+    """System prompt with memory and document context for one message"""
+    with span("chat.context"):
+        context = services.memory.get_context_for_prompt() if services.memory else ""
+        if services.documents:
+            document_context = services.documents.get_context_for_query(user_input)
+            if document_context:
+                context = f"{context}\n\n{document_context}" if context else document_context
+        return services.ai.get_system_prompt(
+            services.auth.get_owner_name() if services.auth else "User",
+            context
+        )
+
+
+def classify_message(services: Services, user_input: str) -> Optional[Dict[str, str]]:
+    """Intent that can be answered without a model: {"type", "content", "path"}, or None"""
+    command = services.auth.extract_command(user_input) if services.auth else None
+    if command:
+        return {**command, "path": "command"}
+    intent = FAST_PATH_INTENTS.match(user_input.strip().rstrip(TRAILING_PUNCTUATION))
+    if intent:
+        return {**intent, "path": "fast_path"}
+    return None
+
+
+def local_reply(services: Services, intent: Dict[str, str]) -> str:
+    if intent["path"] == "command":
+        return process_command(services, intent["type"], intent.get("content", ""))
+    if intent["type"] == "greeting":
+        return GREETING_TEXT
+    if intent["type"] == "features":
+        return FEATURES_TEXT
+    return process_command(services, intent["type"], "")
+
+
+def record_route(intent: str, path: str, seconds: float):
+    """Count and trace one routing decision"""
+    CHAT_ROUTES.inc(intent=intent, path=path)
+    add_span("chat.route", seconds, intent=intent, path=path)
+
+
+def routing_stats() -> Dict[str, float]:
+    """Messages per answer path and the share answered locally"""
+    counts = {path: CHAT_ROUTES.total(path=path) for path in LOCAL_PATHS + ("model", "fallback")}
+    total = sum(counts.values())
+    local = sum(counts[path] for path in LOCAL_PATHS)
+    return {**counts, "total": total, "fast_path_hit_rate": round(local / total, 4) if total else 0.0}
+
+
+def answer_message(services: Services, user_input: str) -> Dict[str, str]:
+    """Reply to one chat message: local intent, model answer or rule-based fallback (blocking)"""
+    with RECORDER.record("chat", user_input) as turn:
+        started = time.perf_counter()
+        with span("chat.classify"):
+            intent = classify_message(services, user_input)
+        if intent:
+            with span("chat.local"):
+                response = local_reply(services, intent)
+            record_route(intent["type"], intent["path"], time.perf_counter() - started)
+            turn.update(intent=intent["type"], path=intent["path"], model_used=intent["path"], output=response)
+            return {"response": response, "model_used": intent["path"]}
+
+        response, model_used = None, "basic"
+        if services.ai:
+            system_prompt = _system_prompt(services, user_input)
+            model_started = time.perf_counter()
+            ai_result = services.ai.get_response(user_input, system_prompt)
+            record_model_call(ai_result["model_used"], user_input, system_prompt, ai_result["response"],
+                              time.perf_counter() - model_started)
+            if ai_result["model_used"] != "none":
+                response, model_used = ai_result["response"], ai_result["model_used"]
+
+        if response is None:
+            with span("chat.fallback"):
+                response = fallback_response(services, user_input)
+        path = "fallback" if model_used == "basic" else "model"
+        record_route("open", path, time.perf_counter() - started)
+        turn.update(intent="open", path=path, model_used=model_used, output=response)
+
+        # Save to memory
+        if services.memory:
+            with span("chat.save"):
+                services.memory.add_conversation(user_input, response)
+        return {"response": response, "model_used": model_used}
+
+
+def stream_message(services: Services, user_input: str, result: Dict[str, str]) -> Iterator[str]:
+    """``answer_message`` as a token stream (blocking iterator).
+
+    ``result`` gets "response" and "model_used" once the stream is exhausted;
+    the conversation is saved only if it was.
+    """
+    with RECORDER.record("stream", user_input) as turn:
+        started = time.perf_counter()
+        with span("chat.classify"):
+            intent = classify_message(services, user_input)
+        if intent:
+            model_used = intent["path"]
+            with span("chat.local"):
+                pieces = iter([local_reply(services, intent)])
+            record_route(intent["type"], intent["path"], time.perf_counter() - started)
+            turn.update(intent=intent["type"], path=intent["path"])
+        else:
+            model_used = services.ai.choose_model() if services.ai else "none"
+            if model_used != "none":
+                system_prompt = _system_prompt(services, user_input)
+                pieces = services.ai.stream_with(model_used, user_input, system_prompt)
+            else:
+                model_used = "basic"
+                with span("chat.fallback"):
+                    pieces = iter([fallback_response(services, user_input)])
+            path = "fallback" if model_used == "basic" else "model"
+            record_route("open", path, time.perf_counter() - started)
+            turn.update(intent="open", path=path)
+
+        # For a model stream this includes the time the consumer spends between tokens
+        model_started = time.perf_counter()
+        parts = []
+        for piece in pieces:
+            parts.append(piece)
+            yield piece
+
+        result["response"] = "".join(parts)
+        result["model_used"] = model_used
+        turn.update(model_used=model_used, output=result["response"])
+        if model_used not in LOCAL_PATHS and model_used != "basic":
+            record_model_call(model_used, user_input, system_prompt, result["response"],
+                              time.perf_counter() - model_started)
+        if services.memory and model_used not in LOCAL_PATHS:
+            with span("chat.save"):
+                services.memory.add_conversation(user_input, result["response"])
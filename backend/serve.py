@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Sorma-AI Backend - Production launcher with several worker processes
+
+    python backend/serve.py --workers 4 --port 8000
+
+Each worker is a separate process with its own event loop; state they share
+lives in files and SQLite (sessions, memory, documents, caches, job records).
+SIGTERM / Ctrl+C drains: workers stop accepting connections, finish in-flight
+requests and jobs (up to --graceful-timeout) and close WebSockets with 1012
+(service restart) so clients reconnect. SIGHUP restarts the workers.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def default_workers() -> int:
+    """One worker per core, capped so the per-worker job pools do not oversubscribe small machines"""
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Sorma-AI backend with several worker processes")
+    parser.add_argument("--host", default=os.getenv("SORMA_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SORMA_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SORMA_WORKERS", "0")) or default_workers())
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                        help="seconds to let in-flight requests finish on shutdown")
+    args = parser.parse_args()
+
+    # Inherited by the workers: sessions must be visible to all of them
+    os.environ.setdefault("SORMA_SESSION_STORE", "sqlite")
+    os.environ["SORMA_WORKERS"] = str(args.workers)
+
+    import uvicorn
+    print(f"🚀 Starting Sorma-AI Backend with {args.workers} worker(s)")
+    print(f"📡 Server: http://{args.host}:{args.port}")
+    print("="*50)
+    uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers,
+                timeout_graceful_shutdown=args.graceful_timeout, proxy_headers=True)
+
+
+if __name__ == "__main__":
+    main()
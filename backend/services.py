@@ -0,0 +1,269 @@
+# Services - Shared components built once per process and injected into every route
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from tools.memory_manager import MemoryManager
+from tools.auth_manager import AuthManager
+from tools.job_queue import JobQueue
+from tools.document_store import DocumentStore
+from tools.session_store import SessionManager, token_from_headers
+from tools.knowledge_index import KnowledgeIndex
+from tools.memory_retention import RetentionManager
+from tools.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    # Optional stacks (LLM clients, speech, audio, translation, code) are imported when built
+    from tools.ai_manager import AIModelManager
+    from tools.audio_service import AudioService
+    from tools.code_generator import CodeGenerator
+    from tools.file_processor import FileProcessor
+    from tools.translation_memory import BatchTranslator
+    from tools.voice_manager import VoiceManager
+
+STARTUP_SECONDS = REGISTRY.gauge("startup_component_seconds", "Time to initialise each shared component",
+                                 ("component",))
+
+
+def _build(label: str, factory: Callable[[], Any], spans: Optional[Dict[str, float]] = None) -> Any:
+    """Create one component; a failure leaves it None instead of stopping the server"""
+    start = time.perf_counter()
+    try:
+        component = factory()
+        print(f"✅ {label} initialized")
+        return component
+    except ImportError as e:
+        print(f"⚠️  {label} disabled: {e.name or e} is not installed")
+        return None
+    except Exception as e:
+        print(f"⚠️  {label} error: {e}")
+        return None
+    finally:
+        seconds = time.perf_counter() - start
+        STARTUP_SECONDS.set(seconds, component=label)
+        if spans is not None:
+            spans[label] = round(seconds, 4)
+
+
+def job_workers() -> Optional[int]:
+    """Job pool size per process: the cores split between the server workers (backend/serve.py)"""
+    workers = int(os.getenv("SORMA_WORKERS", "1") or 1)
+    if workers <= 1:
+        return None  # JobQueue default
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+# Factories of the components with optional dependencies, imported only when built
+
+def _ai_manager() -> "AIModelManager":
+    from tools.ai_manager import AIModelManager
+    return AIModelManager()
+
+
+def _voice_manager() -> "VoiceManager":
+    from tools.voice_manager import VoiceManager
+    return VoiceManager()
+
+
+def _audio_service(voice: Optional["VoiceManager"]) -> "AudioService":
+    from tools.audio_service import AudioService
+    return AudioService(tts_worker=voice.tts_engine if voice else None)
+
+
+def _file_processor() -> "FileProcessor":
+    from tools.file_processor import FileProcessor
+    return FileProcessor()
+
+
+def _translator(ask: Callable[[str, str], Optional[str]]) -> "BatchTranslator":
+    from tools.translation_memory import BatchTranslator, TranslationMemory
+    return BatchTranslator(ask, TranslationMemory())
+
+
+def _code_generator(ai: "AIModelManager") -> "CodeGenerator":
+    from tools.code_generator import CodeCache, CodeGenerator
+    return CodeGenerator(ai, CodeCache())
+
+
+class Services:
+    """Singletons shared by every route of one app.
+
+    ``start()`` builds the components (at app startup, not import) and warms
+    the slow first-request paths in the background; ``stop()`` flushes and
+    shuts them down.
+    """
+
+    def __init__(self):
+        self.memory: Optional[MemoryManager] = None
+        self.auth: Optional[AuthManager] = None
+        self.sessions: Optional[SessionManager] = None
+        self.ai: Optional["AIModelManager"] = None
+        self.voice: Optional["VoiceManager"] = None
+        self.audio: Optional["AudioService"] = None
+        self.files: Optional["FileProcessor"] = None
+        self.documents: Optional[DocumentStore] = None
+        self.jobs: Optional[JobQueue] = None
+        self.translator: Optional["BatchTranslator"] = None
+        self.knowledge: Optional[KnowledgeIndex] = None
+        self.coder: Optional["CodeGenerator"] = None
+        self.retention: Optional[RetentionManager] = None
+        self.started = False
+        # Component label -> seconds its initialisation took (see tools/startup_profiler.py)
+        self.startup_spans: Dict[str, float] = {}
+
+    def _build(self, label: str, factory: Callable[[], Any]) -> Any:
+        return _build(label, factory, self.startup_spans)
+
+    def start(self, warm_up: bool = True):
+        if self.started:
+            return
+        self.memory = self._build("Memory manager", MemoryManager)
+        if self.memory:
+            self.retention = self._build("Memory retention", lambda: RetentionManager(self.memory))
+        self.auth = self._build("Auth manager", AuthManager)
+        self.sessions = self._build("Session manager", SessionManager)
+        self.ai = self._build("AI manager", _ai_manager)
+        self.voice = self._build("Voice manager", _voice_manager)
+        # Shares the voice manager's TTS worker so one thread owns the pyttsx3 engine
+        self.audio = self._build("Audio service", lambda: _audio_service(self.voice))
+        self.files = self._build("File processor", _file_processor)
+        self.documents = self._build("Document store", DocumentStore)
+        self.jobs = self._build("Job queue", lambda: JobQueue(max_workers=job_workers(),
+                                                              on_complete=self._index_completed_job))
+        self.translator = self._build("Translator", lambda: _translator(self.ask))
+        self.knowledge = self._build("Knowledge index", lambda: KnowledgeIndex(
+            memory_manager=self.memory, document_store=self.documents))
+        if self.ai:
+            self.coder = self._build("Code generator", lambda: _code_generator(self.ai))
+        self.started = True
+
+        if self.retention:
+            self.retention.start()
+        if warm_up:
+            threading.Thread(target=self.warm_up, name="warm-up", daemon=True).start()
+
+    def warm_up(self):
+        """Run the availability probes now so the first chat does not wait for them"""
+        if self.ai:
+            try:
+                self.ai.get_available_models()
+                self.ai.list_ollama_models()
+            except Exception as e:
+                print(f"⚠️  Warm-up error: {e}")
+        if self.knowledge:
+            try:
+                self.knowledge.refresh()
+            except Exception as e:
+                print(f"⚠️  Knowledge index warm-up error: {e}")
+
+    def ask(self, prompt: str, system_prompt: str) -> Optional[str]:
+        """Model answer for a prompt, or None when no model is available (blocking)"""
+        if not self.ai:
+            return None
+        result = self.ai.get_response(prompt, system_prompt)
+        return None if result["model_used"] == "none" else result["response"]
+
+    def status(self) -> Dict[str, Any]:
+        """System status shared by GET /api/status and the chat channel (blocking, probes are cached)"""
+        models = self.ai.get_available_models() if self.ai else \
+            {"internet_available": False, "ollama_available": False, "openai_configured": False}
+        ollama_models = self.ai.list_ollama_models() if self.ai else []
+        return {
+            "memory_stats": self.memory.get_memory_stats() if self.memory else {"total_memory_items": 0, "short_term_count": 0, "long_term_count": 0},
+            "ai_models": models,
+            "voice_info": self.voice.get_voice_info() if self.voice else {"tts_available": False, "stt_available": False},
+            "internet_available": models["internet_available"],
+            "internet": models["internet_available"],
+            "ollama": {
+                "status": "available" if models["ollama_available"] else "not_available",
+                "models": ollama_models,
+                "active_model": ollama_models[0] if ollama_models else None
+            },
+            "jobs": self.jobs.get_stats() if self.jobs else {}
+        }
+
+    def stop(self):
+        """Let running jobs finish, release the audio pool and write pending access logs"""
+        if self.jobs:
+            self.jobs.shutdown(wait=True)
+        if self.audio:
+            self.audio.shutdown()
+        if self.coder:
+            self.coder.shutdown()
+        if self.retention:
+            self.retention.stop()
+        if self.auth:
+            self.auth.access_tracker.close()
+        self.started = False
+
+    def _index_completed_job(self, job: Dict[str, Any]):
+        """Index the output of finished processing jobs for later questions"""
+        if self.documents and job["type"] == "process":
+            self.documents.add_document(job["file_name"], job["result"])
+
+
+# Session of the request being handled (set by the middleware below)
+current_session: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_session", default=None)
+
+
+def is_session_active() -> bool:
+    """Whether the current request carries a valid session token"""
+    return current_session.get() is not None
+
+
+def session_middleware(services: Services):
+    """HTTP middleware that validates the bearer token or session cookie once per request"""
+
+    async def load_session(request: Request, call_next):
+        token = token_from_headers(request.headers, request.cookies)
+        session = services.sessions.validate(token) if services.sessions and token else None
+        reset_token = current_session.set(session)
+        try:
+            return await call_next(request)
+        finally:
+            current_session.reset(reset_token)
+
+    return load_session
+
+
+# Dependencies - routes declare what they need with ``Depends(...)``.
+# They are async so FastAPI calls them on the event loop instead of the threadpool.
+
+async def get_services(request: Request) -> Services:
+    return request.app.state.services
+
+
+async def require_session() -> Dict[str, Any]:
+    session = current_session.get()
+    if session is None:
+        raise HTTPException(status_code=401, detail="Not authorized")
+    return session
+
+
+def _component(name: str, label: str):
+    async def dependency(request: Request):
+        component = getattr(request.app.state.services, name)
+        if component is None:
+            raise HTTPException(status_code=500, detail=f"{label} not available")
+        return component
+
+    dependency.__name__ = f"get_{name}"
+    return dependency
+
+
+get_memory = _component("memory", "Memory manager")
+get_auth = _component("auth", "Authentication system")
+get_sessions = _component("sessions", "Authentication system")
+get_ai = _component("ai", "AI manager")
+get_voice = _component("voice", "Voice manager")
+get_audio = _component("audio", "Audio service")
+get_files = _component("files", "File processor")
+get_documents = _component("documents", "Document store")
+get_jobs = _component("jobs", "Job queue")
+get_translator = _component("translator", "Translator")
+get_knowledge = _component("knowledge", "Knowledge index")
+get_retention = _component("retention", "Memory retention")
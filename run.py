@@ -11,7 +11,10 @@ from pathlib import Path
 # Add current directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from agent_core import ChandanAI
+def create_agent():
+    """Import and create the agent only for modes that need it"""
+    from agent_core import ChandanAI
+    return ChandanAI()
 
 def main():
     """Main entry point for the AI assistant"""
@@ -31,21 +34,24 @@ def main():
             except ImportError:
                 print("❌ Streamlit not installed. Install with: pip install streamlit")
                 print("💡 Starting CLI mode instead...")
-                agent = ChandanAI()
+                agent = create_agent()
                 agent.chat_mode()
         
         elif mode == "voice":
             print("🎤 Starting Voice Mode...")
-            agent = ChandanAI()
+            agent = create_agent()
             agent.voice_mode()
         
         elif mode == "cli":
             print("💻 Starting CLI Mode...")
-            agent = ChandanAI()
+            agent = create_agent()
             agent.chat_mode()
         
+        elif mode == "batch":
+            run_batch(sys.argv[2:])
+        
         elif mode == "status":
-            agent = ChandanAI()
+            agent = create_agent()
             agent._show_status()
         
         elif mode == "help":
@@ -58,9 +64,43 @@ def main():
     else:
         # Default: CLI mode
         print("💻 Starting CLI Mode (default)...")
-        agent = ChandanAI()
+        agent = create_agent()
         agent.chat_mode()
 
+def run_batch(args):
+    """Process a directory or glob pattern of files in parallel"""
+    import argparse
+    from tools.batch_processor import BatchProcessor
+    from tools.document_store import DocumentStore
+    
+    parser = argparse.ArgumentParser(prog="python run.py batch", description="Batch file processing")
+    parser.add_argument("target", help="Directory or glob pattern (e.g. 'reports/**/*.pdf')")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Reprocess files even if unchanged")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    parser.add_argument("--no-index", action="store_true", help="Do not add results to the document store")
+    parser.add_argument("--report", default=None, help="Where to write the aggregate JSON report")
+    options = parser.parse_args(args)
+    
+    print(f"📂 Batch processing: {options.target}")
+    processor = BatchProcessor(max_workers=options.workers)
+    document_store = None if options.no_index else DocumentStore()
+    
+    for event in processor.run(options.target, recursive=not options.no_recursive, force=options.force,
+                               document_store=document_store, report_file=options.report):
+        if event["event"] == "processed":
+            print(f"✅ {event['path']} ({event.get('file_type')}, {event.get('duration_ms')} ms)")
+        elif event["event"] == "skipped":
+            print(f"⏭️  {event['path']} (unchanged)")
+        elif event["event"] == "error":
+            print(f"❌ {event['path']}: {event['error']}")
+        else:
+            report = event["report"]
+            print("=" * 50)
+            print(f"📊 {report['processed']} processed, {report['skipped']} skipped, "
+                  f"{report['failed']} failed in {report['duration_seconds']}s")
+            print(f"📝 Report: {report['report_file']}")
+
 def print_help():
     """Print help information"""
     print("""
@@ -73,6 +113,7 @@ MODES:
     cli      - Command line interface (default)
     web      - Web interface (requires streamlit)
     voice    - Voice interaction mode
+    batch    - Process a directory or glob of files in parallel
     status   - Show system status
     help     - Show this help
 
@@ -81,6 +122,7 @@ EXAMPLES:
     python run.py web          # Start web interface
     python run.py voice        # Start voice mode
     python run.py status       # Show system status
+    python run.py batch reports/ --workers 4   # Process a folder of reports
 
 FIRST TIME SETUP:
     1. Install Ollama: https://ollama.ai/
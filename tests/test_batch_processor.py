@@ -0,0 +1,47 @@
+# Batch Processor tests - target restrictions and per-file failures
+import os
+
+from tools.batch_processor import BatchProcessor
+
+
+def make_tree(tmp_path):
+    (tmp_path / "documents" / "notes").mkdir(parents=True)
+    (tmp_path / "memory").mkdir()
+    (tmp_path / "documents" / "a.txt").write_text("alpha beta gamma")
+    (tmp_path / "documents" / "notes" / "b.md").write_text("# Notes\ndelta")
+    (tmp_path / "memory" / "owner.json").write_text('{"auth_phrases": ["secret"]}')
+    (tmp_path / "outside.txt").write_text("not in the root")
+
+
+def test_collect_files_skips_memory_and_stays_in_root(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    processor = BatchProcessor()
+
+    everything = [os.path.basename(path) for path in processor.collect_files(".")]
+    assert sorted(everything) == ["a.txt", "b.md", "outside.txt"]
+
+    rooted = processor.collect_files(".", root="documents")
+    assert sorted(os.path.basename(path) for path in rooted) == ["a.txt", "b.md"]
+    os.symlink(tmp_path / "outside.txt", tmp_path / "documents" / "link.txt")
+    assert "link.txt" not in [os.path.basename(path) for path in processor.collect_files("documents", root="documents")]
+
+
+def test_file_removed_mid_run_is_an_error_event(tmp_path, monkeypatch):
+    make_tree(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    processor = BatchProcessor(max_workers=1)
+    record = processor._record
+
+    def vanish_then_record(file_path, *args, **kwargs):
+        if file_path.endswith("a.txt"):
+            os.remove(file_path)
+        return record(file_path, *args, **kwargs)
+
+    monkeypatch.setattr(processor, "_record", vanish_then_record)
+    events = list(processor.run("documents", root="documents"))
+    by_event = {event["event"]: event for event in events}
+    assert by_event["error"]["path"].endswith("a.txt")
+    assert by_event["processed"]["path"].endswith("b.md")
+    report = by_event["report"]["report"]
+    assert (report["processed"], report["failed"]) == (1, 1)
@@ -0,0 +1,37 @@
+# Document Store tests - hybrid search, document scoping and compaction
+import pytest
+
+from tools.document_store import DocumentStore
+
+
+def text_result(text: str) -> dict:
+    return {"file_type": "Text", "text_content": text, "word_count": len(text.split())}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DocumentStore(str(tmp_path / "documents"), chunk_size=20, chunk_overlap=5)
+
+
+def test_search_ranks_the_matching_document(store):
+    store.add_document("solar.txt", text_result("solar panels convert sunlight into electricity " * 3))
+    store.add_document("bread.txt", text_result("knead the dough and let the bread rise overnight " * 3))
+    results = store.search("how do solar panels work")
+    assert results and results[0]["file_name"] == "solar.txt"
+
+
+def test_unknown_doc_id_finds_nothing(store):
+    store.add_document("solar.txt", text_result("solar panels convert sunlight into electricity"))
+    assert store.search("solar panels", doc_id="no-such-document") == []
+
+
+def test_scoped_search_is_not_crowded_out_by_other_documents(store):
+    for i in range(30):
+        store.add_document(f"solar_{i}.txt", text_result("solar panels solar panels solar panels " * 4))
+    small = store.add_document("notes.txt", text_result("the roof also has solar panels, installed last spring"))
+    results = store.search("solar panels", top_k=2, doc_id=small["doc_id"])
+    assert results and all(result["file_name"] == "notes.txt" for result in results)
+    if store._embeddings is not None:
+        tokens = ["solar", "panels"]
+        allowed = set(store.documents[small["doc_id"]]["chunk_ids"])
+        assert [chunk_id for chunk_id, _ in store._vector_search(tokens, 1, allowed)] == sorted(allowed)[:1]
@@ -0,0 +1,74 @@
+# Memory Archive tests - export/import round trips through a msgpack archive
+import pytest
+
+pytest.importorskip("msgpack")
+
+from tools.memory_archive import export_memory, import_memory, iter_records, summarize_archive
+from tools.memory_manager import MemoryManager
+
+
+def _conversation(stamp: str, text: str) -> dict:
+    return {"timestamp": stamp, "user": text, "agent": f"re: {text}", "session_id": "s1"}
+
+
+@pytest.fixture
+def memory(tmp_path):
+    manager = MemoryManager(str(tmp_path / "memory"), short_term_limit=None)
+    manager.rewrite("short", lambda _: [_conversation(f"2024-01-01T10:00:0{i}", f"hello {i}") for i in range(3)])
+    manager.rewrite("long", lambda _: [
+        {"timestamp": "2024-01-01T09:00:00", "fact": "likes tea", "category": "personal", "importance": "high"},
+        {"timestamp": "2024-01-02T09:00:00", "fact": "lives in Pune"},
+    ])
+    return manager
+
+
+def test_round_trip_keeps_records(memory, tmp_path):
+    archive = tmp_path / "memory.sma"
+    exported = export_memory(memory, str(archive))
+    assert exported["conversations"] == 3 and exported["facts"] == 2
+
+    assert list(iter_records(str(archive), "conversations")) == memory.get_all_conversations()
+    # Keys a record lacks stay missing rather than coming back as None
+    assert list(iter_records(str(archive), "facts")) == memory.get_all_facts()
+    summary = summarize_archive(str(archive))
+    assert summary["conversations"]["first"] == "2024-01-01T10:00:00"
+    assert summary["facts"]["categories"] == {"personal": 1}
+
+
+def test_merge_skips_known_records_and_keeps_new_ones(memory, tmp_path):
+    archive = tmp_path / "memory.sma"
+    export_memory(memory, str(archive))
+    memory.add_conversation("saved after the export", "ok")
+
+    result = import_memory(memory, str(archive))
+    assert result["imported"] == {"conversations": 0, "facts": 0}
+    assert [c["user"] for c in memory.get_all_conversations()][-1] == "saved after the export"
+
+    memory.rewrite("short", lambda conversations: conversations[:1])
+    result = import_memory(memory, str(archive))
+    assert result["imported"]["conversations"] == 2
+    assert [c["user"] for c in memory.get_all_conversations()] == ["hello 0", "hello 1", "hello 2"]
+
+
+def test_import_respects_short_term_limit(memory, tmp_path):
+    archive = tmp_path / "memory.sma"
+    export_memory(memory, str(archive))
+
+    limited = MemoryManager(str(tmp_path / "other"), short_term_limit=2)
+    result = import_memory(limited, str(archive), replace=True)
+    assert result["imported"]["conversations"] == 2
+    assert [c["user"] for c in limited.get_all_conversations()] == ["hello 1", "hello 2"]
+
+
+def test_non_canonical_stamps_round_trip_and_merge(tmp_path):
+    memory = MemoryManager(str(tmp_path / "memory"), short_term_limit=None)
+    stamps = ["2024-01-01T10:00:00.000000", "2024-01-01 10:00:01", "2024-01-01T10:00:02"]
+    memory.rewrite("short", lambda _: [_conversation(stamp, f"hello {i}") for i, stamp in enumerate(stamps)])
+    archive = tmp_path / "memory.sma"
+    export_memory(memory, str(archive))
+
+    assert [c["timestamp"] for c in iter_records(str(archive), "conversations")] == stamps
+    assert summarize_archive(str(archive))["conversations"]["last"] == "2024-01-01T10:00:02"
+    result = import_memory(memory, str(archive))
+    assert result["imported"]["conversations"] == 0
+    assert len(memory.get_all_conversations()) == 3
@@ -0,0 +1,41 @@
+# Memory Retention tests - short-term ceiling between compactions and archiving down to the cap
+import pytest
+
+pytest.importorskip("msgpack")
+
+from tools.memory_archive import iter_records
+from tools.memory_manager import MemoryManager
+from tools.memory_retention import RetentionManager
+
+
+@pytest.fixture
+def retention(tmp_path):
+    memory = MemoryManager(str(tmp_path / "memory"))
+    return RetentionManager(memory, policy={"conversations": {"max_items": 3}},
+                            cold_dir=str(tmp_path / "memory" / "cold"))
+
+
+def test_writes_are_capped_between_compactions(retention):
+    for i in range(10):
+        retention.memory.add_conversation(f"hello {i}", "hi")
+
+    conversations = retention.memory.get_all_conversations()
+    assert len(conversations) == 6
+    assert conversations[-1]["user"] == "hello 9"
+
+
+def test_compaction_archives_down_to_the_cap(retention):
+    for i in range(5):
+        retention.memory.add_conversation(f"hello {i}", "hi")
+
+    report = retention.compact()
+    assert report["conversations"]["evicted"] == 2
+    assert [c["user"] for c in retention.memory.get_all_conversations()] == ["hello 2", "hello 3", "hello 4"]
+    archived = list(iter_records(report["conversations"]["archive"], "conversations"))
+    assert [c["user"] for c in archived] == ["hello 0", "hello 1"]
+
+
+def test_no_ceiling_without_a_cap(tmp_path):
+    memory = MemoryManager(str(tmp_path / "memory"))
+    RetentionManager(memory, policy={"conversations": {"max_items": None}}, cold_dir=str(tmp_path / "cold"))
+    assert memory.short_term_limit is None
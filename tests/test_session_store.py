@@ -0,0 +1,51 @@
+# Session Store tests - token validation and the session middleware
+import pytest
+
+from tools.session_store import MemorySessionStore, SessionManager
+
+MALFORMED_TOKENS = ["", "abc", "a.b.c", "abc.1.sig", "é.9999999999.x", "abc.9999999999.é", "abc.9999999999.x"]
+
+
+@pytest.fixture
+def sessions():
+    return SessionManager(MemorySessionStore(), secret=b"test-secret")
+
+
+def test_valid_token_round_trip(sessions):
+    token = sessions.create(owner="test")
+    assert sessions.validate(token)["owner"] == "test"
+    assert sessions.revoke(token)
+    assert sessions.validate(token) is None
+
+
+@pytest.mark.parametrize("token", MALFORMED_TOKENS)
+def test_malformed_tokens_are_rejected(sessions, token):
+    assert sessions.validate(token) is None
+
+
+@pytest.mark.parametrize("token", MALFORMED_TOKENS[1:])
+def test_malformed_token_gets_401(sessions, token):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi import APIRouter, Depends, FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.services import Services, require_session, session_middleware
+
+    services = Services()
+    services.sessions = sessions
+    app = FastAPI()
+    app.state.services = services
+    app.middleware("http")(session_middleware(services))
+    protected = APIRouter(dependencies=[Depends(require_session)])
+
+    @protected.get("/private")
+    async def private():
+        return {"ok": True}
+
+    app.include_router(protected)
+    client = TestClient(app)
+    # Header values go over the wire as latin-1, like a client sending raw bytes
+    response = client.get("/private", headers={"Authorization": f"Bearer {token}".encode("latin-1")})
+    assert response.status_code == 401
+    assert client.get("/private", headers={"Authorization": f"Bearer {sessions.create()}"}).status_code == 200
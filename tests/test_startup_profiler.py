@@ -0,0 +1,30 @@
+# Startup Profiler tests - importtime parsing and cold import profiles
+from tools.startup_profiler import parse_importtime, profile_imports
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       800 |       1500 | json
+import time:       700 |        700 |   json.decoder
+not an importtime line
+"""
+
+
+def test_parse_importtime():
+    modules = parse_importtime(IMPORTTIME)
+    assert [module["module"] for module in modules] == ["_io", "json", "json.decoder"]
+    assert modules[1] == {"module": "json", "self_s": 0.0008, "cumulative_s": 0.0015, "depth": 0}
+    assert modules[2]["depth"] == 1
+
+
+def test_profile_imports_reports_failures():
+    profile = profile_imports("no_such_module_for_the_profiler")
+    assert not profile["ok"]
+    assert "ModuleNotFoundError" in profile["error"]
+
+
+def test_profile_imports_counts_only_the_target():
+    profile = profile_imports("wave")
+    assert profile["ok"]
+    assert profile["modules"] >= 1
+    assert "wave" in profile["packages"]
@@ -0,0 +1,60 @@
+# Text Analytics tests - keyword ranking and the shared corpus file
+import json
+from collections import Counter
+from multiprocessing import Process
+
+from tools.text_analytics import TextAnalyzer
+
+
+def test_keywords_skip_stopwords_and_rank_rare_terms(tmp_path):
+    analyzer = TextAnalyzer(str(tmp_path / "corpus.json"))
+    for i in range(5):
+        analyzer.add_to_corpus(f"doc{i}", Counter(["report", "quarterly"]))
+    analysis = analyzer.analyze("The quarterly report covers the turbine turbine maintenance.")
+    terms = [keyword["term"] for keyword in analysis["keywords"]]
+    assert "the" not in terms
+    assert terms[0] == "turbine"
+    assert analysis["statistics"]["sentences"] == 1
+
+
+def test_corpus_saves_in_batches(tmp_path):
+    corpus_file = tmp_path / "corpus.json"
+    analyzer = TextAnalyzer(str(corpus_file), save_every=3, save_interval=3600)
+    analyzer.add_to_corpus("first", Counter(["alpha"]))  # nothing saved yet: written straight away
+    assert json.loads(corpus_file.read_text())["doc_count"] == 1
+    analyzer.add_to_corpus("second", Counter(["beta"]))
+    analyzer.add_to_corpus("third", Counter(["gamma"]))
+    assert json.loads(corpus_file.read_text())["doc_count"] == 1
+    analyzer.add_to_corpus("fourth", Counter(["delta"]))
+    assert json.loads(corpus_file.read_text())["doc_count"] == 4
+
+
+def test_corpus_is_capped(tmp_path):
+    corpus_file = tmp_path / "corpus.json"
+    analyzer = TextAnalyzer(str(corpus_file), max_documents=10, max_terms=5)
+    for i in range(30):
+        analyzer.add_to_corpus(f"doc{i}", Counter(["common", f"term{i}"]), save=False)
+    analyzer.save_corpus()
+    data = json.loads(corpus_file.read_text())
+    assert data["doc_count"] == 30
+    assert data["documents"] == [f"doc{i}" for i in range(20, 30)]
+    assert len(data["doc_freq"]) == 5 and data["doc_freq"]["common"] == 30
+
+
+def _add_documents(corpus_file, worker):
+    analyzer = TextAnalyzer(corpus_file, save_every=7)
+    for i in range(25):
+        analyzer.add_to_corpus(f"{worker}-{i}", Counter(["shared", f"w{worker}"]))
+    analyzer.save_corpus()
+
+
+def test_concurrent_processes_merge_their_documents(tmp_path):
+    corpus_file = str(tmp_path / "corpus.json")
+    workers = [Process(target=_add_documents, args=(corpus_file, worker)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    data = json.loads(open(corpus_file, encoding="utf-8").read())
+    assert data["doc_count"] == 100
+    assert data["doc_freq"]["shared"] == 100
@@ -0,0 +1,72 @@
+# Wake Word tests - VAD and keyword spotting over generated WAV fixtures
+import math
+import wave
+from array import array
+
+import pytest
+
+from tools.wake_word import (FRAME_SAMPLES, SAMPLE_RATE, EnergyVAD, WakeWordDetector, frame_rms,
+                             read_wav_frames)
+
+
+def chirp(start_hz: float, end_hz: float, seconds: float, level: int = 8000) -> array:
+    """A tone sweeping from start_hz to end_hz - stands in for a spoken phrase"""
+    count = int(seconds * SAMPLE_RATE)
+    samples, phase = array('h'), 0.0
+    for i in range(count):
+        phase += 2 * math.pi * (start_hz + (end_hz - start_hz) * i / count) / SAMPLE_RATE
+        samples.append(int(level * math.sin(phase)))
+    return samples
+
+
+def silence(seconds: float) -> array:
+    return array('h', [0] * int(seconds * SAMPLE_RATE))
+
+
+def write_wav(path, samples: array, channels: int = 1, rate: int = SAMPLE_RATE):
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return str(path)
+
+
+def test_read_wav_frames_yields_whole_frames(tmp_path):
+    path = write_wav(tmp_path / "tone.wav", chirp(300, 300, 0.105))
+    frames = list(read_wav_frames(path))
+    assert len(frames) == 5
+    assert all(len(frame) == FRAME_SAMPLES * 2 for frame in frames)
+    assert frame_rms(frames[0]) > 5000
+
+
+def test_read_wav_frames_rejects_other_formats(tmp_path):
+    with pytest.raises(ValueError):
+        list(read_wav_frames(write_wav(tmp_path / "stereo.wav", silence(0.1) * 2, channels=2)))
+    with pytest.raises(ValueError):
+        list(read_wav_frames(write_wav(tmp_path / "8k.wav", silence(0.1), rate=8000)))
+
+
+def test_vad_finds_one_utterance(tmp_path):
+    path = write_wav(tmp_path / "speech.wav", silence(0.5) + chirp(300, 900, 0.6) + silence(0.5))
+    vad = EnergyVAD()
+    events = [(i, event) for i, frame in enumerate(read_wav_frames(path)) if (event := vad.update(frame))]
+    assert [event for _, event in events] == ["start", "end"]
+    # Speech runs from frame 25 to 55; the end is reported after end_frames of quiet
+    assert 25 <= events[0][0] <= 25 + vad.start_frames
+    assert events[1][0] == pytest.approx(55 + vad.end_frames, abs=2)
+
+
+def test_detector_matches_the_enrolled_phrase_only(tmp_path):
+    pytest.importorskip("numpy")
+    detector = WakeWordDetector(str(tmp_path / "templates"))
+    assert not detector.is_ready()
+    detector.save_template(chirp(300, 1200, 0.6).tobytes())
+    assert WakeWordDetector(str(tmp_path / "templates")).is_ready()
+
+    phrase = write_wav(tmp_path / "phrase.wav", silence(0.5) + chirp(300, 1200, 0.6) + silence(0.5))
+    other = write_wav(tmp_path / "other.wav", silence(0.5) + chirp(2500, 600, 0.6) + silence(0.5))
+    too_long = write_wav(tmp_path / "long.wav", silence(0.5) + chirp(300, 1200, 4.0) + silence(0.5))
+    assert detector.detect_in_wav(phrase)
+    assert not detector.detect_in_wav(other)
+    assert not detector.detect_in_wav(too_long)
@@ -0,0 +1,145 @@
+# Access Tracker - Batched last-access bookkeeping and a per-day access log
+import atexit
+import json
+import threading
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from tools.process_lock import FileLock, write_json_atomic
+
+FLUSH_INTERVAL = 30.0
+
+# Every tracker, flushed by one background thread and once more at exit
+_trackers: "weakref.WeakSet[AccessTracker]" = weakref.WeakSet()
+_shared: Dict[Tuple[Path, Path], "AccessTracker"] = {}
+_registry_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+def _flush_all():
+    for tracker in list(_trackers):
+        tracker.flush()
+
+
+def _run_flusher():
+    while not _stop.wait(FLUSH_INTERVAL):
+        _flush_all()
+
+
+def _start_flusher():
+    global _flusher
+    with _registry_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run_flusher, name="access-tracker", daemon=True)
+            _flusher.start()
+
+
+@atexit.register
+def _close_all():
+    _stop.set()
+    _flush_all()
+
+
+class AccessTracker:
+    """Counts successful authorizations in memory and writes them in batches.
+
+    ``record()`` only touches memory. One background thread flushes every
+    tracker every ``FLUSH_INTERVAL`` seconds (and at exit): ``last_access``
+    and ``access_count`` are merged into owner.json under a file lock, and
+    the new events are appended to ``<log_dir>/<YYYY-MM-DD>.log`` as
+    ``HH:MM:SS source`` lines. Use ``shared()`` to get the tracker of an
+    owner file rather than one per caller.
+    """
+
+    def __init__(self, owner_file: str = "memory/owner.json", log_dir: str = "memory/access_log"):
+        self.owner_file = Path(owner_file)
+        self.log_dir = Path(log_dir)
+        self.last_access: Optional[str] = None
+        self._pending: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Serialises owner.json updates with other processes tracking the same file
+        self._file_lock = FileLock(str(self.owner_file.with_name(f".{self.owner_file.stem}.lock")))
+        _trackers.add(self)
+
+    @classmethod
+    def shared(cls, owner_file: str = "memory/owner.json", log_dir: str = "memory/access_log") -> "AccessTracker":
+        """The one tracker of this process for an owner file and log directory"""
+        key = (Path(owner_file).resolve(), Path(log_dir).resolve())
+        with _registry_lock:
+            tracker = _shared.get(key)
+            if tracker is None:
+                tracker = _shared[key] = cls(owner_file, log_dir)
+            return tracker
+
+    def record(self, source: str = "cli"):
+        """Note one successful access (no disk I/O)"""
+        now = datetime.now()
+        with self._lock:
+            self.last_access = now.isoformat()
+            self._pending.append((now, source))
+        _start_flusher()
+
+    def flush(self) -> int:
+        """Write pending accesses; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return 0
+            try:
+                self._update_owner_file(pending)
+                self._append_log(pending)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not save access log: {e}")
+                with self._lock:
+                    self._pending = pending + self._pending
+                return 0
+            return len(pending)
+
+    def _update_owner_file(self, pending: List[Tuple[datetime, str]]):
+        with self._file_lock:
+            # Re-read so edits made since startup (new auth phrases, preferences) are kept
+            data: Dict = {}
+            if self.owner_file.exists():
+                with open(self.owner_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            data["last_access"] = pending[-1][0].isoformat()
+            data["access_count"] = data.get("access_count", 0) + len(pending)
+            write_json_atomic(self.owner_file, data, indent=2, ensure_ascii=False)
+
+    def _append_log(self, pending: List[Tuple[datetime, str]]):
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        by_day: Dict[str, List[str]] = {}
+        for when, source in pending:
+            by_day.setdefault(when.strftime("%Y-%m-%d"), []).append(f"{when:%H:%M:%S} {source}\n")
+        for day, lines in by_day.items():
+            with open(self.log_dir / f"{day}.log", 'a', encoding='utf-8') as f:
+                f.write("".join(lines))
+
+    def get_day(self, day: Optional[str] = None) -> Dict:
+        """Access count per source for one day (default today), including unflushed ones"""
+        day = day or datetime.now().strftime("%Y-%m-%d")
+        counts: Dict[str, int] = {}
+        log_file = self.log_dir / f"{day}.log"
+        if log_file.exists():
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    source = line.rstrip("\n").partition(" ")[2]
+                    counts[source] = counts.get(source, 0) + 1
+        with self._lock:
+            for when, source in self._pending:
+                if when.strftime("%Y-%m-%d") == day:
+                    counts[source] = counts.get(source, 0) + 1
+        return {"date": day, "total": sum(counts.values()), "by_source": counts}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {"last_access": self.last_access, "pending": len(self._pending)}
+
+    def close(self):
+        """Write whatever is pending (the shared flush thread keeps running)"""
+        self.flush()
@@ -2,14 +2,30 @@
 import subprocess
 import requests
 import openai
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple, Union
 import json
+import threading
+import time
+
+from tools.metrics import (PROBE_SECONDS, measure_stream, record_cache, record_generation,
+                           record_ollama_generation)
+
+OLLAMA_URL = "http://localhost:11434"
+NO_MODEL_MESSAGE = "❌ No AI models available. Please check Ollama or internet connection."
 
 class AIModelManager:
-    def __init__(self, offline_model: str = "llama3", online_model: str = "gpt-3.5-turbo"):
+    def __init__(self, offline_model: str = "llama3", online_model: str = "gpt-3.5-turbo",
+                 probe_ttl: float = 30.0):
         self.offline_model = offline_model
         self.online_model = online_model
         self.openai_client = None
+        self.last_model_used = "none"
+        # Availability probes are reused for probe_ttl seconds instead of run on every request
+        self.probe_ttl = probe_ttl
+        self._probes: Dict[str, Tuple[float, Any]] = {}
+        self._probe_lock = threading.Lock()
+        # One pooled HTTP session, so Ollama calls reuse keep-alive connections
+        self.http = requests.Session()
         self._setup_openai()
     
     def _setup_openai(self):
@@ -22,19 +38,59 @@ class AIModelManager:
         except Exception as e:
             print(f"OpenAI setup failed: {e}")
     
+    def _cached_probe(self, name: str, check: Callable[[], Any]) -> Any:
+        """Result of a probe, re-run only once it is older than probe_ttl"""
+        now = time.monotonic()
+        cached = self._probes.get(name)
+        if cached and now - cached[0] < self.probe_ttl:
+            record_cache("probe", True)
+            return cached[1]
+        record_cache("probe", False)
+        value = check()
+        with self._probe_lock:
+            self._probes[name] = (now, value)
+        return value
+    
+    def refresh_probes(self):
+        """Forget cached probe results (the next check runs again)"""
+        with self._probe_lock:
+            self._probes.clear()
+    
     def is_internet_available(self) -> bool:
         """Check if internet connection is available"""
+        return self._cached_probe("internet", self._check_internet)
+    
+    def is_ollama_available(self) -> bool:
+        """Check if Ollama is running locally"""
+        return self._cached_probe("ollama", self._check_ollama)
+    
+    def list_ollama_models(self) -> List[str]:
+        """Names of the models installed in Ollama (empty when it is not running)"""
+        return self._cached_probe("ollama_models", self._fetch_ollama_models)
+    
+    @PROBE_SECONDS.timed(probe="internet")
+    def _check_internet(self) -> bool:
         try:
-            response = requests.get("https://www.google.com", timeout=3)
+            response = self.http.get("https://www.google.com", timeout=3)
             return response.status_code == 200
         except:
             return False
     
-    def is_ollama_available(self) -> bool:
-        """Check if Ollama is running locally"""
+    @PROBE_SECONDS.timed(probe="ollama_models")
+    def _fetch_ollama_models(self) -> List[str]:
+        try:
+            response = self.http.get(f"{OLLAMA_URL}/api/tags", timeout=3)
+            if response.status_code == 200:
+                return [model["name"] for model in response.json().get("models", [])]
+        except Exception:
+            pass
+        return []
+    
+    @PROBE_SECONDS.timed(probe="ollama")
+    def _check_ollama(self) -> bool:
         try:
             # Try API endpoint first (more reliable)
-            response = requests.get("http://localhost:11434/api/tags", timeout=3)
+            response = self.http.get(f"{OLLAMA_URL}/api/tags", timeout=3)
             if response.status_code == 200:
                 return True
         except:
@@ -52,24 +108,30 @@ class AIModelManager:
         except:
             return False
     
-    def get_response_offline(self, prompt: str, system_prompt: str = "") -> str:
+    def get_response_offline(self, prompt: str, system_prompt: str = "", temperature: Optional[float] = None) -> str:
         """Get response from Ollama (offline)"""
+        model = f"ollama/{self.offline_model}"
+        start = time.perf_counter()
         try:
             # Try API endpoint first
-            url = "http://localhost:11434/api/generate"
+            url = f"{OLLAMA_URL}/api/generate"
             data = {
                 "model": self.offline_model,
                 "prompt": f"{system_prompt}\n\nUser: {prompt}\nAssistant:" if system_prompt else prompt,
                 "stream": False
             }
+            if temperature is not None:
+                data["options"] = {"temperature": temperature}
             
-            response = requests.post(url, json=data, timeout=30)
+            response = self.http.post(url, json=data, timeout=30)
             if response.status_code == 200:
                 result = response.json()
+                record_ollama_generation(model, result, time.perf_counter() - start)
                 return result.get("response", "No response from Ollama")
             
         except Exception as e:
             print(f"Ollama API error: {e}")
+            self._probes.pop("ollama", None)
         
         # Fallback to subprocess
         try:
@@ -83,6 +145,7 @@ class AIModelManager:
             )
             
             if result.returncode == 0:
+                record_generation(model, None, time.perf_counter() - start, 0)
                 return result.stdout.strip()
             else:
                 return f"❌ Ollama error: {result.stderr}"
@@ -92,7 +155,7 @@ class AIModelManager:
         except Exception as e:
             return f"❌ Offline model error: {str(e)}"
     
-    def get_response_online(self, prompt: str, system_prompt: str = "") -> str:
+    def get_response_online(self, prompt: str, system_prompt: str = "", temperature: Optional[float] = None) -> str:
         """Get response from OpenAI (online)"""
         if not self.openai_client:
             return "❌ OpenAI not configured. Please set OPENAI_API_KEY."
@@ -105,12 +168,16 @@ class AIModelManager:
             
             messages.append({"role": "user", "content": prompt})
             
+            start = time.perf_counter()
             response = self.openai_client.chat.completions.create(
                 model=self.online_model,
                 messages=messages,
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7 if temperature is None else temperature
             )
+            usage = getattr(response, "usage", None)
+            record_generation(f"openai/{self.online_model}", None, time.perf_counter() - start,
+                              getattr(usage, "completion_tokens", 0) or 0)
             
             content = response.choices[0].message.content
             return content.strip() if content else "No response content"
@@ -118,22 +185,45 @@ class AIModelManager:
         except Exception as e:
             return f"❌ Online model error: {str(e)}"
     
+    def choose_model(self, force_offline: bool = False) -> str:
+        """Which model would answer now: "online", "offline" or "none" """
+        if force_offline:
+            return "offline"
+        if self.openai_client and self.is_internet_available():
+            return "online"
+        if self.is_ollama_available():
+            return "offline"
+        return "none"
+    
+    def available_backends(self) -> List[str]:
+        """Every model that could answer now ("online", "offline"), preferred first"""
+        backends = []
+        if self.openai_client and self.is_internet_available():
+            backends.append("online")
+        if self.is_ollama_available():
+            backends.append("offline")
+        return backends
+    
+    def get_response_with(self, model_used: str, prompt: str, system_prompt: str = "",
+                          temperature: Optional[float] = None) -> str:
+        """Response from a specific backend (see ``available_backends``)"""
+        if model_used == "online":
+            return self.get_response_online(prompt, system_prompt, temperature)
+        if model_used == "offline":
+            return self.get_response_offline(prompt, system_prompt, temperature)
+        return NO_MODEL_MESSAGE
+    
     def get_response(self, prompt: str, system_prompt: str = "", force_offline: bool = False) -> Dict[str, Any]:
         """Get AI response (auto-detect online/offline)"""
         
         # Determine which model to use
-        if force_offline:
-            model_used = "offline"
-            response = self.get_response_offline(prompt, system_prompt)
-        elif self.is_internet_available() and self.openai_client:
-            model_used = "online"
+        model_used = self.choose_model(force_offline)
+        if model_used == "online":
             response = self.get_response_online(prompt, system_prompt)
-        elif self.is_ollama_available():
-            model_used = "offline"
+        elif model_used == "offline":
             response = self.get_response_offline(prompt, system_prompt)
         else:
-            model_used = "none"
-            response = "❌ No AI models available. Please check Ollama or internet connection."
+            response = NO_MODEL_MESSAGE
         
         return {
             "response": response,
@@ -141,6 +231,88 @@ class AIModelManager:
             "model_name": self.online_model if model_used == "online" else self.offline_model
         }
     
+    def stream_response_offline(self, prompt: str, system_prompt: str = "") -> Iterator[str]:
+        """Stream response tokens from Ollama"""
+        url = f"{OLLAMA_URL}/api/generate"
+        data = {
+            "model": self.offline_model,
+            "prompt": f"{system_prompt}\n\nUser: {prompt}\nAssistant:" if system_prompt else prompt,
+            "stream": True
+        }
+        
+        model = f"ollama/{self.offline_model}"
+        start = time.perf_counter()
+        first_token = None
+        yielded = False
+        try:
+            with self.http.post(url, json=data, stream=True, timeout=30) as response:
+                if response.status_code == 200:
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("response"):
+                            if first_token is None:
+                                first_token = time.perf_counter() - start
+                            yielded = True
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            record_ollama_generation(model, chunk, time.perf_counter() - start, first_token)
+                            break
+                    return
+        except Exception as e:
+            print(f"Ollama API error: {e}")
+            self._probes.pop("ollama", None)
+            if yielded:
+                # A second, complete answer must not be appended to the partial one
+                yield "\n\n❌ Ollama stream interrupted."
+                return
+        
+        # Fallback to the non-streaming path (subprocess)
+        yield self.get_response_offline(prompt, system_prompt)
+    
+    def stream_response_online(self, prompt: str, system_prompt: str = "") -> Iterator[str]:
+        """Stream response tokens from OpenAI"""
+        if not self.openai_client:
+            yield "❌ OpenAI not configured. Please set OPENAI_API_KEY."
+            return
+        
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model=self.online_model,
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                stream=True
+            )
+            tokens = (chunk.choices[0].delta.content for chunk in stream
+                      if chunk.choices and chunk.choices[0].delta.content)
+            yield from measure_stream(tokens, f"openai/{self.online_model}")
+        except Exception as e:
+            yield f"❌ Online model error: {str(e)}"
+    
+    def stream_response(self, prompt: str, system_prompt: str = "", force_offline: bool = False) -> Iterator[str]:
+        """Stream AI response tokens (auto-detect online/offline)
+        
+        The model chosen is stored in ``last_model_used`` once the first token is requested.
+        """
+        self.last_model_used = self.choose_model(force_offline)
+        yield from self.stream_with(self.last_model_used, prompt, system_prompt)
+    
+    def stream_with(self, model_used: str, prompt: str, system_prompt: str = "") -> Iterator[str]:
+        """Stream tokens from the model ``choose_model()`` picked"""
+        if model_used == "online":
+            yield from self.stream_response_online(prompt, system_prompt)
+        elif model_used == "offline":
+            yield from self.stream_response_offline(prompt, system_prompt)
+        else:
+            yield NO_MODEL_MESSAGE
+    
     def get_system_prompt(self, owner_name: str, context: str = "") -> str:
         """Generate system prompt for the AI"""
         base_prompt = f"""You are a personal AI assistant for {owner_name}.
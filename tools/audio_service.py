@@ -0,0 +1,398 @@
+# Audio Service - Offline speech synthesis and recognition for the API
+import importlib.util
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import wave
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_SAMPLE_RATE = 16000
+
+
+class AudioBusyError(RuntimeError):
+    """Raised when every worker slot is taken"""
+
+
+def decode_audio(data: bytes, sample_rate: int = DEFAULT_SAMPLE_RATE) -> Tuple[bytes, int]:
+    """Return mono 16-bit PCM and its sample rate.
+
+    WAV input is parsed (stereo is reduced to its first channel); anything else
+    is taken to be raw 16-bit mono PCM at ``sample_rate``.
+    """
+    if data[:4] != b"RIFF":
+        return data[:len(data) - len(data) % 2], sample_rate
+
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("Only 16-bit PCM audio is supported")
+            channels = wav.getnchannels()
+            rate = wav.getframerate()
+            pcm = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Invalid WAV audio: {e}")
+    if channels > 1:
+        pcm = array('h', pcm)[::channels].tobytes()
+    return pcm, rate
+
+
+class StreamingRecognizer:
+    """Incremental recognition over chunks of 16-bit PCM (optionally WAV-headed).
+
+    WAV streams take their rate and channel count from the header and are
+    reduced to the first channel, as ``decode_audio`` does. With Vosk, each
+    chunk is decoded as it arrives and partial results are available;
+    otherwise audio is buffered and recognised when finished.
+    """
+
+    def __init__(self, service: "AudioService", sample_rate: int = DEFAULT_SAMPLE_RATE):
+        self.service = service
+        self.sample_rate = sample_rate
+        self.channels = 1
+        self.partial = ""
+        self._recognizer = service._vosk_recognizer(sample_rate)
+        self._buffer = bytearray()
+        self._pending = b""
+        self._head = b""
+        self._started = False
+
+    def _skip_wav_header(self, chunk: bytes) -> bytes:
+        """Take the format from a WAV header; returns the audio after it"""
+        position = 12
+        while position + 8 <= len(chunk):
+            name = chunk[position:position + 4]
+            size = struct.unpack_from("<I", chunk, position + 4)[0]
+            if name == b"data":
+                return chunk[position + 8:]
+            if name == b"fmt " and position + 24 <= len(chunk):
+                channels, rate = struct.unpack_from("<HI", chunk, position + 10)
+                if struct.unpack_from("<H", chunk, position + 22)[0] != 16:
+                    raise ValueError("Only 16-bit PCM audio is supported")
+                if not channels:
+                    raise ValueError("Invalid WAV audio: no channels")
+                self.channels = channels
+                if rate != self.sample_rate:
+                    self.sample_rate = rate
+                    self._recognizer = self.service._vosk_recognizer(rate)
+            position += 8 + size + size % 2
+        raise ValueError("Invalid WAV audio: no data chunk in the header")
+
+    def feed(self, chunk: bytes) -> str:
+        """Add audio; returns the current partial transcript"""
+        if not self._started:
+            self._head += chunk
+            if self._head[:4] == b"RIFF" and self._head.find(b"data", 12) < 0 and len(self._head) < 4096:
+                return self.partial  # wait for the rest of the header
+            chunk, self._head = self._head, b""
+            self._started = True
+            if chunk[:4] == b"RIFF":
+                chunk = self._skip_wav_header(chunk)
+        chunk = self._pending + chunk
+        cut = len(chunk) - len(chunk) % (2 * self.channels)
+        chunk, self._pending = chunk[:cut], chunk[cut:]
+        if self.channels > 1:
+            chunk = array('h', chunk)[::self.channels].tobytes()
+        if self._recognizer is None:
+            self._buffer.extend(chunk)
+            return ""
+
+        if self._recognizer.AcceptWaveform(chunk):
+            self.partial = ""
+            text = json.loads(self._recognizer.Result()).get("text", "")
+            if text:
+                self._buffer.extend((text + " ").encode("utf-8"))
+        else:
+            self.partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return self.partial
+
+    def finish(self) -> Dict[str, str]:
+        if self._recognizer is None:
+            return self.service._transcribe_sphinx(bytes(self._buffer), self.sample_rate)
+
+        final = json.loads(self._recognizer.FinalResult()).get("text", "")
+        text = (self._buffer.decode("utf-8") + final).strip()
+        return {"text": text, "engine": "vosk"}
+
+
+class PooledStream:
+    """Iterator that advances a blocking generator on a worker pool.
+
+    The caller's thread only waits; ``release`` runs once when the generator is
+    exhausted, fails or the stream is closed (or garbage collected).
+    """
+
+    def __init__(self, chunks: Iterator[bytes], executor: ThreadPoolExecutor, release: Callable[[], None]):
+        self._chunks = chunks
+        self._executor = executor
+        self._release = release
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        if self._closed:
+            raise StopIteration
+        try:
+            return self._executor.submit(next, self._chunks).result()
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._chunks.close()
+        finally:
+            self._release()
+
+    def __del__(self):
+        self.close()
+
+
+class PooledRecognizer:
+    """Streaming recognition that holds one pool slot from open to close.
+
+    ``feed`` and ``finish`` run on the pool and return futures; the
+    recognizer is created there too, as loading a Vosk model is slow. The
+    slot is released on ``close``, or once the call still running finishes.
+    """
+
+    def __init__(self, service: "AudioService", sample_rate: int, release: Callable[[], None]):
+        self._service = service
+        self._sample_rate = sample_rate
+        self._release = release
+        self._recognizer: Optional[StreamingRecognizer] = None
+        self._running: Optional[Future] = None
+        self._closed = False
+
+    def _call(self, method: str, *args):
+        if self._recognizer is None:
+            self._recognizer = self._service.open_recognizer(self._sample_rate)
+        return getattr(self._recognizer, method)(*args)
+
+    def _submit(self, method: str, *args) -> Future:
+        if self._closed:
+            raise RuntimeError("Recognition stream is closed")
+        self._running = self._service.executor.submit(self._call, method, *args)
+        return self._running
+
+    def feed(self, chunk: bytes) -> Future:
+        return self._submit("feed", chunk)
+
+    def finish(self) -> Future:
+        return self._submit("finish")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._running is not None and not self._running.done():
+            self._running.add_done_callback(lambda _: self._release())
+        else:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+class AudioService:
+    """Synthesis and recognition on a bounded worker pool.
+
+    ``submit`` runs blocking audio work on ``max_workers`` threads and refuses
+    new work with ``AudioBusyError`` once ``max_workers + max_queue`` jobs are
+    in flight, so a burst of requests can't pile up unbounded. Streams opened
+    with ``stream_speech`` or ``open_stream`` hold a slot until they are closed.
+
+    TTS uses espeak-ng/espeak (streamed straight from its stdout) or renders
+    through the pyttsx3 worker. STT uses Vosk when a model is installed
+    (``VOSK_MODEL_PATH`` or ``models/vosk``) and falls back to PocketSphinx.
+    """
+
+    def __init__(self, tts_worker=None, max_workers: int = 2, max_queue: int = 4,
+                 chunk_size: int = 16384, vosk_model_path: Optional[str] = None):
+        self.tts_worker = tts_worker
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.vosk_model_path = vosk_model_path or os.getenv("VOSK_MODEL_PATH", "models/vosk")
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._espeak = shutil.which("espeak-ng") or shutil.which("espeak")
+        self._vosk_model = None
+        self._vosk_lock = threading.Lock()
+
+    # Pool
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            raise AudioBusyError("Audio workers are busy, try again shortly")
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run blocking audio work on the pool (raises AudioBusyError when full)"""
+        self._acquire()
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    # Text to speech
+
+    def tts_engine(self) -> Optional[str]:
+        if self._espeak:
+            return os.path.basename(self._espeak)
+        if self.tts_worker is not None:
+            return "pyttsx3" if self.tts_worker.available else None
+        return "pyttsx3" if importlib.util.find_spec("pyttsx3") else None
+
+    def _ensure_tts_worker(self) -> bool:
+        if self._espeak:
+            return True
+        if self.tts_worker is None:
+            try:
+                from tools.tts_worker import TTSWorker
+                self.tts_worker = TTSWorker()
+            except Exception as e:
+                print(f"TTS setup failed: {e}")
+                return False
+        return self.tts_worker.available
+
+    def stream_speech(self, text: str, rate: int = 180, volume: float = 0.9) -> "PooledStream":
+        """Start synthesising text; returns an iterator of WAV byte chunks.
+
+        The slot is taken here, so a busy pool fails before any response is
+        sent. Each chunk is produced on the pool and the slot is released when
+        the stream is exhausted or closed.
+        """
+        if not self._ensure_tts_worker():
+            raise RuntimeError("No text-to-speech engine available")
+        self._acquire()
+        return PooledStream(self.synthesize(text, rate, volume), self.executor, self._slots.release)
+
+    def synthesize(self, text: str, rate: int = 180, volume: float = 0.9) -> Iterator[bytes]:
+        """Blocking generator of WAV byte chunks"""
+        if self._espeak:
+            process = subprocess.Popen(
+                [self._espeak, "--stdout", "-s", str(rate), "-a", str(int(volume * 100))],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            try:
+                process.stdin.write(text.encode("utf-8"))
+                process.stdin.close()
+                while True:
+                    chunk = process.stdout.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+            return
+
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            if not self.tts_worker.render(text, path):
+                raise RuntimeError("Speech synthesis failed")
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
+
+    # Speech to text
+
+    def _vosk_recognizer(self, sample_rate: int):
+        """A fresh Vosk recognizer, or None if Vosk or its model is missing"""
+        with self._vosk_lock:
+            if self._vosk_model is None:
+                if not os.path.isdir(self.vosk_model_path):
+                    return None
+                try:
+                    from vosk import Model, SetLogLevel
+                except ImportError:
+                    return None
+                SetLogLevel(-1)
+                self._vosk_model = Model(self.vosk_model_path)
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self._vosk_model, sample_rate)
+
+    def stt_engine(self) -> Optional[str]:
+        if os.path.isdir(self.vosk_model_path):
+            try:
+                import vosk  # noqa: F401
+                return "vosk"
+            except ImportError:
+                pass
+        try:
+            import speech_recognition  # noqa: F401
+            import pocketsphinx  # noqa: F401
+            return "sphinx"
+        except ImportError:
+            return None
+
+    def open_recognizer(self, sample_rate: int = DEFAULT_SAMPLE_RATE) -> StreamingRecognizer:
+        return StreamingRecognizer(self, sample_rate)
+
+    def open_stream(self, sample_rate: int = DEFAULT_SAMPLE_RATE) -> PooledRecognizer:
+        """Reserve a slot for a whole recognition stream (raises AudioBusyError when full)"""
+        self._acquire()
+        return PooledRecognizer(self, sample_rate, self._slots.release)
+
+    def transcribe_pcm(self, pcm: bytes, sample_rate: int = DEFAULT_SAMPLE_RATE) -> Dict[str, str]:
+        """Recognise a complete 16-bit mono recording"""
+        stream = self.open_recognizer(sample_rate)
+        for start in range(0, len(pcm), self.chunk_size):
+            stream.feed(pcm[start:start + self.chunk_size])
+        return stream.finish()
+
+    def _transcribe_sphinx(self, pcm: bytes, sample_rate: int) -> Dict[str, str]:
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            raise RuntimeError("No offline speech recognition engine installed (vosk or pocketsphinx)")
+        audio = sr.AudioData(pcm, sample_rate, 2)
+        try:
+            text = sr.Recognizer().recognize_sphinx(audio)
+        except sr.UnknownValueError:
+            text = ""
+        except sr.RequestError as e:
+            raise RuntimeError(f"Offline recognition unavailable: {e}")
+        return {"text": text, "engine": "sphinx"}
+
+    def transcribe(self, data: bytes, sample_rate: int = DEFAULT_SAMPLE_RATE) -> Dict[str, str]:
+        """Recognise an uploaded WAV file or raw PCM"""
+        pcm, rate = decode_audio(data, sample_rate)
+        return self.transcribe_pcm(pcm, rate)
+
+    def get_info(self) -> Dict:
+        return {
+            "tts_engine": self.tts_engine(),
+            "stt_engine": self.stt_engine(),
+            "max_workers": self.max_workers,
+            "streaming_stt": self.stt_engine() == "vosk"
+        }
@@ -1,13 +1,26 @@
 # Authentication and Authorization for Agent Chandan
 import json
 import re
+import time
 from typing import Dict, Optional
 from pathlib import Path
 
+from tools.access_tracker import AccessTracker
+from tools.intent_matcher import (AuthMatcher, COMMAND_RULES, COMMAND_WORDS, IntentMatcher,
+                                  compile_phrases)
+
 class AuthManager:
-    def __init__(self, owner_file: str = "memory/owner.json"):
+    def __init__(self, owner_file: str = "memory/owner.json", reload_interval: float = 1.0):
         self.owner_file = Path(owner_file)
-        self.owner_data = self._load_owner_data()
+        self.reload_interval = reload_interval
+        self._checked_at = 0.0
+        self.command_matcher = IntentMatcher(COMMAND_RULES)
+        self.command_words = compile_phrases(COMMAND_WORDS)
+        self._owner_stamp = None
+        self.owner_data = {}
+        self.auth_matcher = AuthMatcher({})
+        self._reload_if_changed()
+        self.access_tracker = AccessTracker.shared(owner_file, str(self.owner_file.parent / "access_log"))
         self.session_active = False  # Add session tracking
     
     def _load_owner_data(self) -> Dict:
@@ -17,45 +30,38 @@ class AuthManager:
                 return json.load(f)
         return {}
     
+    def _file_stamp(self):
+        try:
+            stat = self.owner_file.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _reload_if_changed(self):
+        """Rebuild the auth matcher when owner.json has been edited"""
+        now = time.monotonic()
+        if self._owner_stamp is not None and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        stamp = self._file_stamp()
+        if stamp == self._owner_stamp:
+            return
+        try:
+            self.owner_data = self._load_owner_data()
+        except (OSError, ValueError) as e:
+            # Keep the last good data while the file is mid-edit
+            print(f"⚠️  Could not reload {self.owner_file}: {e}")
+            return
+        self.auth_matcher = AuthMatcher(self.owner_data)
+        self._owner_stamp = stamp
+    
     def is_authorized(self, input_text: str, user_name: Optional[str] = None) -> bool:
-        """Check if user is authorized to use the agent"""
-        if not self.owner_data:
-            return False
-        
-        input_lower = input_text.lower().strip()
-        
-        # Check for auth phrases from owner data
-        auth_phrases = self.owner_data.get("auth_phrases", [])
-        if not auth_phrases:
-            # Fallback to single auth phrase
-            auth_phrase = self.owner_data.get("auth_phrase", "").lower()
-            if auth_phrase:
-                auth_phrases = [auth_phrase]
-        
-        # Check all auth phrases (exact match or contains)
-        for phrase in auth_phrases:
-            phrase_lower = phrase.lower().strip()
-            if phrase_lower == input_lower or phrase_lower in input_lower:
-                print(f"✅ Auth successful with phrase: '{phrase}'")
-                return True
-        
-        # Check for owner name
-        owner_name = self.owner_data.get("name", "").lower()
-        if owner_name and any(part in input_lower for part in owner_name.split()):
-            print(f"✅ Auth successful with owner name")
-            return True
-        
-        # Check for wake words
-        wake_words = ["chandan", "agent", "assistant", "sorma", "sorma-ai"]
-        if any(word in input_lower for word in wake_words):
-            print(f"✅ Auth successful with wake word")
-            return True
-        
-        print(f"❌ Auth failed for input: '{input_text}'")
-        print(f"Available auth phrases: {auth_phrases}")
-        return False
+        """Check if user is authorized to use the agent
         
-        return False
+        Matches auth phrases, owner name parts and wake words in one scan.
+        """
+        self._reload_if_changed()
+        return self.auth_matcher.is_authorized(input_text)
     
     def get_unauthorized_response(self) -> str:
         """Get response for unauthorized users"""
@@ -64,77 +70,26 @@ class AuthManager:
     
     def get_owner_name(self) -> str:
         """Get owner's name"""
+        self._reload_if_changed()
         return self.owner_data.get("name", "Owner")
     
     def get_owner_preferences(self) -> Dict:
         """Get owner's preferences"""
+        self._reload_if_changed()
         return self.owner_data.get("preferences", {})
     
-    def update_last_access(self):
-        """Update last access time"""
-        from datetime import datetime
-        self.owner_data["last_access"] = datetime.now().isoformat()
-        
-        with open(self.owner_file, 'w', encoding='utf-8') as f:
-            json.dump(self.owner_data, f, indent=2, ensure_ascii=False)
+    def update_last_access(self, source: str = "cli"):
+        """Record an access; written to owner.json in batches by the access tracker"""
+        self.access_tracker.record(source)
+        self.owner_data["last_access"] = self.access_tracker.last_access
     
     def is_command(self, text: str) -> bool:
         """Check if text contains a command"""
-        commands = [
-            "remember", "forget", "recall", "what do you remember",
-            "clear memory", "reset", "status", "help"
-        ]
-        
-        text_lower = text.lower()
-        return any(cmd in text_lower for cmd in commands)
+        return self.command_words.search(text.lower()) is not None
     
     def extract_command(self, text: str) -> Optional[Dict]:
-        """Extract command from text"""
-        text_lower = text.lower().strip()
-        
-        # Remember command
-        if text_lower.startswith("remember "):
-            return {
-                "type": "remember",
-                "content": text[9:].strip()
-            }
-        
-        # Forget command
-        if text_lower.startswith("forget "):
-            return {
-                "type": "forget",
-                "content": text[7:].strip()
-            }
-        
-        # Recall/What do you remember
-        if any(phrase in text_lower for phrase in ["what do you remember", "recall", "show memory"]):
-            return {
-                "type": "recall",
-                "content": ""
-            }
-        
-        # Clear memory
-        if any(phrase in text_lower for phrase in ["clear memory", "reset memory", "forget everything"]):
-            return {
-                "type": "clear_memory",
-                "content": ""
-            }
-        
-        # Status
-        if text_lower in ["status", "how are you", "what's your status"]:
-            return {
-                "type": "status",
-                "content": ""
-            }
-        
-        # Help
-        if text_lower in ["help", "what can you do", "commands"]:
-            return {
-                "type": "help",
-                "content": ""
-            }
-        
-        return None
+        """Extract command type and content from text in a single pass"""
+        return self.command_matcher.match(text)
     
     def is_session_active(self) -> bool:
         """Check if session is active"""
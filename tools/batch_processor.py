@@ -0,0 +1,272 @@
+# Batch Processor - Parallel processing of whole directories or glob patterns
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from tools.metrics import record_cache
+from tools.process_lock import FileLock, write_json_atomic
+
+# Processed files are indexed into the document store in groups of this size (one save each)
+INDEX_BATCH_SIZE = 16
+# Never processed, whatever the target: the assistant's own state (auth phrases, memory, sessions)
+EXCLUDED_DIRS = ("memory",)
+
+
+def _process_one(file_path: str, known_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Worker entry point - runs in a separate process, so it must be top-level.
+
+    Hashes the file first (here, so large batches hash in parallel) and skips
+    processing when the content still matches ``known_hash``.
+    """
+    from tools.file_processor import FileProcessor
+
+    started = time.perf_counter()
+    content_hash = file_hash(file_path)
+    if content_hash == known_hash:
+        return {"unchanged": True, "content_hash": content_hash}
+    result = FileProcessor().process_file(file_path)
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    result["content_hash"] = content_hash
+    return result
+
+
+def file_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BatchProcessor:
+    """Fans FileProcessor.process_file out over a process pool.
+
+    A manifest of content hashes (``memory/batch_manifest.json``) lets repeated
+    runs skip files that have not changed since they were last processed.
+    Runs in several worker processes merge their entries into it under a
+    file lock.
+    """
+
+    def __init__(self, manifest_file: str = "memory/batch_manifest.json",
+                 reports_dir: str = "memory/reports", max_workers: Optional[int] = None,
+                 excluded_dirs: Sequence[str] = EXCLUDED_DIRS):
+        self.manifest_file = Path(manifest_file)
+        self.reports_dir = Path(reports_dir)
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.excluded_dirs = [Path(path).resolve() for path in excluded_dirs]
+        self._manifest_lock = FileLock(str(self.manifest_file.with_name(f".{self.manifest_file.stem}.lock")))
+        self.manifest = self._load_manifest()
+        self._changed: Set[str] = set()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self):
+        """Merge this run's entries into the manifest on disk"""
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            manifest.update((path, self.manifest[path]) for path in self._changed)
+            write_json_atomic(self.manifest_file, manifest, indent=2)
+        self.manifest = manifest
+        self._changed.clear()
+
+    def _allowed(self, path: Path, root: Optional[Path]) -> bool:
+        """Inside root (if any, after following symlinks) and outside the excluded directories"""
+        real = path.resolve()
+        if root is not None and real != root and root not in real.parents:
+            return False
+        return not any(real == excluded or excluded in real.parents for excluded in self.excluded_dirs)
+
+    def collect_files(self, target: str, recursive: bool = True,
+                      extensions: Optional[List[str]] = None, root: Optional[str] = None) -> List[str]:
+        """Expand a directory or glob pattern into a sorted list of supported files.
+
+        Only files under ``root`` (when given) and outside ``excluded_dirs`` are kept.
+        """
+        if extensions is None:
+            from tools.file_processor import FileProcessor
+            extensions = FileProcessor().get_supported_formats()
+        extensions = {e.lower() for e in extensions}
+
+        path = Path(target)
+        if path.is_dir():
+            candidates = path.rglob("*") if recursive else path.glob("*")
+        else:
+            candidates = (Path(p) for p in glob.iglob(target, recursive=recursive))
+
+        root_path = Path(root).resolve() if root is not None else None
+        return sorted(str(p) for p in candidates
+                      if p.is_file() and p.suffix.lower() in extensions and self._allowed(p, root_path))
+
+    def _is_unchanged(self, file_path: str) -> bool:
+        """Whether size and mtime still match the manifest (the content is then not even hashed)"""
+        stat = os.stat(file_path)
+        entry = self.manifest.get(os.path.abspath(file_path))
+        return bool(entry) and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+    def _known_hash(self, file_path: str) -> Optional[str]:
+        entry = self.manifest.get(os.path.abspath(file_path))
+        return entry["hash"] if entry else None
+
+    def _record(self, file_path: str, content_hash: str, processed: bool = True):
+        """Remember a file's hash; ``processed`` False for files touched but not modified"""
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        self._changed.add(key)
+        entry = self.manifest.get(key) if not processed else None
+        self.manifest[key] = {
+            "hash": content_hash,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "processed_at": entry["processed_at"] if entry else datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def _summarize(file_path: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Small per-file record for streaming and the report (no full text)"""
+        summary = {"path": file_path, "file_type": result.get("file_type")}
+        for key in ("word_count", "page_count", "paragraph_count", "rows", "columns",
+                    "sheet_count", "line_count", "duration_ms"):
+            if key in result:
+                summary[key] = result[key]
+        return summary
+
+    def run(self, target: str, recursive: bool = True, force: bool = False,
+            document_store=None, report_file: Optional[str] = None,
+            root: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Process every file under target, yielding one event per file as it finishes.
+
+        The final event has ``event == "report"`` and carries the aggregate report,
+        which is also written to ``report_file`` (default: a timestamped file in
+        ``reports_dir``). Processed results are indexed into ``document_store``
+        when one is given. If the consumer stops early (closes the generator),
+        queued files are cancelled and what finished is still recorded. A file
+        that disappears mid-run gets an error event; the rest carry on.
+        """
+        started = time.perf_counter()
+        files = self.collect_files(target, recursive, root=root)
+        report = {
+            "target": target,
+            "started_at": datetime.now().isoformat(),
+            "total_files": len(files),
+            "processed": 0,
+            "skipped": 0,
+            "failed": 0,
+            "total_words": 0,
+            "by_type": {},
+            "files": [],
+            "errors": []
+        }
+
+        # Files whose size and mtime match the manifest are skipped here; the rest are
+        # hashed by the workers, which skip them too if only the mtime changed
+        pending: List[str] = []
+        for file_path in files:
+            try:
+                unchanged = not force and self._is_unchanged(file_path)
+            except OSError as e:
+                report["failed"] += 1
+                report["errors"].append({"path": file_path, "error": str(e)})
+                yield {"event": "error", "path": file_path, "error": str(e)}
+                continue
+            if unchanged:
+                record_cache("batch_manifest", True)
+                report["skipped"] += 1
+                yield {"event": "skipped", "path": file_path}
+            else:
+                pending.append(file_path)
+
+        to_index: List[Tuple[str, Dict[str, Any]]] = []
+        executor = self._create_executor(len(pending)) if pending else None
+        futures: Dict[Any, str] = {}
+        finished = False
+        try:
+            futures = {executor.submit(_process_one, path, None if force else self._known_hash(path)): path
+                       for path in pending}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"error": str(e)}
+
+                if "error" in result:
+                    report["failed"] += 1
+                    report["errors"].append({"path": file_path, "error": result["error"]})
+                    yield {"event": "error", "path": file_path, "error": result["error"]}
+                    continue
+
+                content_hash = result.pop("content_hash")
+                if not force:
+                    record_cache("batch_manifest", bool(result.get("unchanged")))
+                try:
+                    # Touched but not modified files keep their processed_at; only the new mtime is noted
+                    self._record(file_path, content_hash, processed=not result.get("unchanged"))
+                except OSError as e:
+                    report["failed"] += 1
+                    report["errors"].append({"path": file_path, "error": str(e)})
+                    yield {"event": "error", "path": file_path, "error": str(e)}
+                    continue
+                if result.get("unchanged"):
+                    report["skipped"] += 1
+                    yield {"event": "skipped", "path": file_path}
+                    continue
+
+                if document_store is not None:
+                    to_index.append((file_path, result))
+                    if len(to_index) >= INDEX_BATCH_SIZE:
+                        document_store.add_documents(to_index)
+                        to_index = []
+
+                summary = self._summarize(file_path, result)
+                report["processed"] += 1
+                report["total_words"] += result.get("word_count", 0)
+                file_type = result.get("file_type", "Unknown")
+                report["by_type"][file_type] = report["by_type"].get(file_type, 0) + 1
+                report["files"].append(summary)
+                yield {"event": "processed", **summary}
+            finished = True
+        finally:
+            if executor is not None:
+                if not finished:
+                    # Consumer gone (e.g. the streaming client disconnected): drop the queued files
+                    for future in futures:
+                        future.cancel()
+                executor.shutdown(wait=finished)
+            if document_store is not None and to_index:
+                document_store.add_documents(to_index)
+            self._save_manifest()
+
+        report["duration_seconds"] = round(time.perf_counter() - started, 3)
+        report["finished_at"] = datetime.now().isoformat()
+        report["report_file"] = self._write_report(report, report_file)
+        yield {"event": "report", "report": report}
+
+    def _create_executor(self, job_count: int):
+        workers = min(self.max_workers, job_count)
+        try:
+            return ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            print(f"⚠️  Process pool unavailable, using threads: {e}")
+            return ThreadPoolExecutor(max_workers=workers)
+
+    def _write_report(self, report: Dict[str, Any], report_file: Optional[str]) -> str:
+        if report_file:
+            path = Path(report_file)
+        else:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+            path = self.reports_dir / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        return str(path)
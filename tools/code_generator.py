@@ -0,0 +1,250 @@
+# Code Generator - Best-of-N code generation with sandboxed syntax/lint checks and a result cache
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tools.metrics import record_cache
+
+FENCE_PATTERN = re.compile(r"```[\w+#.-]*[ \t]*\n(.*?)```", re.DOTALL)
+# AIModelManager reports failures as text with these markers
+ERROR_PREFIXES = ("❌", "⏰")
+TEMPERATURES = (0.2, 0.5, 0.8, 1.0)
+
+# Runs in the sandbox: compile (never execute) the file, then lint it if pyflakes is installed
+PYTHON_CHECK = """
+import io, json, sys
+source = open(sys.argv[1], encoding="utf-8").read()
+report = {"syntax_ok": True, "warnings": 0, "messages": []}
+try:
+    compile(source, "candidate.py", "exec")
+except SyntaxError as e:
+    report.update(syntax_ok=False, messages=["line %s: %s" % (e.lineno, e.msg)])
+else:
+    try:
+        from pyflakes.api import check
+        from pyflakes.reporter import Reporter
+        out = io.StringIO()
+        report["warnings"] = check(source, "candidate.py", Reporter(out, out))
+        report["messages"] = out.getvalue().splitlines()[:10]
+        report["linted"] = True
+    except ImportError:
+        report["linted"] = False
+print(json.dumps(report))
+"""
+
+# Runs first in the checker process: apply the limits, then exec the checker itself.
+# (preexec_fn would do the same but is unsafe with threads, and checks run on a pool.)
+LIMITS_WRAPPER = """
+import os, resource, sys
+cpu, memory = int(sys.argv[1]), int(sys.argv[2])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+if memory:
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+os.execv(sys.argv[3], sys.argv[3:])
+"""
+CPU_SECONDS = 5
+PYTHON_MEMORY = 512 * 1024 * 1024
+# V8 reserves far more address space than it uses, so node gets a heap cap instead of RLIMIT_AS
+NODE_HEAP_MB = 256
+
+LANGUAGE_EXTENSIONS = {"python": ".py", "javascript": ".js", "js": ".js"}
+
+
+def extract_code(answer: str) -> str:
+    """The code blocks of a model answer (the whole answer when it has none)"""
+    blocks = FENCE_PATTERN.findall(answer)
+    return "\n\n".join(block.strip("\n") for block in blocks) if blocks else answer.strip()
+
+
+def _limited(command: List[str], memory: int) -> List[str]:
+    """``command`` run under the CPU limit and, if ``memory``, an address-space limit (POSIX only)"""
+    if os.name != "posix":
+        return command
+    return [sys.executable, "-I", "-c", LIMITS_WRAPPER, str(CPU_SECONDS), str(memory)] + command
+
+
+def _checker_command(language: str, path: str) -> Optional[List[str]]:
+    if language == "python":
+        return _limited([sys.executable, "-I", "-c", PYTHON_CHECK, path], PYTHON_MEMORY)
+    if language in ("javascript", "js"):
+        node = shutil.which("node")
+        return _limited([node, f"--max-old-space-size={NODE_HEAP_MB}", "--check", path], 0) if node else None
+    return None
+
+
+def check_code(code: str, language: str, timeout: float = 10.0) -> Dict[str, Any]:
+    """Syntax/lint check of code in a separate, resource-limited process.
+
+    The code is only compiled, never run. Languages without a local checker
+    come back with ``checked`` False.
+    """
+    language = language.strip().lower()
+    with tempfile.TemporaryDirectory(prefix="code-check-") as sandbox:
+        path = os.path.join(sandbox, "candidate" + LANGUAGE_EXTENSIONS.get(language, ".txt"))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(code)
+        command = _checker_command(language, path)
+        if command is None:
+            return {"checked": False}
+        try:
+            result = subprocess.run(command, cwd=sandbox, capture_output=True, text=True, timeout=timeout,
+                                    env={"PATH": os.environ.get("PATH", "")})
+        except subprocess.TimeoutExpired:
+            return {"checked": True, "syntax_ok": False, "warnings": 0, "messages": ["Check timed out"]}
+
+    if language == "python":
+        try:
+            return {"checked": True, **json.loads(result.stdout)}
+        except ValueError:
+            return {"checked": True, "syntax_ok": False, "warnings": 0,
+                    "messages": result.stderr.strip().splitlines()[-3:]}
+    return {"checked": True, "syntax_ok": result.returncode == 0, "warnings": 0,
+            "messages": result.stderr.strip().splitlines()[:10]}
+
+
+def score_candidate(code: str, fenced: bool, checks: Dict[str, Any]) -> int:
+    """Higher is better: compiles, few lint warnings, answered in a code block"""
+    if not code:
+        return 0
+    if not checks.get("checked"):
+        score = 60
+    elif not checks.get("syntax_ok"):
+        return 5 if fenced else 0
+    else:
+        score = 100 - min(5 * checks.get("warnings", 0), 40)
+    return score + (5 if fenced else 0)
+
+
+class CodeCache:
+    """(task, language, context) -> best generated code, persisted in SQLite"""
+
+    def __init__(self, db_file: str = "memory/code_cache.db", max_age: float = 30 * 24 * 3600):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS code_cache ("
+                         "key TEXT PRIMARY KEY, result TEXT NOT NULL, created REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_file), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(task: str, language: str, context: Optional[str]) -> str:
+        normalized = "\x00".join((" ".join(task.split()).lower(), language.strip().lower(),
+                                  " ".join((context or "").split())))
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT result, created FROM code_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO code_cache (key, result, created) VALUES (?, ?, ?)",
+                         (key, json.dumps(result, ensure_ascii=False), time.time()))
+
+
+class CodeGenerator:
+    """Generates several candidates at once across the available backends and keeps the best.
+
+    Candidates differ by backend and temperature. Each is checked as soon as
+    it arrives, in a pool of sandboxed checker processes, so checking overlaps
+    with the slower generations.
+    """
+
+    def __init__(self, ai, cache: Optional[CodeCache] = None, max_candidates: int = 4, max_workers: int = 4):
+        self.ai = ai
+        self.cache = cache
+        self.max_candidates = max_candidates
+        self._generators = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="code-gen")
+        self._checkers = ThreadPoolExecutor(max_workers=max(1, min(max_workers, os.cpu_count() or 1)),
+                                            thread_name_prefix="code-check")
+
+    @staticmethod
+    def prompts(task: str, language: str, context: Optional[str]):
+        prompt = f"Generate {language} code for: {task}"
+        if context:
+            prompt += f"\nContext: {context}"
+        system_prompt = (f"You are an expert {language} programmer. Provide clean, well-commented code "
+                         "in a single fenced code block.")
+        return prompt, system_prompt
+
+    def _generate(self, backend: str, temperature: float, prompt: str, system_prompt: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        answer = self.ai.get_response_with(backend, prompt, system_prompt, temperature)
+        return {"model_used": backend, "temperature": temperature, "answer": answer,
+                "generation_seconds": round(time.perf_counter() - start, 3)}
+
+    def _score(self, candidate: Dict[str, Any], language: str) -> Dict[str, Any]:
+        answer = candidate.pop("answer")
+        if answer.startswith(ERROR_PREFIXES):
+            return {**candidate, "code": "", "score": 0, "checks": {"checked": False, "error": answer}}
+        code = extract_code(answer)
+        checks = check_code(code, language)
+        return {**candidate, "code": code, "checks": checks,
+                "score": score_candidate(code, bool(FENCE_PATTERN.search(answer)), checks)}
+
+    def generate(self, task: str, language: str = "python", context: Optional[str] = None,
+                 candidates: int = 3, use_cache: bool = True) -> Dict[str, Any]:
+        """Best of ``candidates`` generations (blocking).
+
+        Returns {"code", "model_used", "score", "checks", "candidates", "cached"};
+        "error" instead of "code" when no model produced anything.
+        """
+        key = self.cache.make_key(task, language, context) if self.cache else None
+        if self.cache and use_cache:
+            cached = self.cache.get(key)
+            record_cache("code_generation", cached is not None)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        backends = self.ai.available_backends() if self.ai else []
+        if not backends:
+            return {"error": "AI not available"}
+
+        count = max(1, min(candidates, self.max_candidates))
+        prompt, system_prompt = self.prompts(task, language, context)
+        plan = [(backends[i % len(backends)], TEMPERATURES[i % len(TEMPERATURES)]) for i in range(count)]
+        futures = [self._generators.submit(self._generate, backend, temperature, prompt, system_prompt)
+                   for backend, temperature in plan]
+        checked = [self._checkers.submit(self._score, future.result(), language) for future in as_completed(futures)]
+        scored = [future.result() for future in checked]
+
+        best = max(scored, key=lambda candidate: candidate["score"])
+        if not best["code"]:
+            return {"error": best["checks"].get("error", "No code generated"), "candidates": scored}
+        result = {
+            "code": best["code"],
+            "model_used": best["model_used"],
+            "score": best["score"],
+            "checks": best["checks"],
+            "candidates": [{k: v for k, v in candidate.items() if k != "code"} for candidate in scored],
+        }
+        # Only keep answers that passed their checks, so a bad generation is not served again
+        if self.cache and best["checks"].get("syntax_ok", not best["checks"].get("checked")):
+            self.cache.put(key, result)
+        return {**result, "cached": False}
+
+    def shutdown(self):
+        self._generators.shutdown(wait=False)
+        self._checkers.shutdown(wait=False)
@@ -0,0 +1,503 @@
+# Document Store - Chunked BM25 index over processed files for question answering
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tools.process_lock import FileLock, write_json_atomic
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being
+below between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down
+during each either etc few for from further get got had hadn't has hasn't have haven't having he he'd
+he'll he's her here here's hers herself him himself his how how's however i i'd i'll i'm i've if in
+into is isn't it it's its itself just let's like may me might more most must mustn't my myself no nor
+not now of off on once one only or other ought our ours ourselves out over own per same shall shan't
+she she'd she'll she's should shouldn't so some such than that that's the their theirs them themselves
+then there there's these they they'd they'll they're they've this those through thus to too under
+until up upon us very via was wasn't we we'd we'll we're we've were weren't what what's when when's
+where where's whether which while who who's whom why why's will with within without won't would
+wouldn't yes yet you you'd you'll you're you've your yours yourself yourselves
+""".split())
+# Query terms found in more than this share of the items are skipped when rarer terms remain
+COMMON_TERM_RATIO = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens used by every index in the assistant"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def chunk_words(text: str, size: int, overlap: int) -> List[str]:
+    """Split text into overlapping windows of ``size`` words"""
+    words = text.split()
+    step = max(1, size - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return chunks
+
+
+def extract_text(result: Dict[str, Any]) -> str:
+    """Flatten a FileProcessor result into plain text"""
+    if result.get("text_content"):
+        return result["text_content"]
+    if "content" in result:
+        content = result["content"]
+        return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+    parts = []
+    if "column_names" in result:
+        parts.append("Columns: " + ", ".join(map(str, result["column_names"])))
+        parts.extend(json.dumps(row, ensure_ascii=False, default=str) for row in result.get("preview", []))
+    for sheet_name, sheet in result.get("sheets", {}).items():
+        parts.append(f"Sheet {sheet_name} columns: " + ", ".join(map(str, sheet.get("column_names", []))))
+        parts.extend(json.dumps(row, ensure_ascii=False, default=str) for row in sheet.get("preview", []))
+    return "\n".join(parts)
+
+
+class BM25Index:
+    """Incremental inverted index with Okapi BM25 ranking.
+
+    Only the postings of the query terms are touched at search time, so
+    lookups stay fast as the number of indexed items grows.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, tokens: List[str]):
+        """Index a token list under doc_id, replacing any previous entry"""
+        if doc_id in self.doc_lengths:
+            self.remove(doc_id)
+
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+        self.doc_terms[doc_id] = tuple(counts)
+        self.doc_lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, doc_id: int):
+        """Drop doc_id from the index"""
+        length = self.doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in self.doc_terms.pop(doc_id, ()):
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def search(self, query_tokens: Iterable[str], limit: int = 5,
+               allowed: Optional[set] = None) -> List[Tuple[int, float]]:
+        """Return the best (doc_id, score) pairs for the query"""
+        n_docs = len(self.doc_lengths)
+        if not n_docs:
+            return []
+
+        # Stopwords and terms in most items add almost nothing to the ranking but have the
+        # longest postings lists; drop them unless nothing else is left
+        terms = set(query_tokens)
+        terms = (terms - STOPWORDS) or terms
+        terms = {term for term in terms if len(self.postings.get(term, ())) <= n_docs * COMMON_TERM_RATIO} or terms
+
+        avg_length = self.total_length / n_docs
+        scores: Dict[int, float] = {}
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class HashingEmbedder:
+    """Dependency-free local embeddings via the hashing trick (requires numpy)"""
+
+    def __init__(self, dim: int = 256):
+        import numpy as np
+
+        self.np = np
+        self.dim = dim
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def embed(self, tokens: List[str]):
+        vector = self.np.zeros(self.dim, dtype=self.np.float32)
+        # Unigrams plus bigrams give a little word-order signal
+        features = tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            index, sign = self._bucket(feature)
+            vector[index] += sign
+        norm = self.np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class DocumentStore:
+    """Chunks FileProcessor output and retrieves the most relevant chunks.
+
+    Chunk text and document metadata live in ``<store_dir>/store.json``. When
+    numpy is installed, chunk embeddings are kept in a memory-mapped float32
+    matrix (``embeddings.f32``) and blended with BM25 via reciprocal rank fusion.
+    """
+
+    def __init__(self, store_dir: str = "memory/documents", chunk_size: int = 200,
+                 chunk_overlap: int = 40, use_embeddings: bool = True, embedding_dim: int = 256):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.store_file = self.store_dir / "store.json"
+        self.embeddings_file = self.store_dir / "embeddings.f32"
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.chunks: List[Optional[Dict[str, Any]]] = []
+        self.index = BM25Index()
+        self._lock = threading.RLock()
+        # Writers in other worker processes: changes are made under the file lock and
+        # picked up by everyone else when store.json's fingerprint changes
+        self._file_lock = FileLock(str(self.store_dir / ".store.lock"))
+        self._fingerprint: Optional[Tuple[int, int]] = None
+
+        self.embedder = None
+        self._embeddings = None
+        if use_embeddings:
+            try:
+                self.embedder = HashingEmbedder(embedding_dim)
+            except ImportError:
+                pass
+
+        with self._file_lock:
+            self._load()
+
+    # Persistence
+
+    def _store_fingerprint(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.store_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, rebuild_embeddings: bool = True):
+        """Load chunks and rebuild the in-memory index"""
+        self._fingerprint = self._store_fingerprint()
+        if self._fingerprint is None:
+            return
+        try:
+            with open(self.store_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        self.documents = data.get("documents", {})
+        self.chunks = data.get("chunks", [])
+        for chunk_id, chunk in enumerate(self.chunks):
+            if chunk is not None:
+                self.index.add(chunk_id, tokenize(chunk["text"]))
+        self._open_embeddings(rebuild_embeddings)
+
+    def _sync(self, rebuild_embeddings: bool = False):
+        """Reload if another process rewrote the store since this one last read or wrote it"""
+        if self._store_fingerprint() == self._fingerprint:
+            return
+        self.documents, self.chunks, self.index = {}, [], BM25Index()
+        self._load(rebuild_embeddings)
+
+    def _save(self):
+        """Write chunk text and metadata atomically"""
+        write_json_atomic(self.store_file, {"documents": self.documents, "chunks": self.chunks}, ensure_ascii=False)
+        self._fingerprint = self._store_fingerprint()
+
+    def _open_embeddings(self, rebuild: bool = True):
+        """Map the embedding matrix read-only; rows line up with self.chunks"""
+        self._embeddings = None
+        if not self.embedder or not self.embeddings_file.exists():
+            return
+        np = self.embedder.np
+        rows = self.embeddings_file.stat().st_size // (4 * self.embedder.dim)
+        if rows != len(self.chunks):
+            # Out of sync (e.g. embeddings toggled or crash mid-write) - rebuild. Readers
+            # without the file lock skip vectors instead: a writer may be mid-append
+            if rebuild:
+                self._rebuild_embeddings()
+            return
+        if rows:
+            self._embeddings = np.memmap(self.embeddings_file, dtype=np.float32, mode="r",
+                                         shape=(rows, self.embedder.dim))
+
+    def _append_embeddings(self, vectors: List[Any]):
+        if not self.embedder or not vectors:
+            return
+        self._embeddings = None  # release the old mapping before growing the file
+        with open(self.embeddings_file, 'ab') as f:
+            for vector in vectors:
+                f.write(vector.tobytes())
+        self._open_embeddings()
+
+    def _rebuild_embeddings(self):
+        np = self.embedder.np
+        with open(self.embeddings_file, 'wb') as f:
+            for chunk in self.chunks:
+                vector = self.embedder.embed(tokenize(chunk["text"])) if chunk else np.zeros(self.embedder.dim, dtype=np.float32)
+                f.write(vector.tobytes())
+        self._open_embeddings()
+
+    # Indexing
+
+    def _chunk_text(self, text: str) -> List[str]:
+        """Split text into overlapping word windows"""
+        return chunk_words(text, self.chunk_size, self.chunk_overlap)
+
+    def add_document(self, file_path: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Chunk and index a FileProcessor result; re-adding a path replaces it"""
+        return self.add_documents([(file_path, result)])[0]
+
+    def add_documents(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """``add_document`` for several files, under one hold of the store lock and with one save.
+
+        Syncing, indexing and saving happen under the same lock, so writers in
+        other processes never see (or overwrite) a half-applied batch.
+        """
+        items = list(items)
+        with self._file_lock, self._lock:
+            self._sync(rebuild_embeddings=True)
+            added, vectors = [], []
+            for file_path, result in items:
+                added.append(self._index_document(file_path, result, vectors))
+            self._append_embeddings(vectors)
+            if any("error" not in entry for entry in added):
+                self._compact()
+                self._save()
+        return added
+
+    def _index_document(self, file_path: str, result: Dict[str, Any], vectors: List[Any]) -> Dict[str, Any]:
+        if "error" in result:
+            return {"error": result["error"]}
+
+        text = extract_text(result)
+        doc_id = hashlib.sha1(str(Path(file_path).resolve()).encode("utf-8")).hexdigest()[:16]
+        self._remove_chunks(doc_id)
+        chunk_ids = []
+        for position, chunk_text in enumerate(self._chunk_text(text)):
+            chunk_id = len(self.chunks)
+            self.chunks.append({"doc_id": doc_id, "position": position, "text": chunk_text})
+            tokens = tokenize(chunk_text)
+            self.index.add(chunk_id, tokens)
+            if self.embedder:
+                vectors.append(self.embedder.embed(tokens))
+            chunk_ids.append(chunk_id)
+
+        self.documents[doc_id] = {
+            "doc_id": doc_id,
+            "file_path": file_path,
+            "file_name": result.get("file_name", Path(file_path).name),
+            "file_type": result.get("file_type", "Unknown"),
+            "chunk_ids": chunk_ids,
+            "indexed_at": datetime.now().isoformat()
+        }
+        return {"doc_id": doc_id, "chunks": len(chunk_ids)}
+
+    def _compact(self):
+        """Drop the chunk slots of replaced and removed documents once they are a quarter of all slots.
+
+        Chunk ids are positions, so the rest are renumbered: documents, index
+        and embedding rows. Runs under the file lock, before a save.
+        """
+        dead = sum(1 for chunk in self.chunks if chunk is None)
+        if not dead or dead * 4 < len(self.chunks):
+            return
+        keep = [chunk_id for chunk_id, chunk in enumerate(self.chunks) if chunk is not None]
+        new_ids = {old: new for new, old in enumerate(keep)}
+        if self._embeddings is not None:
+            vectors = self.embedder.np.asarray(self._embeddings[keep])
+            self._embeddings = None
+            tmp_file = self.embeddings_file.with_name(f"{self.embeddings_file.name}.{os.getpid()}.tmp")
+            vectors.tofile(str(tmp_file))
+            os.replace(tmp_file, self.embeddings_file)
+
+        self.chunks = [self.chunks[chunk_id] for chunk_id in keep]
+        for document in self.documents.values():
+            document["chunk_ids"] = [new_ids[chunk_id] for chunk_id in document["chunk_ids"]]
+        self.index = BM25Index(self.index.k1, self.index.b)
+        for chunk_id, chunk in enumerate(self.chunks):
+            self.index.add(chunk_id, tokenize(chunk["text"]))
+        self._open_embeddings()
+
+    def _remove_chunks(self, doc_id: str):
+        document = self.documents.pop(doc_id, None)
+        if not document:
+            return
+        for chunk_id in document["chunk_ids"]:
+            self.index.remove(chunk_id)
+            self.chunks[chunk_id] = None
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Remove a document and its chunks"""
+        with self._file_lock, self._lock:
+            self._sync(rebuild_embeddings=True)
+            if doc_id not in self.documents:
+                return False
+            self._remove_chunks(doc_id)
+            self._compact()
+            self._save()
+        return True
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """List indexed documents"""
+        with self._lock:
+            self._sync()
+            documents = []
+            for doc in self.documents.values():
+                summary = {k: v for k, v in doc.items() if k != "chunk_ids"}
+                summary["chunk_count"] = len(doc["chunk_ids"])
+                documents.append(summary)
+            return documents
+
+    def get_document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        """Chunks of one document in order"""
+        with self._lock:
+            self._sync()
+            document = self.documents.get(doc_id)
+            if not document:
+                return []
+            return [dict(self.chunks[chunk_id]) for chunk_id in document["chunk_ids"]]
+
+    # Retrieval
+
+    def search(self, query: str, top_k: int = 3, doc_id: Optional[str] = None,
+               min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Return the top-k chunks for a query.
+
+        ``min_score`` drops chunks whose BM25 score is below it, so queries that
+        only share very common words with a document return nothing.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            self._sync()
+            if doc_id is not None and doc_id not in self.documents:
+                return []
+            allowed = set(self.documents[doc_id]["chunk_ids"]) if doc_id is not None else None
+            candidates = max(top_k * 4, 20)
+            bm25_hits = [hit for hit in self.index.search(tokens, candidates, allowed) if hit[1] >= min_score]
+            ranked = self._fuse(bm25_hits, self._vector_search(tokens, candidates, allowed), top_k)
+
+            results = []
+            for chunk_id, score in ranked:
+                chunk = self.chunks[chunk_id]
+                document = self.documents[chunk["doc_id"]]
+                results.append({
+                    "doc_id": chunk["doc_id"],
+                    "file_name": document["file_name"],
+                    "position": chunk["position"],
+                    "text": chunk["text"],
+                    "score": round(score, 4)
+                })
+            return results
+
+    def _vector_search(self, tokens: List[str], limit: int, allowed: Optional[set]) -> List[Tuple[int, float]]:
+        if self._embeddings is None:
+            return []
+        np = self.embedder.np
+        if allowed is None:
+            rows = None
+            scores = self._embeddings @ self.embedder.embed(tokens)
+        else:
+            # Score only the allowed chunks, so other documents cannot crowd them out of the top rows
+            rows = np.fromiter((i for i in allowed if i < len(self._embeddings)), dtype=np.int64)
+            scores = self._embeddings[rows] @ self.embedder.embed(tokens)
+        count = min(len(scores), limit * 2)
+        if not count:
+            return []
+        # Only the best rows need sorting
+        top = np.argpartition(-scores, count - 1)[:count]
+        best = []
+        for row in top[np.argsort(-scores[top])]:
+            chunk_id = int(row if rows is None else rows[row])
+            if self.chunks[chunk_id] is None:
+                continue
+            best.append((chunk_id, float(scores[row])))
+            if len(best) == limit:
+                break
+        return best
+
+    @staticmethod
+    def _fuse(bm25_hits: List[Tuple[int, float]], vector_hits: List[Tuple[int, float]],
+              top_k: int, k: int = 60) -> List[Tuple[int, float]]:
+        """Reciprocal rank fusion; BM25 alone when there are no vector hits"""
+        if not vector_hits:
+            return bm25_hits[:top_k]
+        fused: Dict[int, float] = {}
+        for hits in (bm25_hits, vector_hits):
+            for rank, (chunk_id, _) in enumerate(hits):
+                fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+        # Keep only chunks that share at least one term with the query
+        lexical = {chunk_id for chunk_id, _ in bm25_hits}
+        ranked = [(c, s) for c, s in fused.items() if c in lexical]
+        return heapq.nlargest(top_k, ranked, key=lambda item: item[1])
+
+    def get_context_for_query(self, query: str, top_k: int = 3, max_chars: int = 3000,
+                              min_score: float = 1.0) -> str:
+        """Relevant document excerpts to include in an AI prompt, or an empty string"""
+        with self._lock:
+            self._sync()
+            if not self.documents:
+                return ""
+        results = self.search(query, top_k, min_score=min_score)
+        if not results:
+            return ""
+
+        context = ["Relevant excerpts from processed documents:"]
+        used = 0
+        for result in results:
+            excerpt = result["text"][:max_chars - used]
+            context.append(f"[{result['file_name']} #{result['position'] + 1}] {excerpt}")
+            used += len(excerpt)
+            if used >= max_chars:
+                break
+        return "\n".join(context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        with self._lock:
+            self._sync()
+            return {
+                "document_count": len(self.documents),
+                "chunk_count": len(self.index),
+                "vocabulary_size": len(self.index.postings),
+                "embeddings_enabled": self._embeddings is not None
+            }
@@ -1,199 +1,57 @@
 # File Processing Tools - PDF, DOCX, Excel, etc.
+import hashlib
 import os
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import json
+from typing import Dict, Iterator, List, Optional, Any
+
+from tools.processor_registry import ProcessorRegistry, get_default_registry
 
 class FileProcessor:
-    def __init__(self):
-        self.supported_formats = ['.pdf', '.docx', '.xlsx', '.csv', '.txt', '.json']
+    def __init__(self, registry: Optional[ProcessorRegistry] = None):
+        self.registry = registry or get_default_registry()
+        self._text_analyzer = None
+    
+    @property
+    def supported_formats(self) -> List[str]:
+        return self.registry.supported_extensions()
+    
+    def get_processor(self, file_path: str):
+        """Pick the plugin for a file by sniffing its content"""
+        return self.registry.sniff(Path(file_path))
     
     def process_file(self, file_path: str) -> Dict[str, Any]:
-        """Process file based on its extension"""
+        """Process file with the plugin selected by its magic bytes"""
         path_obj = Path(file_path)
         
         if not path_obj.exists():
             return {"error": f"File not found: {file_path}"}
         
-        extension = path_obj.suffix.lower()
-        
-        try:
-            if extension == '.pdf':
-                return self._process_pdf(path_obj)
-            elif extension == '.docx':
-                return self._process_docx(path_obj)
-            elif extension in ['.xlsx', '.xls']:
-                return self._process_excel(path_obj)
-            elif extension == '.csv':
-                return self._process_csv(path_obj)
-            elif extension == '.txt':
-                return self._process_txt(path_obj)
-            elif extension == '.json':
-                return self._process_json(path_obj)
-            else:
-                return {"error": f"Unsupported file format: {extension}"}
-        
-        except Exception as e:
-            return {"error": f"Error processing file: {str(e)}"}
-    
-    def _process_pdf(self, file_path: Path) -> Dict[str, Any]:
-        """Process PDF file"""
-        try:
-            import PyPDF2
-            
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                text_content = ""
-                for page in pdf_reader.pages:
-                    text_content += page.extract_text() + "\n"
-                
-                return {
-                    "file_type": "PDF",
-                    "file_name": file_path.name,
-                    "page_count": len(pdf_reader.pages),
-                    "text_content": text_content.strip(),
-                    "word_count": len(text_content.split())
-                }
-        
-        except ImportError:
-            return {"error": "PyPDF2 not installed. Run: pip install PyPDF2"}
-        except Exception as e:
-            return {"error": f"PDF processing error: {str(e)}"}
-    
-    def _process_docx(self, file_path: Path) -> Dict[str, Any]:
-        """Process DOCX file"""
-        try:
-            from docx import Document
-            
-            doc = Document(str(file_path))
-            
-            text_content = ""
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
-            
-            return {
-                "file_type": "DOCX",
-                "file_name": file_path.name,
-                "paragraph_count": len(doc.paragraphs),
-                "text_content": text_content.strip(),
-                "word_count": len(text_content.split())
-            }
-        
-        except ImportError:
-            return {"error": "python-docx not installed. Run: pip install python-docx"}
-        except Exception as e:
-            return {"error": f"DOCX processing error: {str(e)}"}
-    
-    def _process_excel(self, file_path: Path) -> Dict[str, Any]:
-        """Process Excel file"""
-        try:
-            import pandas as pd
-            
-            # Read all sheets
-            sheets_data = pd.read_excel(file_path, sheet_name=None)
-            
-            result = {
-                "file_type": "Excel",
-                "file_name": file_path.name,
-                "sheet_count": len(sheets_data),
-                "sheets": {}
-            }
-            
-            for sheet_name, df in sheets_data.items():
-                result["sheets"][sheet_name] = {
-                    "rows": len(df),
-                    "columns": len(df.columns),
-                    "column_names": df.columns.tolist(),
-                    "preview": df.head().to_dict('records')
-                }
-            
-            return result
-        
-        except ImportError:
-            return {"error": "pandas/openpyxl not installed. Run: pip install pandas openpyxl"}
-        except Exception as e:
-            return {"error": f"Excel processing error: {str(e)}"}
-    
-    def _process_csv(self, file_path: Path) -> Dict[str, Any]:
-        """Process CSV file"""
         try:
-            import pandas as pd
+            plugin = self.get_processor(file_path)
+            if plugin is None:
+                return {"error": f"Unsupported file format: {path_obj.suffix.lower() or 'unknown'}"}
             
-            df = pd.read_csv(file_path)
+            if not plugin.is_available():
+                return {"error": f"{plugin.file_type} support not installed. Run: {plugin.install_hint}"}
             
-            return {
-                "file_type": "CSV",
-                "file_name": file_path.name,
-                "rows": len(df),
-                "columns": len(df.columns),
-                "column_names": df.columns.tolist(),
-                "preview": df.head().to_dict('records'),
-                "summary": df.describe().to_dict() if df.select_dtypes(include=['number']).shape[1] > 0 else None
-            }
+            return plugin.process(path_obj)
         
-        except ImportError:
-            return {"error": "pandas not installed. Run: pip install pandas"}
         except Exception as e:
-            return {"error": f"CSV processing error: {str(e)}"}
+            return {"error": f"Error processing file: {str(e)}"}
     
-    def _process_txt(self, file_path: Path) -> Dict[str, Any]:
-        """Process text file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            
-            return {
-                "file_type": "Text",
-                "file_name": file_path.name,
-                "content": content,
-                "line_count": len(content.splitlines()),
-                "word_count": len(content.split()),
-                "char_count": len(content)
-            }
-        
-        except Exception as e:
-            return {"error": f"Text processing error: {str(e)}"}
+    def iter_text(self, file_path: str) -> Iterator[str]:
+        """Stream a file's text piece by piece (pages, paragraphs or blocks)"""
+        plugin = self.get_processor(file_path)
+        if plugin is None:
+            raise ValueError(f"Unsupported file format: {Path(file_path).suffix.lower() or 'unknown'}")
+        return plugin.iter_text(Path(file_path))
     
-    def _process_json(self, file_path: Path) -> Dict[str, Any]:
-        """Process JSON file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            
-            return {
-                "file_type": "JSON",
-                "file_name": file_path.name,
-                "content": data,
-                "structure": self._analyze_json_structure(data)
-            }
+    def summarize_file(self, file_path: str, ai_manager=None, file_data: Optional[Dict[str, Any]] = None) -> str:
+        """Generate AI summary of file content
         
-        except Exception as e:
-            return {"error": f"JSON processing error: {str(e)}"}
-    
-    def _analyze_json_structure(self, data: Any) -> Dict[str, Any]:
-        """Analyze JSON structure"""
-        if isinstance(data, dict):
-            return {
-                "type": "object",
-                "keys": list(data.keys()),
-                "key_count": len(data)
-            }
-        elif isinstance(data, list):
-            return {
-                "type": "array",
-                "length": len(data),
-                "item_types": list(set(type(item).__name__ for item in data[:10]))
-            }
-        else:
-            return {
-                "type": type(data).__name__,
-                "value": str(data)[:100]
-            }
-    
-    def summarize_file(self, file_path: str, ai_manager=None) -> str:
-        """Generate AI summary of file content"""
-        result = self.process_file(file_path)
+        Pass ``file_data`` (a previous ``process_file`` result) to avoid reading the file again.
+        """
+        result = file_data if file_data is not None else self.process_file(file_path)
         
         if "error" in result:
             return f"❌ {result['error']}"
@@ -213,16 +71,30 @@ class FileProcessor:
         ai_response = ai_manager.get_response(prompt)
         return ai_response.get('response', 'Summary generation failed')
     
-    def analyze_file(self, file_path: str, analysis_type: str = "summary") -> Dict[str, Any]:
-        """Analyze file content based on analysis type"""
+    def _get_text_analyzer(self):
+        """Create the text analyzer on first use"""
+        if self._text_analyzer is None:
+            from tools.text_analytics import TextAnalyzer
+            self._text_analyzer = TextAnalyzer.shared()
+        return self._text_analyzer
+    
+    def analyze_file(self, file_path: str, analysis_type: str = "summary",
+                     file_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Analyze file content based on analysis type
+        
+        Pass ``file_data`` (a previous ``process_file`` result) to avoid reading the file again.
+        """
         try:
-            # First process the file to get its content
-            file_data = self.process_file(file_path)
+            from tools.document_store import extract_text
+            
+            # Process the file to get its content, unless the caller already did
+            if file_data is None:
+                file_data = self.process_file(file_path)
             
             if "error" in file_data:
                 return file_data
             
-            content = file_data.get("content", "")
+            content = extract_text(file_data)
             
             # Basic analysis
             analysis = {
@@ -240,25 +112,16 @@ class FileProcessor:
                 lines = content.split('\n')[:10]  # First 10 lines
                 analysis["summary"] = '\n'.join(lines)
             
-            elif analysis_type == "keywords":
-                # Extract keywords (simple approach)
-                words = content.lower().split()
-                word_freq = {}
-                for word in words:
-                    if len(word) > 3:  # Only words longer than 3 chars
-                        word_freq[word] = word_freq.get(word, 0) + 1
+            elif analysis_type in ("keywords", "structure"):
+                # Single pass over the text; keywords are ranked against previously analysed files
+                document_key = hashlib.sha1(content.encode('utf-8')).hexdigest()
+                text_analysis = self._get_text_analyzer().analyze(content, document_key=document_key)
                 
-                # Top 10 most frequent words
-                analysis["keywords"] = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
-            
-            elif analysis_type == "structure":
-                # Analyze structure
-                analysis["structure"] = {
-                    "paragraphs": content.count('\n\n'),
-                    "sentences": content.count('.') + content.count('!') + content.count('?'),
-                    "characters": len(content),
-                    "characters_no_spaces": len(content.replace(' ', ''))
-                }
+                if analysis_type == "keywords":
+                    analysis["keywords"] = text_analysis["keywords"]
+                    analysis["keyphrases"] = text_analysis["keyphrases"]
+                else:
+                    analysis["structure"] = text_analysis["statistics"]
             
             return analysis
             
@@ -267,4 +130,8 @@ class FileProcessor:
 
     def get_supported_formats(self) -> List[str]:
         """Get list of supported file formats"""
-        return self.supported_formats.copy()
+        return self.supported_formats
+    
+    def get_processor_info(self) -> Dict[str, Any]:
+        """Describe registered processors and lazy import timings"""
+        return {"processors": self.registry.describe(), **self.registry.get_import_stats()}
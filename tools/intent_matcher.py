@@ -0,0 +1,126 @@
+# Intent Matcher - Phrase tables compiled into trie-shaped regexes, matched in one pass
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (intent, mode, phrases) - earlier rules win when several match.
+#   prefix:   input starts with the phrase followed by whitespace; the rest is the content
+#   exact:    input is exactly the phrase
+#   contains: phrase appears anywhere in the input
+COMMAND_RULES: List[Tuple[str, str, Sequence[str]]] = [
+    ("remember", "prefix", ["remember"]),
+    ("forget", "prefix", ["forget"]),
+    ("recall", "contains", ["what do you remember", "recall", "show memory"]),
+    ("clear_memory", "contains", ["clear memory", "reset memory", "forget everything"]),
+    ("status", "exact", ["status", "how are you", "what's your status"]),
+    ("help", "exact", ["help", "what can you do", "commands"]),
+]
+
+COMMAND_WORDS = [
+    "remember", "forget", "recall", "what do you remember",
+    "clear memory", "reset", "status", "help"
+]
+
+WAKE_WORDS = ["chandan", "agent", "assistant", "sorma", "sorma-ai"]
+
+MATCH_MODES = ("prefix", "exact", "contains")
+
+
+def trie_pattern(phrases: Iterable[str]) -> str:
+    """Regex source for a set of literal phrases, factored by common prefixes.
+
+    At each position the engine branches on one character instead of trying
+    every phrase in turn, and greedy optional tails prefer the longest phrase.
+    """
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def compile_phrases(phrases: Iterable[str], overlapping: bool = False) -> Optional["re.Pattern"]:
+    """Compile lower-cased phrases into one pattern (match it against lower-cased text).
+
+    With ``overlapping`` the pattern is a capturing lookahead, so ``finditer``
+    reports the longest phrase at every start position.
+    """
+    unique = {p.strip().lower() for p in phrases if p and p.strip()}
+    if not unique:
+        return None
+    source = trie_pattern(unique)
+    return re.compile(f"(?=({source}))" if overlapping else source)
+
+
+class IntentMatcher:
+    """Matches input against a rule table in a single pass.
+
+    The input is lower-cased once. Exact phrases are a dict lookup, prefix
+    phrases one anchored match and contains phrases one scan of a combined
+    pattern; the highest-priority rule among the hits wins.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str, Sequence[str]]]):
+        self.rules = list(rules)
+        self.tables: Dict[str, Dict[str, int]] = {mode: {} for mode in MATCH_MODES}
+        for index, (intent, mode, phrases) in enumerate(self.rules):
+            if mode not in self.tables:
+                raise ValueError(f"Unknown match mode '{mode}' for intent '{intent}'")
+            for phrase in phrases:
+                self.tables[mode].setdefault(phrase.strip().lower(), index)
+
+        prefix = self.tables["prefix"]
+        self.prefix_pattern = re.compile(f"({trie_pattern(prefix)})\\s+") if prefix else None
+        self.contains_pattern = compile_phrases(self.tables["contains"], overlapping=True)
+
+    def match(self, text: str) -> Optional[Dict[str, str]]:
+        """Return {"type", "content"} for the best matching rule, or None"""
+        text = text.strip()
+        lowered = text.lower()
+        best = self.tables["exact"].get(lowered)
+        content = ""
+
+        if self.prefix_pattern:
+            found = self.prefix_pattern.match(lowered)
+            if found:
+                index = self.tables["prefix"][found.group(1)]
+                if best is None or index < best:
+                    best = index
+                    # lower() can change length for a few characters; fall back to the lowered text
+                    rest = text if len(text) == len(lowered) else lowered
+                    content = rest[found.end():].strip()
+
+        if self.contains_pattern:
+            for found in self.contains_pattern.finditer(lowered):
+                index = self.tables["contains"][found.group(1)]
+                if best is None or index < best:
+                    best, content = index, ""
+
+        if best is None:
+            return None
+        return {"type": self.rules[best][0], "content": content}
+
+
+class AuthMatcher:
+    """Auth phrases, owner name parts and wake words as one compiled pattern"""
+
+    def __init__(self, owner_data: Dict, wake_words: Sequence[str] = WAKE_WORDS):
+        auth_phrases = owner_data.get("auth_phrases", [])
+        if not auth_phrases and owner_data.get("auth_phrase"):
+            # Fallback to single auth phrase
+            auth_phrases = [owner_data["auth_phrase"]]
+        self.auth_phrases = list(auth_phrases)
+        name_parts = owner_data.get("name", "").split()
+        self.pattern = compile_phrases(self.auth_phrases + name_parts + list(wake_words)) if owner_data else None
+
+    def is_authorized(self, text: str) -> bool:
+        return self.pattern is not None and self.pattern.search(text.lower()) is not None
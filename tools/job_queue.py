@@ -0,0 +1,206 @@
+# Job Queue - Background file processing with a local worker pool
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Job states, in the order a job moves through them
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True  # exists but belongs to someone else, or the check is unsupported
+    return True
+
+
+def _run_file_job(file_path: str, analysis_type: Optional[str] = None) -> Dict[str, Any]:
+    """Worker entry point - runs in a separate process, so it must be top-level"""
+    from tools.file_processor import FileProcessor
+
+    processor = FileProcessor()
+    if analysis_type:
+        return processor.analyze_file(file_path, analysis_type)
+    return processor.process_file(file_path)
+
+
+class JobQueue:
+    """In-process job broker that hands CPU-bound parsing to a process pool.
+
+    Job records are kept in memory for fast status polling and mirrored to
+    ``<jobs_dir>/<job_id>.json`` so results survive a restart.
+    """
+
+    def __init__(self, jobs_dir: str = "memory/jobs", max_workers: Optional[int] = None,
+                 use_processes: bool = True, on_complete: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._futures: Dict[str, Future] = {}
+        self.on_complete = on_complete
+        self._lock = threading.Lock()
+        self._executor = self._create_executor(use_processes)
+        self._load_jobs()
+
+    def _create_executor(self, use_processes: bool) -> Executor:
+        """Create the worker pool, falling back to threads where processes are unavailable"""
+        if use_processes:
+            try:
+                return ProcessPoolExecutor(max_workers=self.max_workers)
+            except (OSError, NotImplementedError) as e:
+                print(f"⚠️  Process pool unavailable, using threads: {e}")
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _read_job_file(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._job_file(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _load_jobs(self):
+        """Load persisted jobs; unfinished ones whose worker process is gone were lost with it"""
+        for job_file in self.jobs_dir.glob("*.json"):
+            try:
+                with open(job_file, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+
+            if job.get("status") in (QUEUED, RUNNING):
+                if _process_alive(job.get("worker_pid")):
+                    continue  # still running in another worker; get_job reads its file
+                job["status"] = FAILED
+                job["error"] = "Job interrupted by server restart"
+                job["finished_at"] = datetime.now().isoformat()
+                self._save_job(job)
+            self.jobs[job["id"]] = job
+
+    def _save_job(self, job: Dict[str, Any]):
+        """Persist a job record atomically"""
+        job_file = self._job_file(job["id"])
+        tmp_file = job_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(job, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_file, job_file)
+
+    def _update(self, job_id: str, **fields) -> Dict[str, Any]:
+        with self._lock:
+            job = self.jobs[job_id]
+            job.update(fields)
+            snapshot = dict(job)
+        self._save_job(snapshot)
+        return snapshot
+
+    def submit_file(self, file_path: str, analysis_type: Optional[str] = None,
+                    file_name: Optional[str] = None, cleanup: bool = False) -> str:
+        """Queue a file for processing and return its job id immediately"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "type": "analyze" if analysis_type else "process",
+            "file_name": file_name or Path(file_path).name,
+            "file_path": file_path,
+            "analysis_type": analysis_type,
+            "status": QUEUED,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "worker_pid": os.getpid(),
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+        self._save_job(job)
+
+        future = self._executor.submit(_run_file_job, file_path, analysis_type)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._on_done(job_id, f, cleanup))
+        return job_id
+
+    def _on_done(self, job_id: str, future: Future, cleanup: bool):
+        """Record the outcome of a finished job"""
+        finished_at = datetime.now().isoformat()
+        with self._lock:
+            self._futures.pop(job_id, None)
+        try:
+            result = future.result()
+            if isinstance(result, dict) and "error" in result:
+                self._update(job_id, status=FAILED, error=result["error"],
+                             finished_at=finished_at)
+            else:
+                job = self._update(job_id, status=COMPLETED, result=result,
+                                   finished_at=finished_at)
+                if self.on_complete:
+                    self.on_complete(job)
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=str(e), finished_at=finished_at)
+
+        if cleanup:
+            try:
+                os.remove(self.jobs[job_id]["file_path"])
+            except OSError:
+                pass
+
+    def _refresh_running(self, job_id: str):
+        """Promote a queued job to running once a worker has picked it up"""
+        with self._lock:
+            future = self._futures.get(job_id)
+            job = self.jobs.get(job_id)
+            if not future or not job or job["status"] != QUEUED or not future.running():
+                return
+        self._update(job_id, status=RUNNING, started_at=datetime.now().isoformat())
+
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        """Get job status and (optionally) result"""
+        self._refresh_running(job_id)
+        with self._lock:
+            job = self.jobs.get(job_id)
+            job = dict(job) if job is not None else None
+        if job is None:
+            # Submitted through another worker process - read its mirrored record
+            job = self._read_job_file(job_id)
+            if job is None:
+                return None
+        if not include_result:
+            job.pop("result", None)
+        return job
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """List the most recent jobs without their results"""
+        for job_id in list(self._futures):
+            self._refresh_running(job_id)
+        with self._lock:
+            jobs = sorted(self.jobs.values(), key=lambda j: j["created_at"], reverse=True)[:limit]
+            return [{k: v for k, v in job.items() if k != "result"} for job in jobs]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Count jobs per status"""
+        stats = {QUEUED: 0, RUNNING: 0, COMPLETED: 0, FAILED: 0}
+        with self._lock:
+            for job in self.jobs.values():
+                stats[job["status"]] = stats.get(job["status"], 0) + 1
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and wait for running jobs"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,261 @@
+# Knowledge Index - Local BM25 search over saved pages, processed documents and memory
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from tools.document_store import BM25Index, chunk_words, tokenize
+from tools.processor_registry import html_to_text
+
+PAGE_EXTENSIONS = {".json", ".txt", ".md", ".html", ".htm"}
+SOURCES = ("page", "document", "memory")
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 20
+
+# (passage, its tokens) - tokenised before the index lock is taken
+Passages = List[Tuple[Dict[str, Any], List[str]]]
+
+
+def _with_tokens(passages: Iterable[Dict[str, Any]]) -> Passages:
+    return [(passage, tokenize(f"{passage['title']} {passage['text']}")) for passage in passages]
+
+
+def make_snippet(text: str, terms: Set[str], width: int = 30) -> str:
+    """The ``width``-word window of text covering the most query terms, with matches in **bold**"""
+    words = text.split()
+    if not words:
+        return ""
+    matched = [set(tokenize(word)) & terms for word in words]
+
+    best_start, best_score = 0, (-1, -1)
+    for start in range(0, max(1, len(words) - width + 1)):
+        window = matched[start:start + width]
+        found = set().union(*window)
+        score = (len(found), sum(1 for m in window if m))
+        if score > best_score:
+            best_start, best_score = start, score
+        if start + width >= len(words):
+            break
+
+    end = min(len(words), best_start + width)
+    parts = [f"**{word}**" if matched[i] else word for i, word in enumerate(words[best_start:end], best_start)]
+    return ("… " if best_start > 0 else "") + " ".join(parts) + (" …" if end < len(words) else "")
+
+
+class KnowledgeIndex:
+    """One inverted index over every local source, ranked with BM25.
+
+    Sources are saved pages (files in ``pages_dir``), chunks of processed
+    documents and the memory files. Each source carries a fingerprint (file
+    size/mtime, document index time); ``refresh()`` re-indexes only the
+    sources whose fingerprint changed and drops the ones that disappeared.
+    Sources are read and tokenised before the index lock is taken, so
+    searches only wait for the swap. A search more than ``refresh_interval``
+    seconds after the last refresh starts one in the background (the very
+    first search waits for it).
+    """
+
+    def __init__(self, pages_dir: str = "memory/pages", memory_manager=None, document_store=None,
+                 refresh_interval: float = 2.0):
+        self.pages_dir = Path(pages_dir)
+        self.pages_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_manager = memory_manager
+        self.document_store = document_store
+        self.refresh_interval = refresh_interval
+
+        self.index = BM25Index()
+        self.passages: Dict[int, Dict[str, Any]] = {}
+        # source key -> (fingerprint, passage ids)
+        self.sources: Dict[str, Tuple[Any, List[int]]] = {}
+        self.by_source: Dict[str, Set[int]] = {source: set() for source in SOURCES}
+        self._next_id = 0
+        self._last_refresh = 0.0
+        self._refresher: Optional[threading.Thread] = None
+        # Guards the index for readers; _update_lock serialises writers (sources only change under it)
+        self._lock = threading.RLock()
+        self._update_lock = threading.Lock()
+
+    # Ingestion
+
+    def save_page(self, title: str, content: str, url: Optional[str] = None, is_html: bool = False) -> Dict[str, Any]:
+        """Save a page into the corpus and index it"""
+        text = html_to_text(content)[1] if is_html else content.strip()
+        if not text:
+            return {"error": "Page has no text"}
+        page_id = hashlib.sha1((url or title).encode("utf-8")).hexdigest()[:16]
+        page_file = self.pages_dir / f"{page_id}.json"
+        tmp_file = page_file.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"title": title, "url": url, "text": text, "saved_at": datetime.now().isoformat()},
+                      f, ensure_ascii=False)
+        os.replace(tmp_file, page_file)
+        key = f"page:{page_file.name}"
+        with self._update_lock:
+            fingerprint, passages = self._file_fingerprint(page_file), self._page_passages(page_file)
+            with self._lock:
+                self._replace_source(key, fingerprint, passages)
+        return {"page_id": page_id, "passages": len(passages)}
+
+    def _replace_source(self, key: str, fingerprint: Any, passages: Passages):
+        self._drop_source(key)
+        ids = []
+        for passage, tokens in passages:
+            passage_id = self._next_id
+            self._next_id += 1
+            self.passages[passage_id] = passage
+            self.by_source[passage["source"]].add(passage_id)
+            self.index.add(passage_id, tokens)
+            ids.append(passage_id)
+        self.sources[key] = (fingerprint, ids)
+
+    def _drop_source(self, key: str):
+        _, ids = self.sources.pop(key, (None, []))
+        for passage_id in ids:
+            self.index.remove(passage_id)
+            self.by_source[self.passages.pop(passage_id)["source"]].discard(passage_id)
+
+    @staticmethod
+    def _file_fingerprint(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_page(self, path: Path) -> Tuple[str, Optional[str], str]:
+        """(title, url, text) of a page file"""
+        raw = path.read_text(encoding="utf-8", errors="replace")
+        if path.suffix == ".json":
+            data = json.loads(raw)
+            return data.get("title") or path.stem, data.get("url"), data.get("text", "")
+        if path.suffix in (".html", ".htm"):
+            title, text = html_to_text(raw)
+            return title or path.stem, None, text
+        return path.stem, None, raw
+
+    def _page_passages(self, path: Path) -> Passages:
+        try:
+            title, url, text = self._read_page(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not index page {path.name}: {e}")
+            text, title, url = "", path.stem, None
+        return _with_tokens(
+            {"source": "page", "title": title, "url": url, "path": str(path), "position": i, "text": chunk}
+            for i, chunk in enumerate(chunk_words(text, PASSAGE_WORDS, PASSAGE_OVERLAP))
+        )
+
+    # The _collect_* methods run under _update_lock only and append (key, fingerprint, passages) changes
+
+    def _collect_pages(self, seen: Set[str], changes: List[Tuple[str, Any, Passages]]):
+        for entry in os.scandir(self.pages_dir):
+            path = Path(entry.path)
+            if not entry.is_file() or path.suffix.lower() not in PAGE_EXTENSIONS:
+                continue
+            key = f"page:{path.name}"
+            seen.add(key)
+            fingerprint = self._file_fingerprint(path)
+            known = self.sources.get(key)
+            if known is None or known[0] != fingerprint:
+                changes.append((key, fingerprint, self._page_passages(path)))
+
+    def _collect_documents(self, seen: Set[str], changes: List[Tuple[str, Any, Passages]]):
+        for document in self.document_store.list_documents():
+            key = f"document:{document['doc_id']}"
+            seen.add(key)
+            known = self.sources.get(key)
+            if known is not None and known[0] == document["indexed_at"]:
+                continue
+            changes.append((key, document["indexed_at"], _with_tokens(
+                {"source": "document", "title": document["file_name"], "url": None,
+                 "path": document["file_path"], "position": chunk["position"], "text": chunk["text"]}
+                for chunk in self.document_store.get_document_chunks(document["doc_id"])
+            )))
+
+    def _collect_memory(self, seen: Set[str], changes: List[Tuple[str, Any, Passages]]):
+        memory = self.memory_manager
+        for key, path in (("memory:facts", memory.long_term_file), ("memory:conversations", memory.short_term_file)):
+            seen.add(key)
+            fingerprint = self._file_fingerprint(path)
+            known = self.sources.get(key)
+            if known is not None and known[0] == fingerprint:
+                continue
+            if key == "memory:facts":
+                passages = [{"source": "memory", "title": f"Memory ({fact.get('category', 'general')})",
+                             "url": None, "path": str(path), "position": i, "text": fact.get("fact", "")}
+                            for i, fact in enumerate(memory.get_all_facts())]
+            else:
+                passages = [{"source": "memory", "title": f"Conversation {conv.get('timestamp', '')[:16]}",
+                             "url": None, "path": str(path), "position": i,
+                             "text": f"User: {conv.get('user', '')} Assistant: {conv.get('agent', '')}"}
+                            for i, conv in enumerate(memory.get_recent_conversations(50))]
+            changes.append((key, fingerprint, _with_tokens(passages)))
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-index changed sources; returns the index stats"""
+        with self._update_lock:
+            seen: Set[str] = set()
+            changes: List[Tuple[str, Any, Passages]] = []
+            self._collect_pages(seen, changes)
+            if self.document_store:
+                self._collect_documents(seen, changes)
+            if self.memory_manager:
+                self._collect_memory(seen, changes)
+            with self._lock:
+                for key, fingerprint, passages in changes:
+                    self._replace_source(key, fingerprint, passages)
+                for key in [key for key in self.sources if key not in seen]:
+                    self._drop_source(key)
+                self._last_refresh = time.monotonic()
+        return self.get_stats()
+
+    def _refresh_if_stale(self):
+        if time.monotonic() - self._last_refresh < self.refresh_interval:
+            return
+        if not self._last_refresh:
+            self.refresh()
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self.refresh, name="knowledge-refresh", daemon=True)
+            self._refresher.start()
+
+    # Retrieval
+
+    def search(self, query: str, limit: int = 5, sources: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Best passages for the query, each with a snippet around the matching terms"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        self._refresh_if_stale()
+        with self._lock:
+            allowed = None
+            if sources:
+                allowed = set().union(*(self.by_source.get(source, set()) for source in sources))
+            hits = self.index.search(terms, limit, allowed)
+
+            term_set = set(terms)
+            results = []
+            for passage_id, score in hits:
+                passage = self.passages[passage_id]
+                results.append({
+                    "title": passage["title"],
+                    "source": passage["source"],
+                    "url": passage["url"],
+                    "path": passage["path"],
+                    "position": passage["position"],
+                    "snippet": make_snippet(passage["text"], term_set),
+                    "text": passage["text"],
+                    "score": round(score, 4)
+                })
+            return results
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {source: len(ids) for source, ids in self.by_source.items()}
+            return {"passages": len(self.passages), "sources": len(self.sources),
+                    "vocabulary_size": len(self.index.postings), **counts}
@@ -0,0 +1,241 @@
+# Memory Archive - Compact columnar msgpack export/import of conversations and facts
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+ARCHIVE_FORMAT = "sorma-memory"
+ARCHIVE_VERSION = 1
+KINDS = ("conversations", "facts")
+BLOCK_ROWS = 1024
+TIME_COLUMNS = {"timestamp"}
+
+# Column encodings
+PLAIN = 0  # [PLAIN, values]
+DICTIONARY = 1  # [DICTIONARY, distinct values, codes]
+TIME = 2  # [TIME, first, deltas] - microseconds since 1970-01-01 of the (naive, local) ISO timestamp
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def load_msgpack():
+    try:
+        import msgpack
+        return msgpack
+    except ImportError:
+        raise RuntimeError("Memory archives need msgpack (pip install msgpack)")
+
+
+def to_micros(value: str) -> int:
+    return (datetime.fromisoformat(value) - EPOCH) // MICROSECOND
+
+
+def from_micros(value: int) -> str:
+    return (EPOCH + value * MICROSECOND).isoformat()
+
+
+def _encode_time(values: Sequence[Any]) -> Optional[List]:
+    try:
+        micros = [to_micros(value) for value in values]
+    except (TypeError, ValueError):
+        return None
+    # Only canonical stamps survive the round trip; anything else ("...00.000000",
+    # a space separator) is kept verbatim by the string encodings instead
+    if any(from_micros(m) != value for m, value in zip(micros, values)):
+        return None
+    # Consecutive timestamps are close, so deltas pack into few bytes
+    return [TIME, micros[0], [b - a for a, b in zip(micros, micros[1:])]]
+
+
+def encode_column(name: str, values: Sequence[Any]) -> List:
+    if name in TIME_COLUMNS:
+        encoded = _encode_time(values)
+        if encoded is not None:
+            return encoded
+    if all(value is None or isinstance(value, str) for value in values):
+        distinct = list(dict.fromkeys(values))
+        # Low-cardinality strings (categories, session ids) become small integer codes
+        if len(distinct) <= len(values) // 2:
+            codes = {value: i for i, value in enumerate(distinct)}
+            return [DICTIONARY, distinct, [codes[value] for value in values]]
+    return [PLAIN, list(values)]
+
+
+def decode_column(column: Sequence[Any]) -> List[Any]:
+    encoding = column[0]
+    if encoding == PLAIN:
+        return list(column[1])
+    if encoding == DICTIONARY:
+        distinct = column[1]
+        return [distinct[code] for code in column[2]]
+    if encoding == TIME:
+        micros = [column[1]]
+        for delta in column[2]:
+            micros.append(micros[-1] + delta)
+        return [from_micros(value) for value in micros]
+    raise ValueError(f"Unknown column encoding {encoding}")
+
+
+def encode_block(kind: str, records: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    names = list(dict.fromkeys(name for record in records for name in record))
+    # Keys a record lacks are listed per column so they are not restored as None
+    columns = {}
+    for name in names:
+        missing = [i for i, record in enumerate(records) if name not in record]
+        columns[name] = encode_column(name, [record.get(name) for record in records]) + [missing]
+    return {"kind": kind, "rows": len(records), "columns": columns}
+
+
+def decode_columns(block: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """Column name -> values of one block"""
+    return {name: decode_column(column[:-1]) for name, column in block["columns"].items()}
+
+
+def decode_block(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    columns = decode_columns(block)
+    records: List[Dict[str, Any]] = [{} for _ in range(block["rows"])]
+    for name, values in columns.items():
+        missing = set(block["columns"][name][-1])
+        for i, value in enumerate(values):
+            if i not in missing:
+                records[i][name] = value
+    return records
+
+
+def write_archive(stream: BinaryIO, sources: Iterable[Tuple[str, Iterable[Dict[str, Any]]]],
+                  block_rows: int = BLOCK_ROWS) -> Dict[str, int]:
+    """Write (kind, records) sources to a binary stream; returns rows per kind"""
+    msgpack = load_msgpack()
+    packer = msgpack.Packer(use_bin_type=True)
+    stream.write(packer.pack({"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, "created": time.time()}))
+    counts = {}
+    for kind, records in sources:
+        counts[kind] = 0
+        block: List[Dict[str, Any]] = []
+        for record in records:
+            block.append(record)
+            if len(block) >= block_rows:
+                stream.write(packer.pack(encode_block(kind, block)))
+                counts[kind] += len(block)
+                block = []
+        if block:
+            stream.write(packer.pack(encode_block(kind, block)))
+            counts[kind] += len(block)
+    return counts
+
+
+def iter_blocks(path: str, kinds: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Encoded blocks of an archive, read one at a time.
+
+    Use ``decode_columns`` on them for column-wise analytics without building
+    row dicts, or ``decode_block`` for records.
+    """
+    msgpack = load_msgpack()
+    with open(path, 'rb') as f:
+        unpacker = msgpack.Unpacker(f, raw=False, strict_map_key=False)
+        header = next(unpacker, None)
+        if not isinstance(header, dict) or header.get("format") != ARCHIVE_FORMAT:
+            raise ValueError("Not a memory archive")
+        if header.get("version", 0) > ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported memory archive version {header['version']}")
+        for block in unpacker:
+            if kinds is None or block["kind"] in kinds:
+                yield block
+
+
+def iter_records(path: str, kind: str) -> Iterator[Dict[str, Any]]:
+    """Stream the records of one kind from an archive"""
+    for block in iter_blocks(path, (kind,)):
+        yield from decode_block(block)
+
+
+def export_memory(memory_manager, path: str, kinds: Sequence[str] = KINDS) -> Dict[str, Any]:
+    """Export memory to an archive file (written atomically)"""
+    readers = {"conversations": memory_manager.get_all_conversations, "facts": memory_manager.get_all_facts}
+    unknown = [kind for kind in kinds if kind not in readers]
+    if unknown:
+        return {"error": f"Unknown memory kinds: {', '.join(unknown)}"}
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        counts = write_archive(f, ((kind, readers[kind]()) for kind in kinds))
+    os.replace(tmp_file, path)
+    return {"file": str(path), "bytes": path.stat().st_size, **counts}
+
+
+def _stamp_key(value: Any) -> Any:
+    """A timestamp compared by the moment it names, not by how it is written"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _record_key(kind: str, record: Dict[str, Any]) -> Tuple:
+    stamp = _stamp_key(record.get("timestamp"))
+    if kind == "facts":
+        return stamp, record.get("fact")
+    return stamp, record.get("user"), record.get("agent")
+
+
+def import_memory(memory_manager, path: str, replace: bool = False) -> Dict[str, Any]:
+    """Load an archive into memory.
+
+    By default records are merged (already present ones are skipped) and
+    kept in timestamp order; ``replace`` swaps out the kinds in the archive.
+    Each kind is merged under the memory lock, so conversations saved during
+    the import are kept, and conversations are trimmed to the short-term limit.
+    """
+    imported = {kind: [] for kind in KINDS}
+    for block in iter_blocks(path, KINDS):
+        imported[block["kind"]].extend(decode_block(block))
+
+    limit = memory_manager.short_term_limit
+    result = {}
+    for kind, records in imported.items():
+        if not records:
+            continue
+
+        def merge(current: List[Dict[str, Any]], kind=kind, records=records) -> List[Dict[str, Any]]:
+            if replace:
+                fresh = records
+                merged = list(records)
+            else:
+                seen = {_record_key(kind, record) for record in current}
+                fresh = [record for record in records if _record_key(kind, record) not in seen]
+                merged = sorted(current + fresh, key=lambda record: record.get("timestamp") or "")
+            if kind == "conversations" and limit and len(merged) > limit:
+                merged = merged[-limit:]
+            kept = {id(record) for record in merged}
+            result[kind] = sum(1 for record in fresh if id(record) in kept)
+            return merged
+
+        memory_manager.rewrite("short" if kind == "conversations" else "long", merge)
+    return {"imported": result, "replace": replace}
+
+
+def summarize_archive(path: str) -> Dict[str, Any]:
+    """Row counts, time span and top categories, read column-wise"""
+    summary: Dict[str, Any] = {kind: {"rows": 0, "first": None, "last": None} for kind in KINDS}
+    categories: Counter = Counter()
+    for block in iter_blocks(path):
+        kind = summary.setdefault(block["kind"], {"rows": 0, "first": None, "last": None})
+        kind["rows"] += block["rows"]
+        columns = decode_columns(block)
+        timed = block["columns"].get("timestamp", [PLAIN])[0] == TIME
+        stamps = columns.get("timestamp", [])
+        if not timed:
+            # Stamps kept verbatim: order by the moment they name, skipping ones that don't parse
+            stamps = [stamp for stamp in stamps if isinstance(_stamp_key(stamp), datetime)]
+        if stamps:
+            kind["first"] = min(filter(None, [kind["first"], *stamps]), key=_stamp_key)
+            kind["last"] = max(filter(None, [kind["last"], *stamps]), key=_stamp_key)
+        if block["kind"] == "facts":
+            categories.update(value for value in columns.get("category", []) if value)
+    summary["facts"]["categories"] = dict(categories.most_common(10))
+    return summary
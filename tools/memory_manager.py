@@ -2,13 +2,21 @@
 import json
 import os
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from pathlib import Path
 
+from tools.metrics import MEMORY_SECONDS
+from tools.process_lock import FileLock
+
 class MemoryManager:
-    def __init__(self, memory_dir: str = "memory"):
+    def __init__(self, memory_dir: str = "memory", short_term_limit: Optional[int] = 50):
         self.memory_dir = Path(memory_dir)
         self.memory_dir.mkdir(exist_ok=True)
+        # Hard cap on stored conversations (None: unbounded); the retention manager
+        # raises it above its policy cap and archives down to that cap itself
+        self.short_term_limit = short_term_limit
+        # Serialises read-modify-write cycles on the memory files across threads and worker processes
+        self._lock = FileLock(str(self.memory_dir / ".memory.lock"))
         
         self.short_term_file = self.memory_dir / "short_term.json"
         self.long_term_file = self.memory_dir / "long_term.json"
@@ -34,14 +42,15 @@ class MemoryManager:
             return [] if file_path.name != "owner.json" else {}
     
     def _save_json(self, file_path: Path, data: Any):
-        """Save JSON data to file"""
-        with open(file_path, 'w', encoding='utf-8') as f:
+        """Save JSON data to file (atomically, so readers never see a partial file)"""
+        tmp_file = file_path.with_suffix(".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, file_path)
     
+    @MEMORY_SECONDS.timed(operation="add_conversation")
     def add_conversation(self, user_msg: str, agent_response: str):
         """Add conversation to short-term memory"""
-        conversations = self._load_json(self.short_term_file)
-        
         conversation = {
             "timestamp": datetime.now().isoformat(),
             "user": user_msg,
@@ -49,18 +58,19 @@ class MemoryManager:
             "session_id": self._get_session_id()
         }
         
-        conversations.append(conversation)
-        
-        # Keep only last 50 conversations
-        if len(conversations) > 50:
-            conversations = conversations[-50:]
-        
-        self._save_json(self.short_term_file, conversations)
+        with self._lock:
+            conversations = self._load_json(self.short_term_file)
+            conversations.append(conversation)
+            
+            # Keep only the most recent conversations
+            if self.short_term_limit and len(conversations) > self.short_term_limit:
+                conversations = conversations[-self.short_term_limit:]
+            
+            self._save_json(self.short_term_file, conversations)
     
+    @MEMORY_SECONDS.timed(operation="remember_fact")
     def remember_fact(self, fact: str, category: Optional[str] = "general") -> str:
         """Add fact to long-term memory"""
-        facts = self._load_json(self.long_term_file)
-        
         # Handle None category
         if category is None:
             category = "general"
@@ -72,19 +82,23 @@ class MemoryManager:
             "importance": "high"
         }
         
-        facts.append(fact_entry)
-        self._save_json(self.long_term_file, facts)
+        with self._lock:
+            facts = self._load_json(self.long_term_file)
+            facts.append(fact_entry)
+            self._save_json(self.long_term_file, facts)
         
         return f"✅ Remembered: {fact}"
     
+    @MEMORY_SECONDS.timed(operation="forget_fact")
     def forget_fact(self, keyword: str):
         """Remove facts containing keyword"""
-        facts = self._load_json(self.long_term_file)
-        original_count = len(facts)
-        
-        facts = [f for f in facts if keyword.lower() not in f.get("fact", "").lower()]
-        
-        self._save_json(self.long_term_file, facts)
+        with self._lock:
+            facts = self._load_json(self.long_term_file)
+            original_count = len(facts)
+            
+            facts = [f for f in facts if keyword.lower() not in f.get("fact", "").lower()]
+            
+            self._save_json(self.long_term_file, facts)
         removed_count = original_count - len(facts)
         
         if removed_count > 0:
@@ -96,11 +110,31 @@ class MemoryManager:
         """Get all long-term facts"""
         return self._load_json(self.long_term_file)
     
+    def get_all_conversations(self) -> List[Dict]:
+        """Get all stored conversations"""
+        return self._load_json(self.short_term_file)
+    
+    @MEMORY_SECONDS.timed(operation="rewrite")
+    def rewrite(self, memory_type: str, transform: Callable[[List[Dict]], Optional[List[Dict]]]) -> bool:
+        """Apply transform to "short" or "long" memory under the lock.
+        
+        The file is written only when transform returns a new list (None
+        means nothing changed); returns whether it was written.
+        """
+        file_path = self.short_term_file if memory_type == "short" else self.long_term_file
+        with self._lock:
+            updated = transform(self._load_json(file_path))
+            if updated is None:
+                return False
+            self._save_json(file_path, updated)
+            return True
+    
     def get_recent_conversations(self, limit: int = 10) -> List[Dict]:
         """Get recent conversations"""
         conversations = self._load_json(self.short_term_file)
         return conversations[-limit:]
     
+    @MEMORY_SECONDS.timed(operation="search_memory")
     def search_memory(self, query: str) -> List[Dict]:
         """Search both short-term and long-term memory"""
         results = []
@@ -120,16 +154,19 @@ class MemoryManager:
         
         return results
     
+    @MEMORY_SECONDS.timed(operation="clear_memory")
     def clear_memory(self, memory_type: str = "all"):
         """Clear memory (short, long, or all)"""
-        if memory_type in ["short", "all"]:
-            self._save_json(self.short_term_file, [])
-        
-        if memory_type in ["long", "all"]:
-            self._save_json(self.long_term_file, [])
+        with self._lock:
+            if memory_type in ["short", "all"]:
+                self._save_json(self.short_term_file, [])
+            
+            if memory_type in ["long", "all"]:
+                self._save_json(self.long_term_file, [])
         
         return f"✅ Cleared {memory_type} memory"
     
+    @MEMORY_SECONDS.timed(operation="get_memory_stats")
     def get_memory_stats(self) -> Dict:
         """Get memory statistics"""
         short_term = self._load_json(self.short_term_file)
@@ -145,6 +182,7 @@ class MemoryManager:
         """Generate session ID based on current date"""
         return datetime.now().strftime("%Y%m%d_%H")
     
+    @MEMORY_SECONDS.timed(operation="get_context_for_prompt")
     def get_context_for_prompt(self, limit: int = 5) -> str:
         """Get relevant context to include in AI prompt"""
         context = []
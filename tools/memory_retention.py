@@ -0,0 +1,248 @@
+# Memory Retention - TTL, importance and size-cap policies applied by background compaction
+import copy
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.memory_archive import load_msgpack, write_archive
+from tools.metrics import REGISTRY
+from tools.process_lock import FileLock
+
+# ttl_days None means "never expires"; a fact's TTL is its category TTL times its importance weight
+DEFAULT_POLICY: Dict[str, Any] = {
+    "conversations": {
+        "ttl_days": 90,
+        "max_items": 50,  # hot short-term history; older turns go to cold storage
+    },
+    "facts": {
+        "ttl_days": {"default": 365, "general": 365, "user_request": None, "personal": None},
+        "importance_weights": {"high": 3.0, "medium": 1.5, "low": 1.0},
+        "max_items": 1000,
+        # Over the cap, facts with the lowest weight / (1 + age / half_life) go first
+        "half_life_days": 90,
+    },
+}
+
+# Between compaction runs short-term memory may grow to this multiple of its cap
+CEILING_FACTOR = 2
+
+EVICTIONS = REGISTRY.counter("memory_evictions_total", "Memory items moved to cold storage", ("kind", "reason"))
+
+
+def merge_policy(base: Dict[str, Any], overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Policy with overrides applied key by key (nested dicts are merged)"""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_policy(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def age_days(item: Dict[str, Any], now: datetime) -> float:
+    """Age of a memory item; items without a readable timestamp count as new"""
+    try:
+        return (now - datetime.fromisoformat(item["timestamp"])).total_seconds() / 86400
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class RetentionManager:
+    """Keeps the hot memory files small by evicting old and low-value items.
+
+    ``compact()`` applies the policy to conversations and facts: items past
+    their TTL are evicted, then the oldest conversations / lowest-value facts
+    beyond ``max_items``. Evicted items are written to a msgpack archive
+    segment in ``cold_dir`` (see tools/memory_archive.py) before the hot file
+    is rewritten, and a file is only rewritten when something was evicted.
+    ``start()`` runs compaction every ``interval`` seconds in the background.
+    """
+
+    def __init__(self, memory_manager, policy: Optional[Dict[str, Any]] = None,
+                 cold_dir: str = "memory/cold", interval: float = 600.0):
+        load_msgpack()  # cold storage needs it; fail here rather than on the first eviction
+        self.memory = memory_manager
+        self.policy = merge_policy(DEFAULT_POLICY, policy)
+        self.cold_dir = Path(cold_dir)
+        self.cold_dir.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.last_run: Optional[Dict[str, Any]] = None
+        # Per store: file fingerprint after the last run and when its next item expires
+        self._fingerprints: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._next_expiry: Dict[str, Optional[datetime]] = {}
+        self._run_lock = threading.Lock()
+        # With several worker processes only the holder of this lock compacts in the background
+        self._leader_lock = FileLock(str(self.cold_dir / ".compaction.lock"))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Compaction archives down to the policy cap; between runs writes are only
+        # trimmed (without archiving) at a hard ceiling of twice that cap
+        cap = self.policy["conversations"].get("max_items")
+        self.memory.short_term_limit = None if cap is None else CEILING_FACTOR * cap
+
+    # Policies
+
+    def _ttl_days(self, kind: str, item: Dict[str, Any]) -> Optional[float]:
+        """Days an item lives before it expires (None: never)"""
+        if kind == "conversations":
+            return self.policy["conversations"].get("ttl_days")
+        ttls = self.policy["facts"]["ttl_days"]
+        ttl = ttls.get(item.get("category"), ttls.get("default"))
+        return None if ttl is None else ttl * self._fact_weight(item)
+
+    def _expired(self, kind: str, items: List[Dict], now: datetime) -> Dict[int, str]:
+        expired = {}
+        for i, item in enumerate(items):
+            ttl = self._ttl_days(kind, item)
+            if ttl is not None and age_days(item, now) > ttl:
+                expired[i] = "ttl"
+        return expired
+
+    def _next_expiry_of(self, kind: str, items: List[Dict], now: datetime) -> Optional[datetime]:
+        """When the first of these items expires"""
+        expiries = []
+        for item in items:
+            ttl = self._ttl_days(kind, item)
+            if ttl is not None:
+                expiries.append(now + timedelta(days=ttl - age_days(item, now)))
+        return min(expiries) if expiries else None
+
+    def _conversation_evictions(self, conversations: List[Dict], now: datetime) -> Dict[int, str]:
+        policy = self.policy["conversations"]
+        evicted = self._expired("conversations", conversations, now)
+        kept = [i for i in range(len(conversations)) if i not in evicted]
+        cap = policy.get("max_items")
+        if cap is not None and len(kept) > cap:
+            # The list is in arrival order, so the overflow is at the front
+            evicted.update({i: "size" for i in kept[:len(kept) - cap]})
+        return evicted
+
+    def _fact_weight(self, fact: Dict[str, Any]) -> float:
+        weights = self.policy["facts"]["importance_weights"]
+        return weights.get(fact.get("importance"), min(weights.values()) if weights else 1.0)
+
+    def _fact_evictions(self, facts: List[Dict], now: datetime) -> Dict[int, str]:
+        policy = self.policy["facts"]
+        evicted = self._expired("facts", facts, now)
+        kept = [i for i in range(len(facts)) if i not in evicted]
+        cap = policy.get("max_items")
+        if cap is not None and len(kept) > cap:
+            half_life = policy.get("half_life_days") or 1
+
+            def value(i: int) -> float:
+                return self._fact_weight(facts[i]) / (1 + age_days(facts[i], now) / half_life)
+
+            evicted.update({i: "size" for i in sorted(kept, key=value)[:len(kept) - cap]})
+        return evicted
+
+    # Compaction
+
+    def _archive(self, kind: str, items: List[Dict], stamp: str) -> Path:
+        path = self.cold_dir / f"{kind}-{stamp}-{os.getpid()}.smem"
+        tmp_file = path.with_name(path.name + ".tmp")
+        with open(tmp_file, 'wb') as f:
+            write_archive(f, [(kind, items)])
+        tmp_file.replace(path)
+        return path
+
+    def _compact_store(self, kind: str, memory_type: str, now: datetime, stamp: str) -> Dict[str, Any]:
+        select = self._conversation_evictions if kind == "conversations" else self._fact_evictions
+        result: Dict[str, Any] = {"evicted": 0, "kept": None}
+
+        def transform(items: List[Dict]) -> Optional[List[Dict]]:
+            result["kept"] = len(items)
+            evicted = select(items, now)
+            self._next_expiry[kind] = self._next_expiry_of(
+                kind, [item for i, item in enumerate(items) if i not in evicted], now)
+            if not evicted:
+                return None
+            # Archive first: if that fails the hot file is left untouched
+            result["archive"] = str(self._archive(kind, [items[i] for i in sorted(evicted)], stamp))
+            for reason in evicted.values():
+                EVICTIONS.inc(kind=kind, reason=reason)
+            result["evicted"] = len(evicted)
+            result["kept"] = len(items) - len(evicted)
+            return [item for i, item in enumerate(items) if i not in evicted]
+
+        self.memory.rewrite(memory_type, transform)
+        return result
+
+    def _fingerprint(self, path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def compact(self, force: bool = False) -> Dict[str, Any]:
+        """Apply the policy once; returns what was evicted per store.
+
+        A store is skipped (unless ``force``) when its file has not changed
+        since the last run and none of its items has expired since.
+        """
+        with self._run_lock:
+            now = datetime.now()
+            stamp = now.strftime("%Y%m%d_%H%M%S_%f")
+            start = time.perf_counter()
+            report: Dict[str, Any] = {"time": now.isoformat()}
+            stores = (("conversations", "short", self.memory.short_term_file),
+                      ("facts", "long", self.memory.long_term_file))
+            for kind, memory_type, path in stores:
+                next_expiry = self._next_expiry.get(kind)
+                if (not force and kind in self._fingerprints and self._fingerprint(path) == self._fingerprints[kind]
+                        and (next_expiry is None or now < next_expiry)):
+                    report[kind] = {"skipped": True}
+                    continue
+                try:
+                    report[kind] = self._compact_store(kind, memory_type, now, stamp)
+                    self._fingerprints[kind] = self._fingerprint(path)
+                except Exception as e:
+                    # No fingerprint, so the next run retries this store
+                    report[kind] = {"error": str(e)}
+            report["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            self.last_run = report
+            return report
+
+    # Background task
+
+    def _run(self):
+        leader = False
+        try:
+            while True:
+                # Another worker may hold the lock; take over if it exits
+                leader = leader or self._leader_lock.try_acquire()
+                if leader:
+                    report = self.compact()
+                    for kind in ("conversations", "facts"):
+                        if report[kind].get("error"):
+                            print(f"⚠️  Memory compaction error ({kind}): {report[kind]['error']}")
+                if self._stop.wait(self.interval):
+                    return
+        finally:
+            if leader:
+                self._leader_lock.release()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_info(self) -> Dict[str, Any]:
+        segments = sorted(self.cold_dir.glob("*.smem"))
+        return {
+            "policy": self.policy,
+            "interval_seconds": self.interval,
+            "last_run": self.last_run,
+            "cold_segments": len(segments),
+            "cold_bytes": sum(segment.stat().st_size for segment in segments),
+        }
@@ -0,0 +1,342 @@
+# Metrics - Counters, histograms and request spans with Prometheus text output
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def total(self, **labels) -> float:
+        """Sum over every series matching the given labels (the others are free)"""
+        wanted = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            return sum(value for key, value in self._values.items()
+                       if all(key[i] == expected for i, expected in wanted))
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., +Inf count], sum
+        self._series: Dict[LabelKey, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the block's duration (also recorded as a span when tracing)"""
+        start = time.perf_counter()
+        try:
+            with span(self.name, **labels):
+                yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels):
+        """Decorator form of ``time()``"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self, **labels) -> Dict[str, float]:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": sum(series[0]), "sum": series[1]}
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+LLM_TTFT_SECONDS = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds", "Time until the model produced its first token", ("model",))
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Total model response time", ("model",))
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "llm_tokens_per_second", "Generation speed after the first token", ("model",), RATE_BUCKETS)
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Tokens generated", ("model",))
+PROBE_SECONDS = REGISTRY.histogram(
+    "availability_probe_duration_seconds", "Internet/Ollama availability checks", ("probe",))
+MEMORY_SECONDS = REGISTRY.histogram(
+    "memory_operation_duration_seconds", "Memory store operations", ("operation",), FAST_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Cache lookups", ("cache", "result"))
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_generation(model: str, ttft: Optional[float], total: float, tokens: int,
+                      generation_seconds: Optional[float] = None):
+    """Record one model response; ``generation_seconds`` defaults to total minus TTFT"""
+    LLM_REQUEST_SECONDS.observe(total, model=model)
+    add_span("llm", total, model=model, tokens=tokens,
+             ttft_ms=round(ttft * 1000, 3) if ttft is not None else None)
+    if ttft is not None:
+        LLM_TTFT_SECONDS.observe(ttft, model=model)
+    if tokens:
+        LLM_TOKENS.inc(tokens, model=model)
+        if generation_seconds is None and ttft is not None:
+            generation_seconds = total - ttft
+        if generation_seconds and generation_seconds > 0:
+            LLM_TOKENS_PER_SECOND.observe(tokens / generation_seconds, model=model)
+
+
+def record_ollama_generation(model: str, result: Dict, total: float,
+                             first_token: Optional[float] = None):
+    """Record timings from Ollama's final response fields (durations are in ns)"""
+    if first_token is None and "prompt_eval_duration" in result:
+        first_token = (result.get("load_duration", 0) + result["prompt_eval_duration"]) / 1e9
+    eval_seconds = result.get("eval_duration", 0) / 1e9
+    record_generation(model, first_token, total, result.get("eval_count", 0), eval_seconds or None)
+
+
+def measure_stream(tokens: Iterator[str], model: str) -> Iterator[str]:
+    """Pass a token stream through, recording TTFT and tokens/s when it ends"""
+    start = time.perf_counter()
+    ttft = None
+    count = 0
+    try:
+        for token in tokens:
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            count += 1
+            yield token
+    finally:
+        record_generation(model, ttft, time.perf_counter() - start, count)
+
+
+# Spans: per-request timing breakdown, logged when SORMA_SPAN_LOG names a file
+
+_current_trace: ContextVar[Optional[List]] = ContextVar("current_trace", default=None)
+
+
+def add_span(name: str, seconds: float, **attributes):
+    """Record a span for work that has just finished and was timed elsewhere"""
+    trace = _current_trace.get()
+    if trace is not None:
+        start = time.perf_counter() - seconds
+        trace.append({"name": name, "start_ms": round((start - trace[0]) * 1000, 3),
+                      "duration_ms": round(seconds * 1000, 3), **attributes})
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as part of the current request's trace (no-op outside one)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.append({"name": name, "start_ms": round((start - trace[0]) * 1000, 3),
+                      "duration_ms": round((time.perf_counter() - start) * 1000, 3), **attributes})
+
+
+@contextmanager
+def collect_spans() -> Iterator[List[Dict]]:
+    """Collect the spans of a block into the yielded list (filled when the block ends).
+
+    Spans still reach the enclosing request trace, if one is being recorded.
+    """
+    outer = _current_trace.get()
+    trace = [time.perf_counter()]
+    token = _current_trace.set(trace)
+    spans: List[Dict] = []
+    try:
+        yield spans
+    finally:
+        _current_trace.reset(token)
+        spans.extend(trace[1:])
+        if outer is not None:
+            offset = (trace[0] - outer[0]) * 1000
+            outer.extend({**s, "start_ms": round(s["start_ms"] + offset, 3)} for s in spans)
+
+
+class SpanLog:
+    """Appends one JSON line per traced request"""
+
+    def __init__(self, log_file: Optional[str] = None):
+        self.log_file = log_file if log_file is not None else os.getenv("SORMA_SPAN_LOG")
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.log_file)
+
+    def start(self):
+        """Begin collecting spans for this context; returns a token for ``finish``"""
+        return _current_trace.set([time.perf_counter()]) if self.enabled else None
+
+    def finish(self, token, **request_info):
+        if token is None:
+            return
+        trace = _current_trace.get()
+        _current_trace.reset(token)
+        record = {"time": time.time(), **request_info,
+                  "duration_ms": round((time.perf_counter() - trace[0]) * 1000, 3), "spans": trace[1:]}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    HTTP_REQUEST_SECONDS.observe(seconds, method=method, route=route, status=str(status))
+
+
+def request_metrics_middleware(span_log: Optional[SpanLog] = None):
+    """HTTP middleware for ``app.middleware("http")``: route latency plus optional span logs"""
+    span_log = span_log or SpanLog()
+
+    async def record_request(request, call_next):
+        trace_token = span_log.start()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template (/api/jobs/{job_id}), not the raw path, to bound cardinality
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            observe_request(request.method, route, status, time.perf_counter() - start)
+            span_log.finish(trace_token, method=request.method, route=route, status=status)
+
+    return record_request
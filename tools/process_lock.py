@@ -0,0 +1,95 @@
+# Process Lock - File locks that serialise shared-file updates across worker processes
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock on ``path`` shared by threads and processes.
+
+    Re-entrant within a thread (the OS lock is taken on the outermost
+    acquire only), so locked methods can call each other. Use as a context
+    manager, or ``try_acquire()`` for a lock held by one process at a time
+    (e.g. the worker that runs background compaction).
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def _lock_fd(self, blocking: bool) -> bool:
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            if blocking:
+                raise
+            return False
+        self._fd = fd
+        return True
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0 and not self._lock_fd(blocking):
+            self._thread_lock.release()
+            return False
+        self._depth += 1
+        return True
+
+    def try_acquire(self) -> bool:
+        return self.acquire(blocking=False)
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def write_json_atomic(path: Path, data: Any, **dump_options):
+    """Replace ``path`` with ``data`` as JSON via a tmp file of this process and thread.
+
+    Readers never see a partial file, and concurrent writers never share
+    (and race on) one tmp file. Serialising the writers is up to the caller.
+    """
+    path = Path(path)
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_options)
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,418 @@
+# Processor Registry - Per-format file plugins with lazy parser imports
+import importlib
+import importlib.util
+import json
+import threading
+import time
+import zipfile
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SNIFF_BYTES = 8192
+
+
+class FileProcessorPlugin:
+    """Base class for a file format.
+
+    Subclasses list the third-party modules they need in ``requires``; those
+    are imported through ``ProcessorRegistry.load_module`` the first time a
+    file of that format is processed, never at import time.
+
+    ``supports_streaming`` plugins implement ``iter_text`` and can hand out text
+    piece by piece (page, paragraph, block). ``supports_parallel`` plugins
+    produce independent parts (pages, sheets, slides) that can be processed
+    concurrently.
+    """
+
+    name = "base"
+    file_type = "Unknown"
+    extensions: Tuple[str, ...] = ()
+    requires: Tuple[str, ...] = ()
+    install_hint = ""
+    supports_streaming = False
+    supports_parallel = False
+
+    def __init__(self, registry: "ProcessorRegistry"):
+        self.registry = registry
+
+    def is_available(self) -> bool:
+        """True if every required module can be imported (without importing it)"""
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def iter_text(self, file_path: Path) -> Iterator[str]:
+        """Yield text pieces; non-streaming plugins yield everything at once"""
+        from tools.document_store import extract_text
+        yield extract_text(self.process(file_path))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "file_type": self.file_type,
+            "extensions": list(self.extensions),
+            "available": self.is_available(),
+            "streaming": self.supports_streaming,
+            "parallel": self.supports_parallel
+        }
+
+
+def _read_text(file_path: Path) -> str:
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+class TextPlugin(FileProcessorPlugin):
+    name = "text"
+    file_type = "Text"
+    extensions = (".txt", ".log")
+    supports_streaming = True
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        content = _read_text(file_path)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "content": content,
+            "line_count": len(content.splitlines()),
+            "word_count": len(content.split()),
+            "char_count": len(content)
+        }
+
+    def iter_text(self, file_path: Path, block_size: int = 1 << 16) -> Iterator[str]:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            for block in iter(lambda: f.read(block_size), ""):
+                yield block
+
+
+class MarkdownPlugin(TextPlugin):
+    name = "markdown"
+    file_type = "Markdown"
+    extensions = (".md", ".markdown")
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        result = super().process(file_path)
+        headings = [line.lstrip("#").strip() for line in result["content"].splitlines()
+                    if line.startswith("#")]
+        result["headings"] = headings
+        result["heading_count"] = len(headings)
+        return result
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects visible text and the page title"""
+
+    SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self.title = ""
+        self.links = 0
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            self.links += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth and data.strip():
+            self.parts.append(data.strip())
+
+
+def html_to_text(markup: str) -> Tuple[str, str]:
+    """(title, visible text) of an HTML page, one line per text node"""
+    extractor = _HTMLTextExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    return extractor.title.strip(), "\n".join(extractor.parts)
+
+
+class HTMLPlugin(FileProcessorPlugin):
+    name = "html"
+    file_type = "HTML"
+    extensions = (".html", ".htm")
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        extractor = _HTMLTextExtractor()
+        extractor.feed(_read_text(file_path))
+        text_content = "\n".join(extractor.parts)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "title": extractor.title.strip(),
+            "link_count": extractor.links,
+            "text_content": text_content,
+            "word_count": len(text_content.split())
+        }
+
+
+class JSONPlugin(FileProcessorPlugin):
+    name = "json"
+    file_type = "JSON"
+    extensions = (".json",)
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "content": data,
+            "structure": self._analyze_structure(data)
+        }
+
+    @staticmethod
+    def _analyze_structure(data: Any) -> Dict[str, Any]:
+        if isinstance(data, dict):
+            return {"type": "object", "keys": list(data.keys()), "key_count": len(data)}
+        elif isinstance(data, list):
+            return {
+                "type": "array",
+                "length": len(data),
+                "item_types": list(set(type(item).__name__ for item in data[:10]))
+            }
+        return {"type": type(data).__name__, "value": str(data)[:100]}
+
+
+class PDFPlugin(FileProcessorPlugin):
+    name = "pdf"
+    file_type = "PDF"
+    extensions = (".pdf",)
+    requires = ("PyPDF2",)
+    install_hint = "pip install PyPDF2"
+    supports_streaming = True
+    supports_parallel = True
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        pages = list(self.iter_text(file_path))
+        text_content = "\n".join(pages)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "page_count": len(pages),
+            "text_content": text_content.strip(),
+            "word_count": len(text_content.split())
+        }
+
+    def iter_text(self, file_path: Path) -> Iterator[str]:
+        PyPDF2 = self.registry.load_module("PyPDF2")
+        with open(file_path, 'rb') as file:
+            for page in PyPDF2.PdfReader(file).pages:
+                yield page.extract_text() or ""
+
+
+class DOCXPlugin(FileProcessorPlugin):
+    name = "docx"
+    file_type = "DOCX"
+    extensions = (".docx",)
+    requires = ("docx",)
+    install_hint = "pip install python-docx"
+    supports_streaming = True
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        paragraphs = list(self.iter_text(file_path))
+        text_content = "\n".join(paragraphs)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "paragraph_count": len(paragraphs),
+            "text_content": text_content.strip(),
+            "word_count": len(text_content.split())
+        }
+
+    def iter_text(self, file_path: Path) -> Iterator[str]:
+        docx = self.registry.load_module("docx")
+        for paragraph in docx.Document(str(file_path)).paragraphs:
+            yield paragraph.text
+
+
+class PPTXPlugin(FileProcessorPlugin):
+    name = "pptx"
+    file_type = "PPTX"
+    extensions = (".pptx",)
+    requires = ("pptx",)
+    install_hint = "pip install python-pptx"
+    supports_streaming = True
+    supports_parallel = True
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        slides = list(self.iter_text(file_path))
+        text_content = "\n\n".join(slides)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "slide_count": len(slides),
+            "text_content": text_content.strip(),
+            "word_count": len(text_content.split())
+        }
+
+    def iter_text(self, file_path: Path) -> Iterator[str]:
+        pptx = self.registry.load_module("pptx")
+        for slide in pptx.Presentation(str(file_path)).slides:
+            texts = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+            yield "\n".join(t for t in texts if t.strip())
+
+
+class ExcelPlugin(FileProcessorPlugin):
+    name = "excel"
+    file_type = "Excel"
+    extensions = (".xlsx", ".xls")
+    requires = ("pandas", "openpyxl")
+    install_hint = "pip install pandas openpyxl"
+    supports_parallel = True
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        pd = self.registry.load_module("pandas")
+        sheets_data = pd.read_excel(file_path, sheet_name=None)
+        result = {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "sheet_count": len(sheets_data),
+            "sheets": {}
+        }
+        for sheet_name, df in sheets_data.items():
+            result["sheets"][sheet_name] = {
+                "rows": len(df),
+                "columns": len(df.columns),
+                "column_names": df.columns.tolist(),
+                "preview": df.head().to_dict('records')
+            }
+        return result
+
+
+class CSVPlugin(FileProcessorPlugin):
+    name = "csv"
+    file_type = "CSV"
+    extensions = (".csv",)
+    requires = ("pandas",)
+    install_hint = "pip install pandas"
+
+    def process(self, file_path: Path) -> Dict[str, Any]:
+        pd = self.registry.load_module("pandas")
+        df = pd.read_csv(file_path)
+        return {
+            "file_type": self.file_type,
+            "file_name": file_path.name,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "column_names": df.columns.tolist(),
+            "preview": df.head().to_dict('records'),
+            "summary": df.describe().to_dict() if df.select_dtypes(include=['number']).shape[1] > 0 else None
+        }
+
+
+DEFAULT_PLUGINS = (TextPlugin, MarkdownPlugin, HTMLPlugin, JSONPlugin, PDFPlugin,
+                   DOCXPlugin, PPTXPlugin, ExcelPlugin, CSVPlugin)
+
+# Members that identify Office Open XML packages (all are zip files)
+OOXML_MARKERS = (("word/", "docx"), ("xl/", "excel"), ("ppt/", "pptx"))
+
+
+class ProcessorRegistry:
+    """Maps files to plugins by content sniffing, falling back to the extension"""
+
+    def __init__(self, plugins=DEFAULT_PLUGINS):
+        self.plugins: Dict[str, FileProcessorPlugin] = {}
+        self.by_extension: Dict[str, FileProcessorPlugin] = {}
+        self.import_times: Dict[str, float] = {}
+        self._import_lock = threading.Lock()
+        started = time.perf_counter()
+        for plugin_class in plugins:
+            self.register(plugin_class)
+        self.init_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def register(self, plugin_class) -> FileProcessorPlugin:
+        """Register a plugin class; later registrations win for shared extensions"""
+        plugin = plugin_class(self)
+        self.plugins[plugin.name] = plugin
+        for extension in plugin.extensions:
+            self.by_extension[extension] = plugin
+        return plugin
+
+    def load_module(self, module_name: str):
+        """Import a parser module on first use and record how long the import took"""
+        with self._import_lock:
+            if module_name in self.import_times:
+                return importlib.import_module(module_name)
+            started = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self.import_times[module_name] = round((time.perf_counter() - started) * 1000, 2)
+            return module
+
+    def sniff(self, file_path: Path) -> Optional[FileProcessorPlugin]:
+        """Pick a plugin from the file's leading bytes; the extension only breaks ties"""
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+        by_extension = self.by_extension.get(file_path.suffix.lower())
+
+        if head.startswith(b"%PDF"):
+            return self.plugins.get("pdf")
+        if head.startswith(b"PK\x03\x04"):
+            return self._sniff_zip(file_path) or by_extension
+        if head.startswith(b"\xd0\xcf\x11\xe0"):
+            # Legacy OLE container; only .xls is supported
+            return self.plugins.get("excel") if file_path.suffix.lower() == ".xls" else None
+        if b"\x00" in head:
+            return None  # binary format we don't know
+
+        text = head.decode("utf-8", errors="ignore").lstrip("\ufeff \t\r\n")
+        lowered = text[:256].lower()
+        if lowered.startswith("<!doctype html") or lowered.startswith("<html"):
+            return self.plugins.get("html")
+        if by_extension is not None:
+            return by_extension
+        if text[:1] in "{[":
+            return self.plugins.get("json")
+        if text.startswith("#") or "\n#" in text:
+            return self.plugins.get("markdown")
+        return self.plugins.get("text")
+
+    def _sniff_zip(self, file_path: Path) -> Optional[FileProcessorPlugin]:
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                names = archive.namelist()
+        except zipfile.BadZipFile:
+            return None
+        for prefix, plugin_name in OOXML_MARKERS:
+            if any(name.startswith(prefix) for name in names):
+                return self.plugins.get(plugin_name)
+        return None
+
+    def supported_extensions(self, available_only: bool = True) -> List[str]:
+        """Extensions handled by registered (and, by default, installed) plugins"""
+        return sorted(ext for ext, plugin in self.by_extension.items()
+                      if not available_only or plugin.is_available())
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [plugin.describe() for plugin in self.plugins.values()]
+
+    def get_import_stats(self) -> Dict[str, Any]:
+        """Registry start-up cost and the time each lazily imported parser took"""
+        return {"registry_init_ms": self.init_ms, "parser_imports_ms": dict(self.import_times)}
+
+
+_default_registry: Optional[ProcessorRegistry] = None
+
+
+def get_default_registry() -> ProcessorRegistry:
+    """Process-wide registry shared by every FileProcessor"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ProcessorRegistry()
+    return _default_registry
@@ -0,0 +1,199 @@
+# Session Store - Signed session tokens with pluggable in-memory / SQLite storage
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+SESSION_COOKIE = "sorma_session"
+
+
+class MemorySessionStore:
+    """In-process LRU of sessions with TTL eviction (one worker only)"""
+
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id: str, data: Dict):
+        with self._lock:
+            self._sessions[session_id] = data
+            self._sessions.move_to_end(session_id)
+            now = time.time()
+            # Drop expired sessions from the cold end, then the least recently used ones
+            while self._sessions:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                if oldest["expires"] > now and len(self._sessions) <= self.max_sessions:
+                    break
+                del self._sessions[oldest_id]
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            data = self._sessions.get(session_id)
+            if data is None:
+                return None
+            if data["expires"] <= time.time():
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return data
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite file shared by every worker process"""
+
+    def __init__(self, db_file: str = "memory/sessions.db"):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                         "id TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_file), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, session_id: str, data: Dict):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)",
+                         (session_id, json.dumps(data), data["expires"]))
+            conn.execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE id = ? AND expires > ?", (session_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def count(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM sessions WHERE expires > ?", (time.time(),)
+        ).fetchone()[0]
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def load_secret(secret_file: str = "memory/session_secret") -> bytes:
+    """Signing key from SORMA_SESSION_SECRET, or a key file shared by all workers"""
+    env_secret = os.getenv("SORMA_SESSION_SECRET")
+    if env_secret:
+        return env_secret.encode("utf-8")
+
+    path = Path(secret_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        # O_EXCL: when several workers start at once only one writes the key
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    except FileExistsError:
+        pass
+    for _ in range(50):
+        secret = path.read_text().strip()
+        if secret:
+            return secret.encode("utf-8")
+        time.sleep(0.01)  # another worker is still writing it
+    raise RuntimeError(f"Session secret {path} is empty")
+
+
+class SessionManager:
+    """Issues and validates signed session tokens.
+
+    A token is ``<session id>.<expiry>.<HMAC-SHA256 signature>``. Validation
+    checks the signature and expiry first, so forged or stale tokens never
+    reach the store, then does one keyed lookup so logout revokes a token.
+    """
+
+    def __init__(self, store=None, ttl: int = 12 * 3600, secret: Optional[bytes] = None):
+        self.store = store if store is not None else create_session_store()
+        self.ttl = ttl
+        self.secret = secret or load_secret()
+
+    def _sign(self, message: str) -> str:
+        return _b64(hmac.new(self.secret, message.encode("ascii"), hashlib.sha256).digest())
+
+    def create(self, **data) -> str:
+        """Start a session and return its token"""
+        session_id = secrets.token_urlsafe(18)
+        expires = int(time.time()) + self.ttl
+        self.store.put(session_id, {"created": time.time(), "expires": expires, **data})
+        message = f"{session_id}.{expires}"
+        return f"{message}.{self._sign(message)}"
+
+    def _parse(self, token: str) -> Optional[str]:
+        """Session id of a well-formed, correctly signed, unexpired token"""
+        try:
+            # Headers and cookies arrive decoded as latin-1; a valid token is always ASCII
+            if not token.isascii():
+                return None
+            session_id, expires, signature = token.split(".")
+            if int(expires) <= time.time():
+                return None
+        except (AttributeError, ValueError):
+            return None
+        if not hmac.compare_digest(signature, self._sign(f"{session_id}.{expires}")):
+            return None
+        return session_id
+
+    def validate(self, token: Optional[str]) -> Optional[Dict]:
+        """Session data for a valid token, else None"""
+        if not token:
+            return None
+        session_id = self._parse(token)
+        return self.store.get(session_id) if session_id else None
+
+    def revoke(self, token: Optional[str]) -> bool:
+        session_id = self._parse(token) if token else None
+        if not session_id:
+            return False
+        self.store.delete(session_id)
+        return True
+
+    def active_sessions(self) -> int:
+        return self.store.count()
+
+
+def create_session_store(backend: Optional[str] = None):
+    """Store named by SORMA_SESSION_STORE: "memory" (default) or "sqlite" for multiple workers"""
+    backend = (backend or os.getenv("SORMA_SESSION_STORE", "memory")).lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SORMA_SESSION_DB", "memory/sessions.db"))
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown session store '{backend}' (use 'memory' or 'sqlite')")
+
+
+def token_from_headers(headers, cookies) -> Optional[str]:
+    """Bearer token from the Authorization header, else the session cookie"""
+    authorization = headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return cookies.get(SESSION_COOKIE)
@@ -0,0 +1,197 @@
+# Startup Profiler - Import-time and initialisation spans of the entry points, checked against a budget
+"""
+Usage: python -m tools.startup_profiler [--target backend.app] [--import-budget 3] [--init-budget 5] [--warm-up]
+
+Imports are profiled in a fresh interpreter (``python -X importtime``) so
+the numbers are cold-start numbers; the shared services are then started
+in-process, in a scratch directory, with each component timed. The report goes to
+memory/startup_profile.json and the exit status is 1 when a budget is
+exceeded, so the command can run as a benchmark check.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TARGETS = ("backend.app", "agent_core")
+DEFAULT_IMPORT_BUDGET = float(os.getenv("SORMA_IMPORT_BUDGET", "3.0"))
+DEFAULT_INIT_BUDGET = float(os.getenv("SORMA_INIT_BUDGET", "5.0"))
+REPORT_FILE = "memory/startup_profile.json"
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of ``-X importtime`` output as {"module", "self_s", "cumulative_s", "depth"}"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append({
+                "module": name.strip(),
+                "self_s": int(self_us) / 1e6,
+                "cumulative_s": int(cumulative_us) / 1e6,
+                # Nested imports are indented by two spaces per level
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2
+            })
+        except ValueError:
+            continue
+    return modules
+
+
+def _importtime(python: str, code: str):
+    start = time.perf_counter()
+    result = subprocess.run([python, "-X", "importtime", "-c", code], cwd=str(ROOT), capture_output=True, text=True)
+    return result, parse_importtime(result.stderr), time.perf_counter() - start
+
+
+def profile_imports(target: str, python: str = sys.executable, top: int = 15) -> Dict[str, Any]:
+    """Cold import of one module in a fresh interpreter"""
+    # Modules the interpreter imports at startup anyway do not count against the target
+    _, baseline, _ = _importtime(python, "pass")
+    preloaded = {module["module"] for module in baseline}
+    result, modules, wall = _importtime(python, f"import {target}")
+    modules = [module for module in modules if module["module"] not in preloaded]
+
+    packages: Dict[str, float] = defaultdict(float)
+    for module in modules:
+        packages[module["module"].split(".")[0]] += module["self_s"]
+    profile = {
+        "target": target,
+        "ok": result.returncode == 0,
+        "import_seconds": round(sum(module["cumulative_s"] for module in modules if module["depth"] == 0), 4),
+        "wall_seconds": round(wall, 4),
+        "modules": len(modules),
+        "slowest_modules": sorted(modules, key=lambda m: m["self_s"], reverse=True)[:top],
+        "packages": dict(sorted(((name, round(seconds, 4)) for name, seconds in packages.items()),
+                                key=lambda item: item[1], reverse=True)[:top]),
+    }
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        profile["error"] = errors[-1] if errors else f"exit code {result.returncode}"
+    return profile
+
+
+def profile_services(warm_up: bool = False) -> Dict[str, Any]:
+    """Start the shared backend services in-process, timing each component.
+
+    Components open their files relative to the working directory, so they
+    run in an empty scratch directory and never touch the live memory/.
+    The warm-up (network availability probes, first knowledge index
+    refresh) only runs on request and is timed apart from the budgeted init.
+    """
+    sys.path.insert(0, str(ROOT))
+    from backend.services import Services
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="sorma-startup-") as scratch:
+        os.chdir(scratch)
+        try:
+            services = Services()
+            start = time.perf_counter()
+            services.start(warm_up=False)
+            started = time.perf_counter()
+            try:
+                if warm_up:
+                    services.warm_up()
+                warmed = time.perf_counter()
+            finally:
+                services.stop()
+        finally:
+            os.chdir(cwd)
+    profile = {"init_seconds": round(started - start, 4), "components": services.startup_spans}
+    if warm_up:
+        profile["warm_up_seconds"] = round(warmed - started, 4)
+    return profile
+
+
+def write_report(report: Dict[str, Any], report_file: str = REPORT_FILE) -> Path:
+    path = ROOT / report_file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_suffix(".tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_file, path)
+    return path
+
+
+def run(targets: Sequence[str] = DEFAULT_TARGETS, import_budget: float = DEFAULT_IMPORT_BUDGET,
+        init_budget: Optional[float] = DEFAULT_INIT_BUDGET, report_file: str = REPORT_FILE,
+        warm_up: bool = False) -> Dict[str, Any]:
+    """Profile, compare with the budgets and write the report; returns it"""
+    report: Dict[str, Any] = {
+        "time": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "budget": {"import_seconds": import_budget, "init_seconds": init_budget},
+        "imports": [profile_imports(target) for target in targets],
+        "violations": [],
+    }
+    for profile in report["imports"]:
+        if not profile["ok"]:
+            report["violations"].append(f"import {profile['target']} failed: {profile['error']}")
+        elif profile["import_seconds"] > import_budget:
+            report["violations"].append(
+                f"import {profile['target']} over budget: {profile['import_seconds']:.2f}s > {import_budget:.2f}s")
+
+    if init_budget is not None:
+        try:
+            report["services"] = profile_services(warm_up)
+            if report["services"]["init_seconds"] > init_budget:
+                report["violations"].append(
+                    f"services init over budget: {report['services']['init_seconds']:.2f}s > {init_budget:.2f}s")
+        except ImportError as e:
+            report["services"] = {"error": str(e)}
+
+    report["report_file"] = str(write_report(report, report_file))
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    for profile in report["imports"]:
+        icon = "✅" if profile["ok"] else "⚠️ "
+        print(f"{icon} import {profile['target']}: {profile['import_seconds']:.3f}s "
+              f"({profile['modules']} modules)" + (f" - {profile['error']}" if "error" in profile else ""))
+        for name, seconds in list(profile["packages"].items())[:8]:
+            print(f"     {seconds:8.3f}s  {name}")
+    services = report.get("services")
+    if services and "error" not in services:
+        warm = f" (warm-up {services['warm_up_seconds']:.3f}s)" if "warm_up_seconds" in services else ""
+        print(f"✅ services init: {services['init_seconds']:.3f}s{warm}")
+        for name, seconds in sorted(services["components"].items(), key=lambda item: item[1], reverse=True):
+            print(f"     {seconds:8.3f}s  {name}")
+    elif services:
+        print(f"⚠️  services init skipped: {services['error']}")
+    for violation in report["violations"]:
+        print(f"❌ {violation}")
+    print(f"📄 Report: {report['report_file']}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile cold-start time of the assistant entry points")
+    parser.add_argument("--target", action="append", help="module to import (repeatable)")
+    parser.add_argument("--import-budget", type=float, default=DEFAULT_IMPORT_BUDGET,
+                        help="seconds allowed per target import")
+    parser.add_argument("--init-budget", type=float, default=DEFAULT_INIT_BUDGET,
+                        help="seconds allowed for starting the shared services")
+    parser.add_argument("--skip-init", action="store_true", help="only profile imports")
+    parser.add_argument("--warm-up", action="store_true",
+                        help="also time the warm-up (network probes), outside the init budget")
+    parser.add_argument("--report", default=REPORT_FILE, help="report file (relative to the project)")
+    args = parser.parse_args(argv)
+
+    report = run(args.target or DEFAULT_TARGETS, args.import_budget,
+                 None if args.skip_init else args.init_budget, args.report, args.warm_up)
+    print_report(report)
+    return 1 if report["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
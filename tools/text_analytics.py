@@ -0,0 +1,218 @@
+# Text Analytics - Keyword extraction and text statistics in a single pass
+import atexit
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from multiprocessing import util as multiprocessing_util
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.document_store import STOPWORDS, tokenize
+from tools.process_lock import FileLock, write_json_atomic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# Corpus size limits: most recent document keys, most frequent terms
+MAX_DOCUMENTS = 10000
+MAX_TERMS = 50000
+# New documents are written once this many are pending or this many seconds have passed
+SAVE_EVERY = 20
+SAVE_INTERVAL = 30.0
+
+_shared: Dict[Path, "TextAnalyzer"] = {}
+_shared_lock = threading.Lock()
+
+
+def _save_all():
+    for analyzer in list(_shared.values()):
+        analyzer.save_corpus()
+
+
+# Pool worker processes skip atexit hooks but run multiprocessing finalizers (as does the main process)
+atexit.register(_save_all)
+multiprocessing_util.Finalize(None, _save_all, exitpriority=10)
+
+
+class TextAnalyzer:
+    """Single-pass text statistics and TF-IDF keyword extraction.
+
+    Document frequencies of previously analysed files are kept in
+    ``corpus_file`` so keywords are ranked against what the owner usually
+    reads, not just by raw frequency. Analyses run in several worker
+    processes, so saving re-reads the file and merges under a file lock.
+    The file keeps at most ``max_documents`` document keys and ``max_terms``
+    terms, and new documents are saved in batches (see ``add_to_corpus``);
+    ``shared()`` analyzers are saved at exit.
+    """
+
+    def __init__(self, corpus_file: str = "memory/text_corpus.json", min_word_length: int = 3,
+                 max_documents: int = MAX_DOCUMENTS, max_terms: int = MAX_TERMS,
+                 save_every: int = SAVE_EVERY, save_interval: float = SAVE_INTERVAL):
+        self.corpus_file = Path(corpus_file)
+        self.min_word_length = min_word_length
+        self.max_documents = max_documents
+        self.max_terms = max_terms
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.doc_count = 0
+        self.doc_freq: Counter = Counter()
+        # Document keys in the order they were added (a dict keeps the order, so the oldest go first)
+        self.seen_documents: Dict[str, None] = {}
+        # Documents added here but not saved yet: key -> terms
+        self._pending: Dict[str, List[str]] = {}
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(str(self.corpus_file.with_name(f".{self.corpus_file.stem}.lock")))
+        self._load_corpus()
+
+    def _load_corpus(self):
+        """Load corpus document frequencies"""
+        try:
+            with open(self.corpus_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.doc_count = data.get("doc_count", 0)
+        self.doc_freq = Counter(data.get("doc_freq", {}))
+        self.seen_documents = dict.fromkeys(data.get("documents", []))
+
+    @classmethod
+    def shared(cls, corpus_file: str = "memory/text_corpus.json") -> "TextAnalyzer":
+        """The one analyzer of this process for a corpus file (saved at exit)"""
+        key = Path(corpus_file).resolve()
+        with _shared_lock:
+            analyzer = _shared.get(key)
+            if analyzer is None:
+                analyzer = _shared[key] = cls(corpus_file)
+            return analyzer
+
+    def save_corpus(self):
+        """Merge the documents added since the last save into the corpus file"""
+        with self._file_lock, self._lock:
+            self._saved_at = time.monotonic()
+            if not self._pending:
+                return
+            # Pick up what other processes saved meanwhile, then re-apply ours on top
+            pending, self._pending = self._pending, {}
+            self._load_corpus()
+            for document_key, terms in pending.items():
+                if document_key not in self.seen_documents:
+                    self.seen_documents[document_key] = None
+                    self.doc_count += 1
+                    self.doc_freq.update(terms)
+            if len(self.seen_documents) > self.max_documents:
+                self.seen_documents = dict.fromkeys(list(self.seen_documents)[-self.max_documents:])
+            if len(self.doc_freq) > self.max_terms:
+                self.doc_freq = Counter(dict(self.doc_freq.most_common(self.max_terms)))
+            data = {
+                "doc_count": self.doc_count,
+                "documents": list(self.seen_documents),
+                "doc_freq": dict(self.doc_freq)
+            }
+            write_json_atomic(self.corpus_file, data, ensure_ascii=False)
+
+    def _content_terms(self, tokens: List[str]) -> List[Optional[str]]:
+        """Replace stopwords and short tokens with None, keeping positions for n-grams"""
+        min_length = self.min_word_length
+        return [t if len(t) >= min_length and t not in STOPWORDS and not t.isdigit() else None
+                for t in tokens]
+
+    def add_to_corpus(self, document_key: str, terms: Counter, save: bool = True) -> bool:
+        """Count a document's terms towards corpus document frequencies once.
+
+        With ``save``, the pending documents are written once ``save_every``
+        of them are waiting or ``save_interval`` seconds have passed since the
+        last save; otherwise they wait for a later call, ``save_corpus()`` or exit.
+        """
+        with self._lock:
+            if document_key in self.seen_documents:
+                return False
+            self.seen_documents[document_key] = None
+            self.doc_count += 1
+            self.doc_freq.update(terms.keys())
+            self._pending[document_key] = list(terms)
+            due = (len(self._pending) >= self.save_every
+                   or time.monotonic() - self._saved_at >= self.save_interval)
+        if save and due:
+            self.save_corpus()
+        return True
+
+    def analyze(self, text: str, top_k: int = 10, max_ngram: int = 3,
+                document_key: Optional[str] = None) -> Dict[str, Any]:
+        """Compute statistics, TF-IDF keywords and n-gram keyphrases for text.
+
+        The text is tokenised once; every count below is derived from that
+        token list. When ``document_key`` is given, the document is added to
+        the corpus after scoring.
+        """
+        tokens = tokenize(text)
+        terms = self._content_terms(tokens)
+
+        unigrams = Counter(t for t in terms if t)
+        ngrams: Counter = Counter()
+        for n in range(2, max_ngram + 1):
+            # n-grams never span a stopword, so phrases stay meaningful
+            ngrams.update(" ".join(gram) for gram in zip(*(terms[i:] for i in range(n))) if all(gram))
+
+        sentence_count = len(SENTENCE_END.findall(text)) or (1 if tokens else 0)
+        paragraph_count = len([p for p in PARAGRAPH_BREAK.split(text) if p.strip()])
+
+        analysis = {
+            "statistics": {
+                "characters": len(text),
+                "characters_no_spaces": len(text) - sum(text.count(c) for c in " \t\n\r"),
+                "word_count": len(tokens),
+                "unique_words": len(set(tokens)),
+                "content_words": sum(unigrams.values()),
+                "sentences": sentence_count,
+                "paragraphs": paragraph_count,
+                "avg_sentence_length": round(len(tokens) / sentence_count, 2) if sentence_count else 0,
+                "lexical_diversity": round(len(set(tokens)) / len(tokens), 4) if tokens else 0
+            },
+            "keywords": self._score_terms(unigrams, top_k),
+            "keyphrases": [{"phrase": p, "count": c} for p, c in ngrams.most_common(top_k) if c > 1]
+        }
+
+        if document_key:
+            self.add_to_corpus(document_key, unigrams)
+
+        return analysis
+
+    def _score_terms(self, counts: Counter, top_k: int) -> List[Dict[str, Any]]:
+        """Rank terms by TF-IDF against the corpus (plain frequency when the corpus is empty)"""
+        if not counts:
+            return []
+
+        terms = list(counts)
+        total = sum(counts.values())
+        with self._lock:
+            n_docs = self.doc_count
+            dfs = [self.doc_freq.get(t, 0) for t in terms]
+
+        if np is not None:
+            tf = np.fromiter((counts[t] for t in terms), dtype=np.float64, count=len(terms)) / total
+            idf = np.log((n_docs + 1) / (np.asarray(dfs, dtype=np.float64) + 1)) + 1
+            scores = tf * idf
+            k = min(top_k, len(terms))
+            top = np.argpartition(-scores, k - 1)[:k]
+            ranked: List[Tuple[int, float]] = sorted(((int(i), float(scores[i])) for i in top),
+                                                     key=lambda item: item[1], reverse=True)
+        else:
+            scores = [(counts[t] / total) * (math.log((n_docs + 1) / (df + 1)) + 1) for t, df in zip(terms, dfs)]
+            ranked = sorted(enumerate(scores), key=lambda item: item[1], reverse=True)[:top_k]
+
+        return [{"term": terms[i], "count": counts[terms[i]], "score": round(score, 6)} for i, score in ranked]
+
+    def get_corpus_stats(self) -> Dict[str, int]:
+        """Get corpus statistics"""
+        with self._lock:
+            return {"documents": self.doc_count, "vocabulary_size": len(self.doc_freq)}
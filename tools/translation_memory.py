@@ -0,0 +1,222 @@
+# Translation Memory - Sentence-level translation cache and a batching translator
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tools.code_generator import ERROR_PREFIXES
+from tools.metrics import record_cache
+
+# Sentence ends (., !, ?, and their CJK forms) followed by whitespace, or a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?。！？])[ \t]+|\s*\n\s*")
+NUMBERED_LINE = re.compile(r"^\s*(\d+)\s*[.):]\s?(.*)$")
+# Segments with nothing to translate (numbers, punctuation, symbols) are passed through
+NOTHING_TO_TRANSLATE = re.compile(r"^[\W\d_]*$")
+
+
+def normalize_segment(segment: str) -> str:
+    """Cache key form of a segment: NFC, runs of spaces collapsed, lines trimmed"""
+    lines = unicodedata.normalize("NFC", segment).strip().splitlines()
+    return "\n".join(" ".join(line.split()) for line in lines)
+
+
+def split_segments(text: str) -> List[Tuple[str, str]]:
+    """Split text at sentence boundaries into (segment, separator) pairs.
+
+    Joining every segment with its separator gives back the original text.
+    """
+    pieces: List[Tuple[str, str]] = []
+    position = 0
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        if boundary.start() > position:
+            pieces.append((text[position:boundary.start()], boundary.group()))
+        elif pieces:
+            segment, separator = pieces[-1]
+            pieces[-1] = (segment, separator + boundary.group())
+        else:
+            pieces.append(("", boundary.group()))
+        position = boundary.end()
+    if position < len(text):
+        pieces.append((text[position:], ""))
+    return pieces
+
+
+class TranslationMemory:
+    """Persistent (source, target, segment) -> translation store in SQLite"""
+
+    def __init__(self, db_file: str = "memory/translation_memory.db"):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS translations ("
+                         "source TEXT NOT NULL, target TEXT NOT NULL, segment TEXT NOT NULL, "
+                         "translation TEXT NOT NULL, created REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, "
+                         "PRIMARY KEY (source, target, segment))")
+            # Earlier versions could store model error messages as translations
+            conn.executemany("DELETE FROM translations WHERE translation LIKE ?",
+                             [(prefix + "%",) for prefix in ERROR_PREFIXES])
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_file), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, source: str, target: str, segments: Iterable[str]) -> Dict[str, str]:
+        """Translations of the normalised segments that are in memory"""
+        keys = list(dict.fromkeys(segments))
+        found: Dict[str, str] = {}
+        conn = self._connect()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT segment, translation FROM translations WHERE source = ? AND target = ? "
+                f"AND segment IN ({placeholders})", [source, target] + chunk
+            ).fetchall()
+            found.update(rows)
+        if found:
+            with conn:
+                conn.executemany("UPDATE translations SET hits = hits + 1 "
+                                 "WHERE source = ? AND target = ? AND segment = ?",
+                                 [(source, target, segment) for segment in found])
+        return found
+
+    def store(self, source: str, target: str, translations: Dict[str, str]):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO translations (source, target, segment, translation, created) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             [(source, target, segment, text, now) for segment, text in translations.items()])
+
+    def get_stats(self) -> Dict[str, int]:
+        row = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM translations").fetchone()
+        return {"segments": row[0], "hits": row[1]}
+
+
+class BatchTranslator:
+    """Translates many texts sentence by sentence through a translation memory.
+
+    Only segments missing from memory go to the model, packed as numbered
+    lines into prompts of at most ``max_batch_segments`` segments /
+    ``max_batch_chars`` characters. ``ask(prompt, system_prompt)`` returns the
+    model's answer, or None when no model is available. Model errors come
+    back as answers too (see ERROR_PREFIXES); they are never stored.
+    """
+
+    def __init__(self, ask: Callable[[str, str], Optional[str]], memory: Optional[TranslationMemory] = None,
+                 max_batch_segments: int = 20, max_batch_chars: int = 2000):
+        self.ask = ask
+        self.memory = memory
+        self.max_batch_segments = max_batch_segments
+        self.max_batch_chars = max_batch_chars
+
+    def _batches(self, segments: Sequence[str]) -> Iterable[List[str]]:
+        batch: List[str] = []
+        size = 0
+        for segment in segments:
+            if batch and (len(batch) >= self.max_batch_segments or size + len(segment) > self.max_batch_chars):
+                yield batch
+                batch, size = [], 0
+            batch.append(segment)
+            size += len(segment)
+        if batch:
+            yield batch
+
+    def _ask(self, prompt: str, system_prompt: str) -> Optional[str]:
+        """Model answer, or None when there is none or it is an error message"""
+        answer = self.ask(prompt, system_prompt)
+        if answer is None or answer.strip().startswith(ERROR_PREFIXES):
+            return None
+        return answer
+
+    @staticmethod
+    def _direction(source: str, target: str) -> str:
+        return f"from {source} to {target}" if source and source != "auto" else f"to {target}"
+
+    def _translate_batch(self, batch: List[str], source: str, target: str) -> Dict[str, str]:
+        direction = self._direction(source, target)
+        # Numbered lines only work for single-line segments (split_sentences=False can give others)
+        if len(batch) > 1 and not any("\n" in segment for segment in batch):
+            system_prompt = (f"You are a professional translator. Translate each numbered line {direction}. "
+                             "Reply with the same numbers, one translated line per number, and nothing else.")
+            prompt = "\n".join(f"{i}. {segment}" for i, segment in enumerate(batch, 1))
+            answer = self._ask(prompt, system_prompt)
+            if answer is None:
+                return {}
+            numbered: Dict[int, str] = {}
+            for line in answer.splitlines():
+                found = NUMBERED_LINE.match(line)
+                if found and found.group(2).strip():
+                    numbered.setdefault(int(found.group(1)), found.group(2).strip())
+            translated = {segment: numbered[i] for i, segment in enumerate(batch, 1) if i in numbered}
+        else:
+            translated = {}
+
+        # Lines the model merged, dropped or misnumbered are retried one by one
+        system_prompt = (f"You are a professional translator. Translate the text {direction}. "
+                         "Reply with the translation only.")
+        for segment in batch:
+            if segment not in translated:
+                answer = self._ask(segment, system_prompt)
+                if answer is None:
+                    break
+                translated[segment] = answer.strip()
+        return translated
+
+    def translate(self, texts: Sequence[str], target: str, source: str = "auto",
+                  split_sentences: bool = True) -> Dict:
+        """Translate texts; returns {"translations", "stats"} with translations in input order.
+
+        A segment the model could not translate keeps its original text and
+        is counted in ``stats["untranslated"]``.
+        """
+        target_key, source_key = target.strip().lower(), (source or "auto").strip().lower()
+        documents = [split_segments(text) if split_sentences else [(text, "")] for text in texts]
+        wanted = list(dict.fromkeys(
+            normalize_segment(segment) for pieces in documents for segment, _ in pieces
+            if not NOTHING_TO_TRANSLATE.match(segment)
+        ))
+
+        known = self.memory.lookup(source_key, target_key, wanted) if self.memory and wanted else {}
+        misses = [segment for segment in wanted if segment not in known]
+        for segment in wanted:
+            record_cache("translation_memory", segment in known)
+
+        fresh: Dict[str, str] = {}
+        batches = 0
+        for batch in self._batches(misses):
+            batches += 1
+            translated = self._translate_batch(batch, source, target)
+            if not translated:
+                break  # no model available - do not try the remaining batches
+            fresh.update(translated)
+        if self.memory and fresh:
+            self.memory.store(source_key, target_key, fresh)
+        known.update(fresh)
+
+        translations = []
+        for pieces in documents:
+            parts = []
+            for segment, separator in pieces:
+                key = normalize_segment(segment)
+                parts.append(known.get(key, segment) + separator)
+            translations.append("".join(parts))
+
+        return {
+            "translations": translations,
+            "stats": {
+                "segments": len(wanted),
+                "cached": len(wanted) - len(misses),
+                "translated": len(fresh),
+                "untranslated": len(misses) - len(fresh),
+                "batches": batches,
+            },
+        }
@@ -0,0 +1,258 @@
+# TTS Worker - One long-lived thread that owns the pyttsx3 engine
+import hashlib
+import importlib.util
+import threading
+import wave
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+
+from tools.metrics import record_cache
+
+
+class Utterance:
+    def __init__(self, text: str, generation: int, cache: bool, path: Optional[str] = None):
+        self.text = text
+        self.generation = generation
+        self.cache = cache
+        self.path = path  # render to this WAV file instead of the speakers
+        self.done = threading.Event()
+
+
+class TTSWorker:
+    """Serialises all speech through a single thread and engine.
+
+    pyttsx3 engines are not thread-safe, so the engine is created and driven
+    only from the worker thread. Pending utterances sit in a bounded queue:
+    duplicates are coalesced, the oldest pending item is dropped when the queue
+    is full, and ``cancel()`` discards everything queued before it; the
+    utterance being spoken is stopped by the worker itself at its next word.
+    Phrases spoken with ``cache=True`` are rendered to WAV once and replayed
+    from disk (when pyaudio is there to play them).
+    ``render()`` jobs share the same thread but are never dropped or cancelled.
+    """
+
+    def __init__(self, rate: int = 180, volume: float = 0.9, max_pending: int = 4,
+                 cache_dir: str = "memory/tts_cache"):
+        self.rate = rate
+        self.volume = volume
+        self.max_pending = max_pending
+        self.cache_dir = Path(cache_dir)
+        self.info: Dict = {}
+        self.error: Optional[Exception] = None
+        self.dropped = 0
+        self.cache_hits = 0
+        # Cached WAVs can only be replayed through pyaudio; without it phrases are just spoken
+        self._can_play = importlib.util.find_spec("pyaudio") is not None
+
+        self._pending: Deque[Utterance] = deque()
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._stopping = False
+        self._speaking: Optional[Utterance] = None
+        self._saying = False  # the engine is speaking aloud (not rendering to a file)
+        self._engine = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=10)
+
+    @property
+    def available(self) -> bool:
+        return self._engine is not None and self.error is None
+
+    def _setup_engine(self):
+        import pyttsx3
+
+        engine = pyttsx3.init()
+
+        # Configure voice settings
+        voices = engine.getProperty('voices')
+        if voices:
+            # Try to use a male voice if available
+            for voice in voices:
+                if 'male' in voice.name.lower() or 'david' in voice.name.lower():
+                    engine.setProperty('voice', voice.id)
+                    break
+
+        engine.setProperty('rate', self.rate)
+        engine.setProperty('volume', self.volume)
+        # Driver callbacks run on this thread, so cancel() stops speech from here
+        engine.connect('started-utterance', self._check_cancelled)
+        engine.connect('started-word', self._check_cancelled)
+
+        # Properties are read here, once, so other threads never touch the engine
+        self.info = {
+            "voice_count": len(voices) if voices else 0,
+            "voice_id": engine.getProperty('voice'),
+            "current_rate": engine.getProperty('rate'),
+            "current_volume": engine.getProperty('volume')
+        }
+        return engine
+
+    def _run(self):
+        try:
+            self._engine = self._setup_engine()
+        except Exception as e:
+            self.error = e
+            print(f"TTS setup failed: {e}")
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    break
+                item = self._pending.popleft()
+                if item.path is None and item.generation < self._generation:
+                    item.done.set()
+                    continue
+                self._speaking = item
+
+            try:
+                self._speak(item)
+            except Exception as e:
+                print(f"Speech error: {e}")
+            finally:
+                with self._condition:
+                    self._speaking = None
+                item.done.set()
+
+        for item in self._pending:
+            item.done.set()
+
+    def _check_cancelled(self, *args, **kwargs):
+        """Engine callback: stop speaking once the current utterance has been cancelled"""
+        item = self._speaking
+        if self._saying and item is not None and (item.generation < self._generation or self._stopping):
+            self._engine.stop()
+
+    def _cache_path(self, text: str) -> Path:
+        key = f"{self.info.get('voice_id')}|{self.rate}|{self.volume}|{text}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.wav"
+
+    def _speak(self, item: Utterance):
+        if item.path:
+            self._engine.save_to_file(item.text, item.path)
+            self._engine.runAndWait()
+            return
+
+        if item.cache and self._can_play:
+            path = self._cache_path(item.text)
+            record_cache("tts", path.exists())
+            if path.exists():
+                self.cache_hits += 1
+            else:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                self._engine.save_to_file(item.text, str(path))
+                self._engine.runAndWait()
+            if path.exists() and self._play_wav(path, item):
+                return
+
+        self._saying = True
+        try:
+            self._engine.say(item.text)
+            self._engine.runAndWait()
+        finally:
+            self._saying = False
+
+    def _play_wav(self, path: Path, item: Utterance) -> bool:
+        """Play a cached rendering; False if playback isn't possible here"""
+        try:
+            import pyaudio
+        except ImportError:
+            return False
+
+        audio = pyaudio.PyAudio()
+        try:
+            with wave.open(str(path), 'rb') as wav:
+                stream = audio.open(format=audio.get_format_from_width(wav.getsampwidth()),
+                                    channels=wav.getnchannels(), rate=wav.getframerate(), output=True)
+                try:
+                    data = wav.readframes(2048)
+                    while data and item.generation >= self._generation and not self._stopping:
+                        stream.write(data)
+                        data = wav.readframes(2048)
+                finally:
+                    stream.stop_stream()
+                    stream.close()
+            return True
+        except (OSError, wave.Error, EOFError):
+            return False
+        finally:
+            audio.terminate()
+
+    def say(self, text: str, cache: bool = False, wait: bool = False, timeout: Optional[float] = None) -> bool:
+        """Queue text for speaking; returns False if the worker isn't available"""
+        if not self.available:
+            return False
+
+        with self._condition:
+            # Coalesce: the same text already waiting to be spoken doesn't need a second copy
+            for pending in self._pending:
+                if pending.path is None and pending.text == text:
+                    item = pending
+                    break
+            else:
+                item = Utterance(text, self._generation, cache)
+                speech = [pending for pending in self._pending if pending.path is None]
+                for stale in speech[:max(0, len(speech) - self.max_pending + 1)]:
+                    self._pending.remove(stale)
+                    stale.done.set()
+                    self.dropped += 1
+                self._pending.append(item)
+                self._condition.notify()
+
+        if wait:
+            item.done.wait(timeout)
+        return True
+
+    def render(self, text: str, path: str, timeout: float = 60.0) -> bool:
+        """Synthesise text into a WAV file on the worker thread; True if the file was written"""
+        if not self.available:
+            return False
+
+        item = Utterance(text, self._generation, False, path=path)
+        with self._condition:
+            self._pending.append(item)
+            self._condition.notify()
+        if not item.done.wait(timeout):
+            return False
+        output = Path(path)
+        return output.exists() and output.stat().st_size > 0
+
+    def cancel(self):
+        """Drop queued utterances and stop the one being spoken.
+
+        The engine is never touched here: the worker stops the current
+        utterance from its word callback once it sees the new generation.
+        """
+        with self._condition:
+            self._generation += 1
+            renders = deque()
+            while self._pending:
+                item = self._pending.popleft()
+                if item.path is None:
+                    item.done.set()
+                else:
+                    renders.append(item)
+            self._pending = renders
+
+    def is_busy(self) -> bool:
+        with self._condition:
+            return self._speaking is not None or bool(self._pending)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._condition:
+            pending = len(self._pending)
+        return {"pending": pending, "dropped": self.dropped, "cache_hits": self.cache_hits}
+
+    def shutdown(self, timeout: float = 2.0):
+        self.cancel()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
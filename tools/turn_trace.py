@@ -0,0 +1,420 @@
+# Turn Trace - Opt-in recording of chat turns and a replay harness for performance regression checks
+"""
+Recording: set ``SORMA_TURN_TRACE=memory/traces`` and every turn answered by
+``/api/chat``, the WebSocket channel or ``ChandanAI`` (``process_command``
+and the streamed voice-mode ``stream_command``) is appended to ``<dir>/turns-YYYYMMDD.jsonl``: input, intent and answer path,
+memory reads/writes, model calls (prompt/response size, latency, tokens),
+output and the span timeline. Traces hold the raw messages, so only enable
+it where that is acceptable.
+
+Replay: python -m tools.turn_trace replay memory/traces [--latency none|recorded]
+    [--repeat 3] [--baseline report.json] [--save report.json]
+
+Recorded turns are replayed in order through the same code paths against a
+stub model (answers with the recorded output, optionally after the recorded
+latency) and a scratch copy of the memory files. Per-stage p50/p95 timings
+are compared with the baseline report, or with the recorded timings when
+there is none, and the exit status is 1 when a stage got slower than
+``--threshold`` times its reference.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from tools.metrics import add_span, collect_spans
+from tools.process_lock import FileLock
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Span name -> stage; memory operations are reported as memory_read / memory_write
+STAGES = {
+    "chat.classify": "classify",
+    "chat.local": "local",
+    "chat.file": "file",
+    "chat.context": "context",
+    "chat.model": "model",
+    "chat.fallback": "fallback",
+    "chat.save": "save",
+}
+MEMORY_SPAN = "memory_operation_duration_seconds"
+READ_OPERATIONS = ("get_context_for_prompt", "search_memory", "get_memory_stats")
+# Paths answered without a model; their output should not change on replay
+LOCAL_PATHS = ("command", "fast_path", "unauthorized")
+# Stages whose replay timing depends on the stub model's latency
+MODEL_STAGES = ("model", "total")
+
+
+def record_model_call(model: str, prompt: str, system_prompt: str, response: str, seconds: float):
+    """Span for one model call with its prompt and response sizes"""
+    add_span("chat.model", seconds, model=model, prompt_chars=len(prompt),
+             system_prompt_chars=len(system_prompt), response_chars=len(response))
+
+
+def summarize_spans(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Stage timings, memory operations and model calls of one turn's spans"""
+    stages: Dict[str, float] = defaultdict(float)
+    memory: List[Dict[str, Any]] = []
+    model_calls: List[Dict[str, Any]] = []
+    generation: Dict[str, Any] = {}
+    for s in spans:
+        name = s["name"]
+        if name in STAGES:
+            stages[STAGES[name]] += s["duration_ms"]
+        if name == MEMORY_SPAN:
+            access = "read" if s.get("operation") in READ_OPERATIONS else "write"
+            stages[f"memory_{access}"] += s["duration_ms"]
+            memory.append({"operation": s.get("operation"), "access": access, "duration_ms": s["duration_ms"]})
+        elif name == "llm":
+            # Recorded by the backend while the call runs, so it precedes its chat.model span
+            generation = {"backend": s.get("model"), "tokens": s.get("tokens"), "ttft_ms": s.get("ttft_ms")}
+        elif name == "chat.model":
+            call = {key: value for key, value in s.items() if key not in ("name", "start_ms")}
+            model_calls.append({**call, **generation})
+            generation = {}
+    return {"stages": {stage: round(ms, 3) for stage, ms in stages.items()},
+            "memory": memory, "model_calls": model_calls}
+
+
+class TurnRecorder:
+    """Appends one JSON line per chat turn while ``trace_dir`` is set"""
+
+    def __init__(self, trace_dir: Optional[str] = None):
+        self.trace_dir = trace_dir if trace_dir is not None else os.getenv("SORMA_TURN_TRACE")
+        self._lock: Optional[FileLock] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.trace_dir)
+
+    @contextmanager
+    def record(self, source: str, user_input: str) -> Iterator[Dict[str, Any]]:
+        """Trace the block as one turn; the caller fills in intent, path, output, ...
+
+        Yields a dict to update either way, so call sites need no checks.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        turn: Dict[str, Any] = {"source": source, "input": user_input}
+        started = time.perf_counter()
+        try:
+            with collect_spans() as spans:
+                try:
+                    yield turn
+                except GeneratorExit:
+                    turn["cancelled"] = True  # stream closed before the answer was complete
+                    raise
+                except Exception as e:
+                    turn["error"] = str(e)
+                    raise
+        finally:
+            self.write(self._finish(turn, spans, time.perf_counter() - started))
+
+    def _finish(self, turn: Dict[str, Any], spans: List[Dict[str, Any]], seconds: float) -> Dict[str, Any]:
+        summary = summarize_spans(spans)
+        summary["stages"]["total"] = round(seconds * 1000, 3)
+        record = {"id": uuid.uuid4().hex, "time": datetime.now().isoformat(), "pid": os.getpid(), **turn,
+                  "duration_ms": summary["stages"]["total"], **summary, "spans": spans}
+        if "model_used" not in record and summary["model_calls"]:
+            record["model_used"] = summary["model_calls"][-1]["model"]
+        return record
+
+    def write(self, record: Dict[str, Any]):
+        try:
+            trace_dir = Path(self.trace_dir)
+            if self._lock is None:
+                self._lock = FileLock(str(trace_dir / ".turns.lock"))
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            # Several worker processes append to the same day file
+            with self._lock:
+                with open(trace_dir / f"turns-{datetime.now().strftime('%Y%m%d')}.jsonl", 'a', encoding='utf-8') as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"⚠️  Could not write turn trace: {e}")
+
+
+RECORDER = TurnRecorder()
+
+
+def load_traces(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """Turns from trace files (directories: every turns-*.jsonl in them), oldest first"""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("turns-*.jsonl")) if path.is_dir() else [path])
+    turns = []
+    for trace_file in files:
+        with open(trace_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    turns.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # partially written line
+    return sorted(turns, key=lambda turn: turn.get("time", ""))
+
+
+# Replay
+
+
+class ReplayModel:
+    """Stands in for AIModelManager: answers with the output recorded for the turn being replayed"""
+
+    name = "replay"
+
+    def __init__(self, latency: str = "none"):
+        self.latency = latency
+        self.turn: Dict[str, Any] = {}
+
+    def load(self, turn: Dict[str, Any]):
+        self.turn = turn
+
+    def _available(self) -> bool:
+        return any(call.get("model") not in (None, "none") for call in self.turn.get("model_calls", []))
+
+    def _delay(self) -> float:
+        if self.latency != "recorded":
+            return 0.0
+        return sum(call.get("duration_ms", 0) for call in self.turn.get("model_calls", [])) / 1000
+
+    def choose_model(self, force_offline: bool = False) -> str:
+        return self.name if self._available() else "none"
+
+    def get_response(self, prompt: str, system_prompt: str = "", force_offline: bool = False) -> Dict[str, Any]:
+        from tools.ai_manager import NO_MODEL_MESSAGE
+
+        if not self._available():
+            return {"response": NO_MODEL_MESSAGE, "model_used": "none", "model_name": self.name}
+        time.sleep(self._delay())
+        return {"response": self.turn.get("output", ""), "model_used": self.name, "model_name": self.name}
+
+    def stream_with(self, model_used: str, prompt: str, system_prompt: str = "") -> Iterator[str]:
+        words = self.turn.get("output", "").split(" ")
+        delay = self._delay() / max(1, len(words))
+        for i, word in enumerate(words):
+            time.sleep(delay)
+            yield word if i == 0 else " " + word
+
+    def get_system_prompt(self, owner_name: str, context: str = "") -> str:
+        from tools.ai_manager import AIModelManager
+
+        return AIModelManager.get_system_prompt(self, owner_name, context)
+
+    def get_available_models(self) -> Dict[str, Any]:
+        return {"ollama_available": False, "internet_available": False, "openai_configured": False,
+                "offline_model": self.name, "online_model": self.name}
+
+
+class MutedVoice:
+    """VoiceManager stand-in so replaying agent turns never opens audio devices"""
+
+    def get_voice_info(self) -> Dict[str, Any]:
+        return {"tts_available": False, "stt_available": False}
+
+    def is_voice_available(self) -> bool:
+        return False
+
+
+class ReplayEnvironment:
+    """Scratch copy of the memory files plus the components a replayed turn runs against"""
+
+    def __init__(self, workdir: str, model: ReplayModel, memory_from: Optional[str] = None):
+        from tools.auth_manager import AuthManager
+        from tools.document_store import DocumentStore
+        from tools.memory_manager import MemoryManager
+
+        self.workdir = Path(workdir)
+        self.model = model
+        # The owner file is always needed (authorisation, owner name); the rest only on request
+        source = Path(memory_from) if memory_from else ROOT / "memory"
+        names = ("owner.json", "short_term.json", "long_term.json") if memory_from else ("owner.json",)
+        for name in names:
+            if (source / name).exists():
+                shutil.copy2(source / name, self.workdir / name)
+        if memory_from and (source / "documents").is_dir():
+            shutil.copytree(source / "documents", self.workdir / "documents")
+
+        self.memory = MemoryManager(str(self.workdir))
+        self.auth = AuthManager(str(self.workdir / "owner.json"))
+        self.documents = DocumentStore(str(self.workdir / "documents"))
+        self._services = None
+        self._agents: Dict[str, Any] = {}
+
+    def services(self):
+        if self._services is None:
+            from backend.services import Services
+
+            services = Services()
+            services.memory, services.auth, services.documents, services.ai = \
+                self.memory, self.auth, self.documents, self.model
+            self._services = services
+        return self._services
+
+    def agent(self, session: str):
+        """One agent per recorded session, so authorisation replays as it happened"""
+        if session not in self._agents:
+            from agent_core import ChandanAI
+
+            self._agents[session] = ChandanAI(memory=self.memory, auth=self.auth, ai=self.model,
+                                              documents=self.documents, voice=MutedVoice())
+        return self._agents[session]
+
+    def run(self, turn: Dict[str, Any]) -> str:
+        from backend.responses import answer_message, stream_message
+
+        text = turn["input"]
+        if turn["source"] == "agent":
+            return self.agent(turn.get("session", "")).process_command(text)
+        if turn["source"] == "agent_stream":
+            return "".join(self.agent(turn.get("session", "")).stream_command(text))
+        if turn["source"] == "stream":
+            return "".join(stream_message(self.services(), text, {}))
+        return answer_message(self.services(), text)["response"]
+
+
+def replay_turns(turns: List[Dict[str, Any]], latency: str = "none",
+                 memory_from: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Replay turns in order in a fresh scratch environment; returns their summaries"""
+    model = ReplayModel(latency)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="turn-replay-") as workdir:
+        with contextlib.redirect_stdout(io.StringIO()):  # status banners and the like
+            env = ReplayEnvironment(workdir, model, memory_from)
+            for turn in turns:
+                model.load(turn)
+                started = time.perf_counter()
+                with collect_spans() as spans:
+                    output = env.run(turn)
+                summary = summarize_spans(spans)
+                summary["stages"]["total"] = round((time.perf_counter() - started) * 1000, 3)
+                summary["output_changed"] = turn.get("path") in LOCAL_PATHS and output != turn.get("output")
+                results.append(summary)
+    return results
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def stage_stats(summaries: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """p50 / p95 / mean per stage over turn summaries"""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for summary in summaries:
+        for stage, ms in summary.get("stages", {}).items():
+            samples[stage].append(ms)
+    return {stage: {"count": len(values), "p50": round(percentile(values, 50), 3),
+                    "p95": round(percentile(values, 95), 3), "mean": round(sum(values) / len(values), 3)}
+            for stage, values in sorted(samples.items())}
+
+
+def compare(current: Dict[str, Dict[str, float]], reference: Dict[str, Dict[str, float]],
+            threshold: float, min_delta_ms: float, skip: Sequence[str] = ()) -> List[str]:
+    """Stages whose p95 exceeds the reference p95 by ``threshold`` times and ``min_delta_ms``"""
+    regressions = []
+    for stage, stats in current.items():
+        ref = reference.get(stage)
+        if ref is None or stage in skip:
+            continue
+        if stats["p95"] > ref["p95"] * threshold and stats["p95"] - ref["p95"] > min_delta_ms:
+            regressions.append(f"{stage}: p95 {stats['p95']:.2f}ms > {threshold:g} x {ref['p95']:.2f}ms")
+    return regressions
+
+
+def replay(paths: Sequence[str], latency: str = "none", repeat: int = 1, threshold: float = 1.5,
+           min_delta_ms: float = 2.0, baseline: Optional[str] = None,
+           memory_from: Optional[str] = None) -> Dict[str, Any]:
+    """Replay recorded traces and compare stage timings; returns the report"""
+    # Completed turns only - a cancelled stream cannot be reproduced
+    turns = [turn for turn in load_traces(paths)
+             if "input" in turn and not turn.get("cancelled") and not turn.get("error")]
+    report: Dict[str, Any] = {
+        "time": datetime.now().isoformat(),
+        "traces": len(turns),
+        "repeat": repeat,
+        "latency": latency,
+        "recorded": stage_stats(turns),
+        "regressions": [],
+    }
+    if not turns:
+        report["error"] = "No recorded turns found"
+        return report
+
+    tracing, RECORDER.trace_dir = RECORDER.trace_dir, None  # do not record the replays themselves
+    try:
+        summaries = []
+        for _ in range(repeat):
+            summaries.extend(replay_turns(turns, latency, memory_from))
+    finally:
+        RECORDER.trace_dir = tracing
+    report["replay"] = stage_stats(summaries)
+    report["output_changed"] = sum(1 for summary in summaries if summary["output_changed"])
+
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            report["baseline"] = baseline
+            reference, skip = json.load(f)["replay"], ()
+    else:
+        # Live timings include the real model, which the stub only imitates with --latency recorded
+        reference, skip = report["recorded"], (() if latency == "recorded" else MODEL_STAGES)
+    report["regressions"] = compare(report["replay"], reference, threshold, min_delta_ms, skip)
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    if "error" in report:
+        print(f"⚠️  {report['error']}")
+        return
+    print(f"🔁 Replayed {report['traces']} turn(s) x {report['repeat']} (stub latency: {report['latency']})")
+    print(f"     {'stage':<14}{'recorded p50':>14}{'p95':>10}{'replay p50':>14}{'p95':>10}")
+    for stage, stats in report["replay"].items():
+        recorded = report["recorded"].get(stage, {})
+        print(f"     {stage:<14}{recorded.get('p50', float('nan')):>12.2f}ms{recorded.get('p95', float('nan')):>8.2f}ms"
+              f"{stats['p50']:>12.2f}ms{stats['p95']:>8.2f}ms")
+    if report["output_changed"]:
+        print(f"⚠️  {report['output_changed']} locally answered turn(s) replied differently")
+    for regression in report["regressions"]:
+        print(f"❌ {regression}")
+    if not report["regressions"]:
+        print("✅ No stage regressed")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded chat turns against a stub model")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser("replay", help="replay traces and report per-stage timings")
+    replay_parser.add_argument("paths", nargs="+", help="trace files or directories")
+    replay_parser.add_argument("--latency", choices=("none", "recorded"), default="none",
+                               help="stub model answers instantly or after the recorded latency")
+    replay_parser.add_argument("--repeat", type=int, default=1, help="replay the traces this many times")
+    replay_parser.add_argument("--threshold", type=float, default=1.5, help="allowed p95 slowdown factor")
+    replay_parser.add_argument("--min-delta", type=float, default=2.0,
+                               help="ignore slowdowns smaller than this many milliseconds")
+    replay_parser.add_argument("--baseline", help="earlier report to compare with (instead of the recorded timings)")
+    replay_parser.add_argument("--memory-from", help="memory directory to copy as the starting state")
+    replay_parser.add_argument("--save", help="write the report as JSON (usable as a later --baseline)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT))
+    report = replay(args.paths, args.latency, max(1, args.repeat), args.threshold, args.min_delta,
+                    args.baseline, args.memory_from)
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report: {args.save}")
+    return 1 if report["regressions"] or "error" in report else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,39 +1,29 @@
 # Voice Interface - Text-to-Speech and Speech-to-Text
-import pyttsx3
 import speech_recognition as sr
 from typing import Optional
 import threading
 import time
 
+from tools.tts_worker import TTSWorker
+from tools.wake_word import FRAME_SAMPLES, SAMPLE_RATE, WakeWordDetector
+
 class VoiceManager:
     def __init__(self):
         self.tts_engine = None
         self.recognizer = sr.Recognizer()
         self.microphone = sr.Microphone()
         self.is_listening = False
+        self.wake_detector = None
         self._setup_tts()
         self._setup_stt()
+        self._setup_wake_word()
     
     def _setup_tts(self):
-        """Setup text-to-speech engine"""
+        """Setup text-to-speech worker (owns the engine on its own thread)"""
         try:
-            self.tts_engine = pyttsx3.init()
-            
-            # Configure voice settings
-            voices = self.tts_engine.getProperty('voices')
-            if voices:
-                # Try to use a male voice if available
-                for voice in voices:
-                    if 'male' in voice.name.lower() or 'david' in voice.name.lower():
-                        self.tts_engine.setProperty('voice', voice.id)
-                        break
-            
-            # Set speech rate
-            self.tts_engine.setProperty('rate', 180)
-            
-            # Set volume
-            self.tts_engine.setProperty('volume', 0.9)
-            
+            worker = TTSWorker(rate=180, volume=0.9)
+            if worker.available:
+                self.tts_engine = worker
         except Exception as e:
             print(f"TTS setup failed: {e}")
     
@@ -46,30 +36,35 @@ class VoiceManager:
         except Exception as e:
             print(f"STT setup failed: {e}")
     
-    def speak(self, text: str, async_mode: bool = False):
-        """Convert text to speech"""
+    def _setup_wake_word(self):
+        """Setup on-device wake word detection (needs enrolled samples)"""
+        try:
+            self.wake_detector = WakeWordDetector()
+            if not self.wake_detector.is_ready():
+                print("ℹ️  No local wake word samples - using online recognition. Run enroll_wake_word() to enable.")
+        except Exception as e:
+            print(f"Wake word setup failed: {e}")
+            self.wake_detector = None
+    
+    def speak(self, text: str, async_mode: bool = False, cache: bool = False):
+        """Convert text to speech
+        
+        Use ``cache=True`` for phrases that repeat (help text, status) so they
+        are rendered once and replayed.
+        """
         if not self.tts_engine:
             print(f"[TTS NOT AVAILABLE] {text}")
             return
         
         try:
-            if async_mode:
-                # Run in background thread
-                thread = threading.Thread(target=self._speak_sync, args=(text,))
-                thread.daemon = True
-                thread.start()
-            else:
-                self._speak_sync(text)
+            self.tts_engine.say(text, cache=cache, wait=not async_mode)
         except Exception as e:
             print(f"TTS error: {e}")
     
-    def _speak_sync(self, text: str):
-        """Synchronous speech"""
-        try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
-        except Exception as e:
-            print(f"Speech error: {e}")
+    def stop_speaking(self):
+        """Interrupt the current utterance and drop queued ones"""
+        if self.tts_engine:
+            self.tts_engine.cancel()
     
     def listen(self, timeout: int = 5) -> Optional[str]:
         """Listen for speech input"""
@@ -102,6 +97,9 @@ class VoiceManager:
     
     def listen_for_wake_word(self, wake_word: str = "hey chandan", timeout: int = 1) -> bool:
         """Listen for wake word"""
+        if self.wake_detector and self.wake_detector.is_ready():
+            return self._listen_for_wake_word_local(timeout)
+        
         try:
             with self.microphone as source:
                 audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=3)
@@ -112,6 +110,41 @@ class VoiceManager:
         except:
             return False
     
+    def _listen_for_wake_word_local(self, timeout: float) -> bool:
+        """Stream microphone frames through the on-device detector for up to timeout seconds"""
+        try:
+            microphone = sr.Microphone(sample_rate=SAMPLE_RATE, chunk_size=FRAME_SAMPLES)
+            deadline = time.monotonic() + timeout
+            with microphone as source:
+                while time.monotonic() < deadline or self.wake_detector.vad.in_speech:
+                    frame = source.stream.read(source.CHUNK)
+                    if self.wake_detector.process_frame(frame) is not None:
+                        return True
+            return False
+        except Exception as e:
+            print(f"Wake word error: {e}")
+            return False
+    
+    def enroll_wake_word(self, samples: int = 3) -> int:
+        """Record the wake phrase a few times and store it for local detection"""
+        if not self.wake_detector:
+            print("❌ Wake word detection not available")
+            return 0
+        
+        recorded = 0
+        for i in range(samples):
+            print(f"🎤 Say your wake phrase ({i + 1}/{samples})...")
+            try:
+                with self.microphone as source:
+                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=3)
+                pcm = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+                path = self.wake_detector.save_template(pcm)
+                print(f"✅ Saved {path}")
+                recorded += 1
+            except Exception as e:
+                print(f"❌ Recording failed: {e}")
+        return recorded
+    
     def start_continuous_listening(self, callback, wake_word: str = "hey chandan"):
         """Start continuous listening in background"""
         def listen_loop():
@@ -145,16 +178,12 @@ class VoiceManager:
         if not self.tts_engine:
             return {"tts_available": False, "stt_available": False}
         
-        try:
-            voices = self.tts_engine.getProperty('voices')
-            voice_count = len(voices) if voices else 0
-            
-            return {
-                "tts_available": True,
-                "stt_available": True,
-                "voice_count": voice_count,
-                "current_rate": self.tts_engine.getProperty('rate'),
-                "current_volume": self.tts_engine.getProperty('volume')
-            }
-        except:
-            return {"tts_available": False, "stt_available": False}
+        return {
+            "tts_available": True,
+            "stt_available": True,
+            "wake_word": "local" if self.wake_detector and self.wake_detector.is_ready() else "online",
+            "voice_count": self.tts_engine.info.get("voice_count", 0),
+            "current_rate": self.tts_engine.info.get("current_rate"),
+            "current_volume": self.tts_engine.info.get("current_volume"),
+            **self.tts_engine.get_stats()
+        }
@@ -0,0 +1,172 @@
+# Voice Pipeline - Overlapped capture, recognition, token streaming and TTS
+import queue
+import re
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+SENTENCE_BOUNDARY = re.compile(r"(.+?[.!?:;])(\s+|$)", re.S)
+
+
+class SentenceChunker:
+    """Turns a stream of tokens into complete sentences as soon as they end"""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self.buffer += token
+        sentences = []
+        while True:
+            match = SENTENCE_BOUNDARY.match(self.buffer)
+            # Need the whitespace after the punctuation so "3.5" or "e.g." mid-token don't split
+            if not match or not match.group(2):
+                break
+            sentences.append(match.group(1).strip())
+            self.buffer = self.buffer[match.end():]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest or None
+
+
+class VoicePipeline:
+    """Runs listening, answering and speaking as concurrent stages.
+
+    ``listener`` thread -> utterance queue -> ``responder`` thread (streams the
+    answer and splits it into sentences) -> speech queue -> ``speaker`` thread.
+    Speaking starts with the first complete sentence while the model is still
+    generating. A new utterance during a turn barges in: the current turn's
+    generation and queued speech are cancelled and speech is stopped.
+    """
+
+    STOP_PHRASES = ("stop listening", "exit voice mode")
+
+    def __init__(self, voice, respond: Callable[[str], Iterator[str]],
+                 on_event: Optional[Callable[[str, str], None]] = None,
+                 speech_queue_size: int = 8):
+        self.voice = voice
+        self.respond = respond
+        self.on_event = on_event or (lambda kind, text: None)
+        self.utterances: "queue.Queue[str]" = queue.Queue()
+        # Bounded: a fast model can't run arbitrarily far ahead of the speaker
+        self.speech: "queue.Queue[Tuple[int, Optional[str]]]" = queue.Queue(maxsize=speech_queue_size)
+        self.running = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self._turn_id = 0
+        self._turn_cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    # Stages
+
+    def _listen_loop(self):
+        while self.running.is_set():
+            try:
+                if not self.voice.listen_for_wake_word():
+                    continue
+                text = self.voice.listen(timeout=10)
+                if not text:
+                    continue
+                self.on_event("heard", text)
+                if not self.idle.is_set():
+                    self.barge_in()
+                if any(phrase in text.lower() for phrase in self.STOP_PHRASES):
+                    self.stop()
+                    break
+                self.utterances.put(text)
+            except Exception as e:
+                self.on_event("error", str(e))
+                time.sleep(0.5)
+
+    def _respond_loop(self):
+        while self.running.is_set():
+            try:
+                text = self.utterances.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                self._turn_id += 1
+                turn_id = self._turn_id
+                self._turn_cancel = cancel = threading.Event()
+            self.idle.clear()
+
+            chunker = SentenceChunker()
+            try:
+                for token in self.respond(text):
+                    if cancel.is_set():
+                        break
+                    for sentence in chunker.feed(token):
+                        self._put_speech(turn_id, sentence, cancel)
+                if not cancel.is_set():
+                    self._put_speech(turn_id, chunker.flush(), cancel)
+            except Exception as e:
+                self.on_event("error", str(e))
+            # End-of-turn marker lets the speaker report the pipeline idle
+            self._put_speech(turn_id, None, threading.Event())
+
+    def _put_speech(self, turn_id: int, sentence: Optional[str], cancel: threading.Event):
+        while self.running.is_set() and not cancel.is_set():
+            try:
+                self.speech.put((turn_id, sentence), timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _speak_loop(self):
+        while self.running.is_set():
+            try:
+                turn_id, sentence = self.speech.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if sentence is None:
+                if turn_id == self._turn_id:
+                    self.idle.set()
+                continue
+            if turn_id != self._turn_id or self._turn_cancel.is_set():
+                continue  # stale sentence from a cancelled turn
+            self.on_event("say", sentence)
+            self.voice.speak(sentence)
+
+    # Control
+
+    def barge_in(self):
+        """Cancel the in-flight turn: stop generating, drop queued speech, stop talking"""
+        self._turn_cancel.set()
+        try:
+            while True:
+                self.speech.get_nowait()
+        except queue.Empty:
+            pass
+        self.voice.stop_speaking()
+        self.idle.set()
+        self.on_event("barge_in", "")
+
+    def start(self):
+        self.running.set()
+        for name, target in (("listener", self._listen_loop), ("responder", self._respond_loop),
+                             ("speaker", self._speak_loop)):
+            thread = threading.Thread(target=target, name=f"voice-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self.running.clear()
+        self._turn_cancel.set()
+        self.voice.stop_speaking()
+
+    def run_forever(self):
+        """Start the stages and block until stopped (Ctrl+C or a stop phrase)"""
+        self.start()
+        try:
+            while self.running.is_set():
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            for thread in self._threads:
+                thread.join(timeout=2)
@@ -0,0 +1,264 @@
+# Wake Word Detection - On-device energy VAD and keyword spotting over a ring buffer
+import math
+import wave
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+
+def frame_rms(frame: bytes) -> float:
+    """Root-mean-square level of a 16-bit little-endian PCM frame"""
+    samples = array('h', frame)
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+def read_wav_frames(wav_path: str, frame_samples: int = FRAME_SAMPLES) -> Iterator[bytes]:
+    """Yield 16 kHz mono 16-bit frames from a WAV file (used for enrolment and tests)"""
+    with wave.open(str(wav_path), 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != SAMPLE_RATE:
+            raise ValueError(f"{wav_path}: expected 16 kHz mono 16-bit PCM")
+        frame_bytes = frame_samples * 2
+        data = wav.readframes(wav.getnframes())
+    for start in range(0, len(data) - frame_bytes + 1, frame_bytes):
+        yield data[start:start + frame_bytes]
+
+
+class EnergyVAD:
+    """Energy voice-activity detector with an adaptive noise floor.
+
+    Speech starts after ``start_frames`` consecutive loud frames and ends after
+    ``end_frames`` consecutive quiet ones, so short clicks and pauses between
+    words don't split an utterance.
+    """
+
+    def __init__(self, ratio: float = 3.0, min_level: float = 300.0,
+                 start_frames: int = 3, end_frames: int = 15):
+        self.ratio = ratio
+        self.min_level = min_level
+        self.start_frames = start_frames
+        self.end_frames = end_frames
+        self.noise_floor = min_level / ratio
+        self.in_speech = False
+        self._loud = 0
+        self._quiet = 0
+
+    def reset(self):
+        self.in_speech = False
+        self._loud = 0
+        self._quiet = 0
+
+    def update(self, frame: bytes) -> Optional[str]:
+        """Feed one frame; returns "start", "end" or None"""
+        level = frame_rms(frame)
+        threshold = max(self.min_level, self.noise_floor * self.ratio)
+        loud = level > threshold
+
+        if not self.in_speech:
+            # Track background noise only while nobody is talking
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * level if not loud else self.noise_floor
+            self._loud = self._loud + 1 if loud else 0
+            if self._loud >= self.start_frames:
+                self.in_speech = True
+                self._quiet = 0
+                return "start"
+        else:
+            self._quiet = 0 if loud else self._quiet + 1
+            if self._quiet >= self.end_frames:
+                self.in_speech = False
+                self._loud = 0
+                return "end"
+        return None
+
+
+class KeywordSpotter:
+    """Template matcher: log-mel features compared with dynamic time warping.
+
+    Templates are enrolled from a few recordings of the wake phrase. Requires
+    numpy; ``is_ready()`` is False without it or without templates.
+    """
+
+    def __init__(self, threshold: float = 0.35, n_mels: int = 20, band: float = 0.3):
+        try:
+            import numpy as np
+            self.np = np
+        except ImportError:
+            self.np = None
+        self.threshold = threshold
+        self.n_mels = n_mels
+        self.band = band
+        self.templates: List = []
+        self._filters = None
+
+    def is_ready(self) -> bool:
+        return self.np is not None and bool(self.templates)
+
+    def _mel_filters(self, n_fft: int):
+        np = self.np
+        if self._filters is None:
+            mel = lambda f: 2595 * np.log10(1 + f / 700.0)
+            hz = lambda m: 700 * (10 ** (m / 2595.0) - 1)
+            points = hz(np.linspace(mel(80), mel(SAMPLE_RATE / 2), self.n_mels + 2))
+            bins = np.floor((n_fft + 1) * points / SAMPLE_RATE).astype(int)
+            filters = np.zeros((self.n_mels, n_fft // 2 + 1))
+            for i in range(1, self.n_mels + 1):
+                left, center, right = bins[i - 1], bins[i], bins[i + 1]
+                for k in range(left, center):
+                    filters[i - 1, k] = (k - left) / max(1, center - left)
+                for k in range(center, right):
+                    filters[i - 1, k] = (right - k) / max(1, right - center)
+            self._filters = filters
+        return self._filters
+
+    def features(self, pcm: bytes):
+        """Log-mel frames (25 ms window, 10 ms hop) with mean normalisation"""
+        np = self.np
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        win, hop, n_fft = 400, 160, 512
+        if len(samples) < win:
+            return np.zeros((0, self.n_mels), dtype=np.float32)
+        count = 1 + (len(samples) - win) // hop
+        index = np.arange(win)[None, :] + hop * np.arange(count)[:, None]
+        frames = samples[index] * np.hamming(win)
+        power = np.abs(np.fft.rfft(frames, n_fft)) ** 2
+        logmel = np.log(power @ self._mel_filters(n_fft).T + 1e-8)
+        return (logmel - logmel.mean(axis=0)).astype(np.float32)
+
+    def _dtw(self, a, b) -> float:
+        """Length-normalised DTW distance (cosine cost, Sakoe-Chiba band)"""
+        np = self.np
+        a_norm = a / (np.linalg.norm(a, axis=1, keepdims=True) + 1e-8)
+        b_norm = b / (np.linalg.norm(b, axis=1, keepdims=True) + 1e-8)
+        cost = 1.0 - a_norm @ b_norm.T
+        n, m = cost.shape
+        width = max(int(self.band * max(n, m)), abs(n - m) + 1)
+        acc = np.full((n + 1, m + 1), np.inf)
+        acc[0, 0] = 0.0
+        for i in range(1, n + 1):
+            center = i * m / n
+            lo, hi = max(1, int(center - width)), min(m, int(center + width))
+            for j in range(lo, hi + 1):
+                acc[i, j] = cost[i - 1, j - 1] + min(acc[i - 1, j], acc[i, j - 1], acc[i - 1, j - 1])
+        return float(acc[n, m] / (n + m))
+
+    def score(self, pcm: bytes) -> float:
+        """Best (lowest) distance to any template; inf if nothing to compare"""
+        if not self.is_ready():
+            return math.inf
+        candidate = self.features(pcm)
+        if not len(candidate):
+            return math.inf
+        return min(self._dtw(candidate, template) for template in self.templates)
+
+    def matches(self, pcm: bytes) -> bool:
+        return self.score(pcm) <= self.threshold
+
+    def add_template(self, pcm: bytes):
+        if self.np is None:
+            raise RuntimeError("numpy is required for wake word enrolment")
+        template = self.features(pcm)
+        if len(template):
+            self.templates.append(template)
+
+
+class WakeWordDetector:
+    """Streams audio frames through a ring buffer, VAD and keyword spotter.
+
+    Nothing leaves the machine: the VAD cuts the stream into utterances and
+    only utterances the spotter confirms are reported, so full speech
+    recognition runs once per wake phrase instead of once per window.
+    """
+
+    def __init__(self, templates_dir: str = "memory/wake_word", buffer_ms: int = 3000,
+                 preroll_ms: int = 200, max_utterance_ms: int = 2500, threshold: float = 0.35):
+        self.templates_dir = Path(templates_dir)
+        self.vad = EnergyVAD()
+        self.spotter = KeywordSpotter(threshold=threshold)
+        self.ring: Deque[bytes] = deque(maxlen=(buffer_ms + preroll_ms) // FRAME_MS)
+        self.preroll_frames = preroll_ms // FRAME_MS
+        self.max_utterance_frames = max_utterance_ms // FRAME_MS
+        self._utterance_frames = 0
+        self._too_long = False
+        self.last_score = math.inf
+        self.load_templates()
+
+    def load_templates(self) -> int:
+        """Enrol every WAV in templates_dir"""
+        self.spotter.templates = []
+        if self.spotter.np is None or not self.templates_dir.exists():
+            return 0
+        for wav_path in sorted(self.templates_dir.glob("*.wav")):
+            try:
+                self.spotter.add_template(b"".join(read_wav_frames(str(wav_path))))
+            except (ValueError, wave.Error) as e:
+                print(f"⚠️  Skipping wake word sample {wav_path.name}: {e}")
+        return len(self.spotter.templates)
+
+    def save_template(self, pcm: bytes) -> Path:
+        """Store a 16 kHz mono recording of the wake phrase and enrol it"""
+        self.templates_dir.mkdir(parents=True, exist_ok=True)
+        path = self.templates_dir / f"sample_{len(list(self.templates_dir.glob('*.wav'))) + 1}.wav"
+        with wave.open(str(path), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(pcm)
+        self.spotter.add_template(pcm)
+        return path
+
+    def is_ready(self) -> bool:
+        return self.spotter.is_ready()
+
+    def reset(self):
+        self.ring.clear()
+        self.vad.reset()
+        self._utterance_frames = 0
+        self._too_long = False
+
+    def process_frame(self, frame: bytes) -> Optional[bytes]:
+        """Feed one frame; returns the utterance audio when the wake phrase is confirmed"""
+        self.ring.append(frame)
+        event = self.vad.update(frame)
+
+        if event == "start":
+            self._utterance_frames = self.vad.start_frames
+            self._too_long = False
+        elif self.vad.in_speech:
+            self._utterance_frames += 1
+            if self._utterance_frames >= self.max_utterance_frames:
+                # Too long to be a wake phrase - ignore it until the speaker pauses
+                self._too_long = True
+        elif event == "end":
+            frame_count, self._utterance_frames = self._utterance_frames, 0
+            if self._too_long:
+                return None
+            # Utterance plus pre-roll, minus the trailing silence that ended it
+            frames = list(self.ring)[-(frame_count + 1 + self.preroll_frames):-self.vad.end_frames]
+            utterance = b"".join(frames)
+            self.last_score = self.spotter.score(utterance)
+            if self.last_score <= self.spotter.threshold:
+                self.ring.clear()
+                return utterance
+        return None
+
+    def detect(self, frames: Iterable[bytes]) -> bool:
+        """Run over a finite stream of frames (e.g. a WAV file)"""
+        for frame in frames:
+            if self.process_frame(frame) is not None:
+                return True
+        # Flush an utterance that runs to the end of the stream
+        silence = b"\x00" * (FRAME_SAMPLES * 2)
+        for _ in range(self.vad.end_frames):
+            if self.process_frame(silence) is not None:
+                return True
+        return False
+
+    def detect_in_wav(self, wav_path: str) -> bool:
+        self.reset()
+        return self.detect(read_wav_frames(wav_path))
@@ -3,6 +3,7 @@ import streamlit as st
 import os
 from pathlib import Path
 import json
+import time
 from datetime import datetime
 
 # Add tools directory to path
@@ -15,6 +16,40 @@ from tools.ai_manager import AIModelManager
 from tools.voice_manager import VoiceManager
 from tools.file_processor import FileProcessor
 
+# Seconds between redraws of a streaming reply
+STREAM_REFRESH = 0.05
+
+@st.cache_resource
+def load_components() -> dict:
+    """Agent components, created once per process and shared by every browser session"""
+    return {
+        "memory": MemoryManager(),
+        "auth": AuthManager(),
+        "ai": AIModelManager(),
+        "voice": VoiceManager(),
+        "file_processor": FileProcessor(),
+    }
+
+def memory_version(memory: MemoryManager) -> tuple:
+    """Changes whenever a memory file is written (by this or any other process)"""
+    version = []
+    for file_path in (memory.short_term_file, memory.long_term_file):
+        try:
+            stat = file_path.stat()
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            version.append(None)
+    return tuple(version)
+
+@st.cache_data(max_entries=4)
+def memory_view(version: tuple) -> dict:
+    """Memory stats and facts, read from disk only when ``version`` changes"""
+    memory = load_components()["memory"]
+    return {"stats": memory.get_memory_stats(), "facts": memory.get_all_facts()}
+
+def current_memory_view() -> dict:
+    return memory_view(memory_version(load_components()["memory"]))
+
 class WebInterface:
     def __init__(self):
         if 'agent_initialized' not in st.session_state:
@@ -26,11 +61,9 @@ class WebInterface:
     
     def initialize_agent(self):
         """Initialize agent components"""
-        st.session_state.memory = MemoryManager()
-        st.session_state.auth = AuthManager()
-        st.session_state.ai = AIModelManager()
-        st.session_state.voice = VoiceManager()
-        st.session_state.file_processor = FileProcessor()
+        # Shared components; only authorization and chat history are per session
+        for name, component in load_components().items():
+            st.session_state[name] = component
         st.session_state.is_authorized = False
         
         # Initialize chat history
@@ -105,10 +138,10 @@ class WebInterface:
         """Render sidebar with system info and controls"""
         st.sidebar.markdown("## 🛠️ System Status")
         
-        # System status
+        # System status (model probes are cached by the AI manager)
         models = st.session_state.ai.get_available_models()
         voice_info = st.session_state.voice.get_voice_info()
-        memory_stats = st.session_state.memory.get_memory_stats()
+        memory_stats = current_memory_view()["stats"]
         
         status_html = f"""
         <div class="status-card">
@@ -141,6 +174,7 @@ class WebInterface:
         
         if st.sidebar.button("🗑️ Clear Memory"):
             st.session_state.memory.clear_memory()
+            memory_view.clear()
             st.sidebar.success("Memory cleared!")
         
         if st.sidebar.button("📊 Reset Chat"):
@@ -148,6 +182,7 @@ class WebInterface:
             st.sidebar.success("Chat reset!")
         
         if st.sidebar.button("🔄 Refresh Status"):
+            st.session_state.ai.refresh_probes()
             st.rerun()
     
     def render_auth_page(self):
@@ -161,7 +196,7 @@ class WebInterface:
         if st.button("🔓 Authorize"):
             if st.session_state.auth.is_authorized(auth_input):
                 st.session_state.is_authorized = True
-                st.session_state.auth.update_last_access()
+                st.session_state.auth.update_last_access("web")
                 st.success("✅ Authorization successful!")
                 st.rerun()
             else:
@@ -206,21 +241,25 @@ class WebInterface:
                     </div>
                     """, unsafe_allow_html=True)
         
+            # The reply streams in here while it is generated
+            reply_placeholder = st.empty()
+        
         # Chat input
         with st.form("chat_form", clear_on_submit=True):
             user_input = st.text_input("Your message:", placeholder="Type your message here...")
             submitted = st.form_submit_button("Send")
             
             if submitted and user_input:
-                self.process_chat_message(user_input)
+                self.process_chat_message(user_input, reply_placeholder)
                 st.rerun()
     
     def render_memory_interface(self):
         """Render memory management interface"""
         st.markdown("## 🧠 Memory Management")
         
-        # Memory stats
-        memory_stats = st.session_state.memory.get_memory_stats()
+        # Memory stats (re-read only after memory files change)
+        view = current_memory_view()
+        memory_stats = view['stats']
         
         col1, col2, col3 = st.columns(3)
         
@@ -242,12 +281,13 @@ class WebInterface:
             if st.form_submit_button("💾 Remember"):
                 if fact:
                     result = st.session_state.memory.remember_fact(fact, category)
+                    memory_view.clear()
                     st.success(result)
                     st.rerun()
         
         # Show memories
         st.markdown("### 📝 Long-term Memory")
-        facts = st.session_state.memory.get_all_facts()
+        facts = view['facts']
         
         if facts:
             for i, fact in enumerate(reversed(facts[-20:]), 1):
@@ -279,7 +319,7 @@ class WebInterface:
         # File upload
         uploaded_file = st.file_uploader(
             "Choose a file to process:",
-            type=['pdf', 'docx', 'xlsx', 'csv', 'txt', 'json']
+            type=[ext.lstrip('.') for ext in st.session_state.file_processor.get_supported_formats()]
         )
         
         if uploaded_file is not None:
@@ -330,7 +370,7 @@ class WebInterface:
         formats = st.session_state.file_processor.get_supported_formats()
         st.write(", ".join(formats))
     
-    def process_chat_message(self, user_input: str):
+    def process_chat_message(self, user_input: str, placeholder=None):
         """Process chat message"""
         # Add user message to history
         st.session_state.chat_history.append({
@@ -339,8 +379,13 @@ class WebInterface:
             'timestamp': datetime.now().isoformat()
         })
         
-        # Process with agent
-        response = self.get_agent_response(user_input)
+        # Process with agent, showing the reply as it streams in
+        response = ""
+        last_draw = 0.0
+        for response in self.stream_agent_response(user_input):
+            if placeholder is not None and time.monotonic() - last_draw >= STREAM_REFRESH:
+                placeholder.markdown(f"**🤖 Assistant:** {response}▌")
+                last_draw = time.monotonic()
         
         # Add assistant response to history
         st.session_state.chat_history.append({
@@ -349,13 +394,14 @@ class WebInterface:
             'timestamp': datetime.now().isoformat()
         })
     
-    def get_agent_response(self, user_input: str) -> str:
-        """Get response from agent"""
+    def stream_agent_response(self, user_input: str):
+        """Yield the agent's reply so far, growing as tokens arrive"""
         try:
             # Check for commands
             command = st.session_state.auth.extract_command(user_input)
             if command:
-                return self.handle_command(command)
+                yield self.handle_command(command)
+                return
             
             # Get AI response
             context = st.session_state.memory.get_context_for_prompt()
@@ -364,16 +410,17 @@ class WebInterface:
                 context
             )
             
-            ai_result = st.session_state.ai.get_response(user_input, system_prompt)
-            response = ai_result["response"]
+            response = ""
+            for token in st.session_state.ai.stream_response(user_input, system_prompt):
+                response += token
+                yield response
             
             # Save to memory
             st.session_state.memory.add_conversation(user_input, response)
-            
-            return response
+            memory_view.clear()
         
         except Exception as e:
-            return f"❌ Error: {str(e)}"
+            yield f"❌ Error: {str(e)}"
     
     def handle_command(self, command: dict) -> str:
         """Handle built-in commands"""
@@ -381,10 +428,14 @@ class WebInterface:
         content = command["content"]
         
         if cmd_type == "remember":
-            return st.session_state.memory.remember_fact(content)
+            result = st.session_state.memory.remember_fact(content)
+            memory_view.clear()
+            return result
         
         elif cmd_type == "forget":
-            return st.session_state.memory.forget_fact(content)
+            result = st.session_state.memory.forget_fact(content)
+            memory_view.clear()
+            return result
         
         elif cmd_type == "recall":
             facts = st.session_state.memory.get_all_facts()
@@ -398,6 +449,7 @@ class WebInterface:
         
         elif cmd_type == "clear_memory":
             st.session_state.memory.clear_memory()
+            memory_view.clear()
             return "✅ Memory cleared!"
         
         elif cmd_type == "status":